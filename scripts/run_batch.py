@@ -0,0 +1,10 @@
+#!/usr/bin/python3
+import sys
+import os.path
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+sys.path.insert(0, src_path)
+
+from whisper_shorts_subs.cli import run_batch
+
+sys.exit(run_batch())
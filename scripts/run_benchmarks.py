@@ -0,0 +1,329 @@
+#!/usr/bin/python3
+"""Benchmarks the subtitle render and export hot paths on synthetic data.
+
+Example:
+    python3 scripts/run_benchmarks.py --output bench.json
+    python3 scripts/run_benchmarks.py --quick --baseline bench.json
+"""
+
+import argparse
+import json
+import os.path
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+sys.path.insert(0, src_path)
+
+import cv2
+import numpy as np
+from faster_whisper.transcribe import Word
+
+from whisper_shorts_subs.editing import EditableTranscript
+from whisper_shorts_subs.render import SubtitleRenderer
+from whisper_shorts_subs.subtitle import (
+    add_text_with_outlines,
+    add_words_with_outlines,
+    create_segments,
+    create_subtitled_video,
+)
+from whisper_shorts_subs.transcript import Transcript
+from whisper_shorts_subs.util import string_to_words, words_to_string
+
+STRATEGIES = ["whole_segment", "type", "highlight"]
+OUTLINES = [{"color": (0, 0, 0), "thickness": 8}]
+
+
+def synthetic_words(count, seed=0):
+    """Creates a transcript of random words with realistic timings.
+
+    Args:
+        count (int): The number of words.
+        seed (int): Random seed.
+
+    Returns:
+        (List[faster_whisper.transcribe.Word]): The words.
+    """
+    rng = random.Random(seed)
+    res = []
+    time_s = 0.2
+    for _ in range(count):
+        length = rng.randint(2, 9)
+        text = " " + "".join(
+            rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(length)
+        )
+        duration = rng.uniform(0.15, 0.5)
+        res.append(
+            Word(round(time_s, 2), round(time_s + duration, 2), text, rng.random())
+        )
+        time_s += duration + (rng.uniform(0.6, 1.5) if rng.random() < 0.1 else 0.05)
+    return res
+
+
+def synthetic_video(path, width, height, frames, fps=30):
+    """Writes a video of moving gradients.
+
+    Args:
+        path (str): File path to write the mp4 to.
+        width (int): Frame width.
+        height (int): Frame height.
+        frames (int): Number of frames.
+        fps (float): Frames per second.
+    """
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    for ix in range(frames):
+        frame = np.broadcast_to((gradient + ix * 4) % 256, (height, width, 3))
+        out.write(np.ascontiguousarray(frame, dtype=np.uint8))
+    out.release()
+
+
+def measure(fn, repeat=1):
+    """Times a function, then measures the peak memory it allocates through python and numpy in a separate call.
+
+    Args:
+        fn (Callable[[], Any]): The function to benchmark.
+        repeat (int): How many times to call it.
+
+    Returns:
+        (Dict): Total seconds, seconds per call and peak traced bytes.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "seconds_per_call": seconds / repeat,
+        "calls_per_second": repeat / seconds if seconds > 0 else float("inf"),
+        "peak_bytes": peak,
+    }
+
+
+def bench_transcript(word_counts, repeat):
+    """Benchmarks transcript formatting, parsing and segmentation."""
+    res = {}
+    for count in word_counts:
+        words = synthetic_words(count)
+        text = words_to_string(words)
+        res[f"words_to_string/{count}"] = measure(
+            lambda: words_to_string(words), repeat
+        )
+        res[f"string_to_words/{count}"] = measure(lambda: string_to_words(text), repeat)
+        transcript = Transcript.from_words(words)
+        res[f"Transcript.to_string/{count}"] = measure(
+            lambda: transcript.to_string(), repeat
+        )
+        res[f"Transcript.from_string/{count}"] = measure(
+            lambda: Transcript.from_string(text), repeat
+        )
+        res[f"Transcript.segment_ranges/{count}"] = measure(
+            lambda: transcript.segment_ranges(max_segment_words=5), repeat
+        )
+        res[f"Transcript.segment_ranges/chars_duration/{count}"] = measure(
+            lambda: transcript.segment_ranges(
+                max_segment_words=5, max_segment_chars=32, max_segment_duration=3
+            ),
+            repeat,
+        )
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, "transcript.npz")
+            transcript.save(path)
+            res[f"Transcript.load/{count}"] = measure(
+                lambda: Transcript.load(path), repeat
+            )
+        res[f"create_segments/{count}"] = measure(
+            lambda: create_segments(words, max_segment_words=5), repeat
+        )
+        editor = EditableTranscript(text, max_segment_words=5)
+        editor.resegment()
+        lines = text.split("\n")
+        lines[len(lines) // 2] = lines[len(lines) // 2].replace("\t", " \t", 1)
+        edits = ["\n".join(lines), text]
+
+        def edit_and_resegment():
+            edits.reverse()
+            editor.update(edits[0])
+            editor.resegment()
+
+        res[f"EditableTranscript.edit/{count}"] = measure(edit_and_resegment, repeat)
+    return res
+
+
+def bench_text(resolutions, repeat):
+    """Benchmarks drawing text onto single frames."""
+    res = {}
+    words = ["some", "words", "on", "screen", "now"]
+    for width, height in resolutions:
+        frame = np.zeros((height, width, 3), np.uint8)
+        res[f"add_text_with_outlines/{width}x{height}"] = measure(
+            lambda: add_text_with_outlines(frame, " ".join(words), outlines=OUTLINES),
+            repeat,
+        )
+        res[f"add_words_with_outlines/{width}x{height}"] = measure(
+            lambda: add_words_with_outlines(
+                frame,
+                words,
+                highlight_index=2,
+                current_word_scale=1.2,
+                outlines=OUTLINES,
+            ),
+            repeat,
+        )
+        for rasterizer, use_glyph_atlas in [("cv2", False), ("atlas", True)]:
+            renderer = SubtitleRenderer(
+                frame.shape,
+                strategy="highlight",
+                use_glyph_atlas=use_glyph_atlas,
+                outlines=OUTLINES,
+                current_word_scale=1.2,
+            )
+            renderer.rasterize((tuple(words), 0))
+            res[f"SubtitleRenderer.rasterize/{rasterizer}/{width}x{height}"] = measure(
+                lambda: renderer.rasterize((tuple(words), 2)), repeat
+            )
+    return res
+
+
+def bench_video(resolutions, frames, work_dir):
+    """Benchmarks full subtitled video creation for each strategy."""
+    res = {}
+    segments = create_segments(
+        synthetic_words(int(frames / 30 * 3) + 1), max_segment_words=5
+    )
+    for width, height in resolutions:
+        video = os.path.join(work_dir, f"input_{width}x{height}.mp4")
+        synthetic_video(video, width, height, frames)
+        for strategy in STRATEGIES:
+            outfile = os.path.join(work_dir, f"output_{strategy}.mp4")
+            result = measure(
+                lambda: create_subtitled_video(
+                    video,
+                    outfile,
+                    segments,
+                    outlines=OUTLINES,
+                    strategy=strategy,
+                    current_word_scale=1.2,
+                    show_progress=False,
+                )
+            )
+            result["frames_per_second"] = frames / result["seconds"]
+            res[f"create_subtitled_video/{strategy}/{width}x{height}"] = result
+        outfile = os.path.join(work_dir, "output_pipelined.mp4")
+        result = measure(
+            lambda: create_subtitled_video(
+                video,
+                outfile,
+                segments,
+                outlines=OUTLINES,
+                strategy="highlight",
+                current_word_scale=1.2,
+                show_progress=False,
+                pipelined=True,
+            )
+        )
+        result["frames_per_second"] = frames / result["seconds"]
+        res[f"create_subtitled_video/highlight/pipelined/{width}x{height}"] = result
+    return res
+
+
+def max_rss_kb():
+    """(Optional[int]): Peak resident memory of this process in kB, or None where it is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def compare(results, baseline, tolerance):
+    """Finds benchmarks that got slower than a baseline.
+
+    Args:
+        results (Dict): Benchmark results as produced by this script.
+        baseline (Dict): Earlier results to compare against.
+        tolerance (float): Allowed relative slowdown, e.g. 0.2 for 20%.
+
+    Returns:
+        (List[str]): Descriptions of each regression.
+    """
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["seconds_per_call"]
+        after = result["seconds_per_call"]
+        if before > 0 and after > before * (1 + tolerance):
+            regressions.append(f"{name}: {before:.6f}s -> {after:.6f}s per call")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Run small sizes only.")
+    parser.add_argument("--frames", type=int, default=None, help="Frames per video.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against an earlier JSON file.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        resolutions = [(540, 960)]
+        word_counts = [100, 1000]
+        frames = args.frames or 60
+        repeat = 20
+    else:
+        resolutions = [(540, 960), (1080, 1920), (2160, 3840)]
+        word_counts = [100, 1000, 10000]
+        frames = args.frames or 300
+        repeat = 100
+
+    benchmarks = {}
+    benchmarks.update(bench_transcript(word_counts, 5))
+    benchmarks.update(bench_text(resolutions, repeat))
+    work_dir = tempfile.mkdtemp()
+    try:
+        benchmarks.update(bench_video(resolutions, frames, work_dir))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "max_rss_kb": max_rss_kb(),
+        "benchmarks": benchmarks,
+    }
+    for name, result in benchmarks.items():
+        line = f"{name:<50} {result['seconds_per_call'] * 1000:10.3f} ms"
+        if "frames_per_second" in result:
+            line += f" {result['frames_per_second']:8.1f} fps"
+        line += f" {result['peak_bytes'] / 1e6:9.2f} MB peak"
+        print(line)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if len(regressions) > 0:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
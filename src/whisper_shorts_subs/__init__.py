@@ -5,4 +5,13 @@ except ImportError:
 
 __version__ = pkg_resources.read_text(__name__, "VERSION").strip("\n")
 
-from .app import run_app
+
+def run_app():
+    """Entrypoint for the GUI executable.
+
+    The GUI is imported only when it is started, so importing the package or one of its modules, e.g.
+    whisper_shorts_subs.subtitle for exports, does not load customtkinter or the whisper model.
+    """
+    from .app import run_app
+
+    run_app()
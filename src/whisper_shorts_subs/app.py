@@ -1,10 +1,8 @@
 import customtkinter
 from tkinter import CENTER, filedialog, Canvas
-from faster_whisper import WhisperModel
 
 import threading
 import queue
-import tempfile
 import numpy as np
 import cv2
 import os
@@ -12,15 +10,14 @@ import platform
 
 from PIL import Image, ImageTk
 
-from .audio import add_movie_audio
-from .subtitle import (
-    create_segments,
-    create_subtitled_video,
-    add_text_with_outlines,
-    add_words_with_outlines,
-)
-from .transcribe import transcribe_with_timestamps
-from .util import string_to_words, words_to_string
+from .audio import load_audio
+from .cache import ExportCache, TranscriptionCache
+from .editing import EditableTranscript
+from .encode import ENCODER_PROFILES
+from .export import create_subtitled_video_parallel
+from .preview import PreviewSource, preview_renderer, render_preview
+from .progress import MetricsLog, format_progress, format_stages
+from .util import header_string, word_to_string
 
 customtkinter.set_appearance_mode("dark")
 customtkinter.set_default_color_theme("dark-blue")
@@ -39,6 +36,17 @@ class App(customtkinter.CTk):
         outline_scale (float): Default outline size.
         orient_y_percent (float): Default Y position of text.
         current_word_scale (float): Multiplier on current highlighted word size.
+        export_processes (int): Number of processes to render exports with. Defaults to the number of cpus.
+        cache_dir (str): Directory to cache transcriptions in. Defaults to
+            whisper_shorts_subs.cache.default_cache_dir().
+        cache_max_bytes (int): Maximum size of the transcription cache. Set to 0 to disable caching.
+        preview_delay_ms (int): How long to collect slider changes before rendering a new preview.
+        metrics_log (str): If provided, export progress and timings are appended to this file as lines of JSON.
+        encoder_profile (str): Default export quality, one of whisper_shorts_subs.encode.ENCODER_PROFILES.
+        export_cache_dir (str): Directory to cache encoded chunks of exports in, so exporting again after an edit only
+            re-encodes the chunks whose subtitles changed. Defaults to
+            whisper_shorts_subs.cache.default_cache_dir("exports").
+        export_cache_max_bytes (int): Maximum size of the export cache. Set to 0 to disable it.
     """
 
     def __init__(
@@ -52,6 +60,14 @@ class App(customtkinter.CTk):
         outline_scale=8,
         orient_y_percent=0.5,
         current_word_scale=1,
+        export_processes=None,
+        cache_dir=None,
+        cache_max_bytes=100 * 1024 * 1024,
+        preview_delay_ms=30,
+        metrics_log=None,
+        encoder_profile="balanced",
+        export_cache_dir=None,
+        export_cache_max_bytes=1024 * 1024 * 1024,
     ):
         super().__init__()
         self.model_kwargs = (
@@ -59,18 +75,46 @@ class App(customtkinter.CTk):
             if model_kwargs is not None
             else {"device": "cpu", "compute_type": "int8"}
         )
-        self.model = WhisperModel(model_size, **self.model_kwargs)
+        self.model = None
+        self.model_loader = ModelLoader(model_size, self.model_kwargs)
+        self.model_loader.start()
+        self.model_settings = dict(self.model_kwargs, model_size=model_size)
+        self.transcription_cache = (
+            TranscriptionCache(cache_dir, max_bytes=cache_max_bytes)
+            if cache_max_bytes > 0
+            else None
+        )
+        self.export_cache = (
+            ExportCache(export_cache_dir, max_bytes=export_cache_max_bytes)
+            if export_cache_max_bytes > 0
+            else None
+        )
         self.transcription_queue = queue.Queue()
         self.export_queue = queue.Queue()
         self.input_video = ""
         self.font_scale = font_scale
         self.orient_y_percent = orient_y_percent
         self.words_per_segment = words_per_segment
+        self.transcript_editor = EditableTranscript(
+            max_segment_words=int(words_per_segment)
+        )
         self.outline_scale = outline_scale
         self.current_word_scale = current_word_scale
+        self.export_processes = export_processes
+        self.metrics_log = metrics_log
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
         self.canvas_image = None
+        self.preview_source = None
+        self.preview_time = 0
+        self.preview_delay_ms = preview_delay_ms
+        self.preview_scheduled = False
+        self.preview_polling = False
+        self.preview_request_id = 0
+        self.preview_shown_id = 0
+        self.preview_queue = queue.Queue()
+        self.preview_worker = PreviewWorker(self.preview_queue)
+        self.preview_worker.start()
 
         self.title("whisper-shorts-subs")
         self.geometry(f"{1024}x{512}")
@@ -170,10 +214,33 @@ class App(customtkinter.CTk):
         self.current_word_scale_slider.set(self.current_word_scale)
         self.current_word_scale_slider.grid(column=2, row=6)
 
+        self.time_slider_label = customtkinter.CTkLabel(self, text="time:")
+        self.time_slider_label.grid(column=1, row=7)
+        self.time_slider = customtkinter.CTkSlider(
+            self,
+            from_=0,
+            to=1,
+            width=width,
+            command=lambda x: self.set_and_update_canvas("preview_time", x),
+        )
+        self.time_slider.set(0)
+        self.time_slider.grid(column=2, row=7)
+
+        self.encoder_profile_label = customtkinter.CTkLabel(self, text="quality:")
+        self.encoder_profile_label.grid(column=1, row=8)
+        self.encoder_profile = customtkinter.StringVar(value=encoder_profile)
+        self.encoder_profile_menu = customtkinter.CTkOptionMenu(
+            self,
+            values=list(ENCODER_PROFILES),
+            variable=self.encoder_profile,
+            width=width,
+        )
+        self.encoder_profile_menu.grid(column=2, row=8)
+
         self.button_export_video = customtkinter.CTkButton(
             self, text="Export Video", command=self.export_video
         )
-        self.button_export_video.grid(column=1, row=7, padx=5, pady=24, columnspan=2)
+        self.button_export_video.grid(column=1, row=9, padx=5, pady=24, columnspan=2)
 
         self.status_label = customtkinter.CTkLabel(
             self,
@@ -182,17 +249,28 @@ class App(customtkinter.CTk):
             wraplength=width,
             justify=CENTER,
         )
-        self.status_label.grid(column=1, row=8, columnspan=2, sticky="n")
+        self.status_label.grid(column=1, row=10, columnspan=2, sticky="n")
         self.status_label.grid_remove()
         self.progress_bar = customtkinter.CTkProgressBar(
             self, orientation="horizontal", width=width
         )
         self.progress_bar.configure(mode="indeterminate", indeterminate_speed=1)
         self.progress_bar.grid(
-            column=1, row=9, columnspan=2, sticky="n", padx=5, pady=5
+            column=1, row=11, columnspan=2, sticky="n", padx=5, pady=5
         )
         self.progress_bar.grid_remove()
 
+        self.model_label = customtkinter.CTkLabel(
+            self,
+            text="loading whisper model...",
+            fg_color="transparent",
+            wraplength=width,
+            justify=CENTER,
+        )
+        self.model_label.grid(column=1, row=12, columnspan=2, sticky="n")
+        self.button_load_video.configure(state="disabled")
+        self.after(100, self.poll_model_loader)
+
         self.preview_canvas = Canvas(
             self, width=self.canvas_width, height=self.canvas_height
         )
@@ -201,37 +279,105 @@ class App(customtkinter.CTk):
         )
         self.update_canvas()
 
-    def update_canvas(self):
-        """Updates the image displayed on the preview canvas."""
-        width, height = 1080, 1920
-        image = np.zeros((height, width, 3), np.uint8)
-        image[:, :, 1] = 180
-        words = ["text" for _ in range(int(self.words_per_segment))]
-        if self.strategy.get() == "highlight":
-            image = add_words_with_outlines(
-                image,
-                words,
-                highlight_index=0,
-                current_word_scale=self.current_word_scale,
-                font_scale=self.font_scale,
-                orient_y_percent=self.orient_y_percent,
-                outlines=[{"color": (0, 0, 0), "thickness": int(self.outline_scale)}],
+    def poll_model_loader(self):
+        """Enables transcription once the whisper model has loaded in the background."""
+        if not self.model_loader.ready.is_set():
+            self.after(100, self.poll_model_loader)
+            return
+        if self.model_loader.error is not None:
+            self.model_label.configure(
+                text=f"Failed to load whisper model: {self.model_loader.error}"
             )
-        else:
-            text = " ".join(words)
-            image = add_text_with_outlines(
-                image,
-                text,
-                font_scale=self.font_scale,
-                orient_y_percent=self.orient_y_percent,
-                outlines=[{"color": (0, 0, 0), "thickness": int(self.outline_scale)}],
+            return
+        self.model = self.model_loader.model
+        self.model_label.configure(text="whisper model ready")
+        self.enable_buttons()
+
+    def update_canvas(self):
+        """Schedules the preview canvas to be updated.
+
+        Changes arriving within preview_delay_ms of each other are coalesced into a single request to the
+        PreviewWorker, so dragging a slider never renders on the UI thread.
+        """
+        if self.preview_scheduled:
+            return
+        self.preview_scheduled = True
+        self.after(self.preview_delay_ms, self.request_preview)
+
+    def update_segments(self):
+        """Brings the segments up to date with the textbox, parsing and segmenting only what was edited.
+
+        Returns:
+            (List[List[faster_whisper.transcribe.Word]]): The segments replaced since the last update.
+
+        Raises:
+            ValueError: If the transcript does not parse. The last valid segments are kept.
+        """
+        self.transcript_editor.configure(max_segment_words=int(self.words_per_segment))
+        self.transcript_editor.update(self.textbox.get("0.0", "end").strip("\n"))
+        return self.transcript_editor.resegment()[1]
+
+    def request_preview(self):
+        """Sends the current preview settings to the PreviewWorker and waits for the image."""
+        self.preview_scheduled = False
+        self.preview_request_id += 1
+        try:
+            removed_segments = self.update_segments()
+        except ValueError:
+            removed_segments = []
+        self.preview_worker.request(
+            PreviewRequest(
+                request_id=self.preview_request_id,
+                source=self.preview_source,
+                preview_time=self.preview_time,
+                segments=list(self.transcript_editor.segments),
+                removed_segments=removed_segments,
+                words_per_segment=int(self.words_per_segment),
+                strategy=self.strategy.get(),
+                canvas_size=(self.canvas_width, self.canvas_height),
+                text_kwargs={
+                    "font_scale": self.font_scale,
+                    "orient_y_percent": self.orient_y_percent,
+                    "current_word_scale": self.current_word_scale,
+                    "outlines": [
+                        {"color": (0, 0, 0), "thickness": int(self.outline_scale)}
+                    ],
+                },
             )
-        image = cv2.resize(
-            image, (self.canvas_width, self.canvas_height), interpolation=cv2.INTER_AREA
         )
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        self.canvas_image = ImageTk.PhotoImage(image=Image.fromarray(image))
-        self.preview_canvas.create_image(0, 0, anchor="nw", image=self.canvas_image)
+        if not self.preview_polling:
+            self.preview_polling = True
+            self.after(15, self.poll_preview_results)
+
+    def poll_preview_results(self):
+        """Shows the newest rendered preview, or why it failed, and keeps polling while requests are outstanding."""
+        image = None
+        error = None
+        while True:
+            try:
+                request_id, result, message = self.preview_queue.get_nowait()
+            except queue.Empty:
+                break
+            if request_id > self.preview_shown_id:
+                self.preview_shown_id = request_id
+                image = result
+                error = message
+        if error is not None:
+            self.status_label.configure(text=f"Preview failed: {error}")
+            self.status_label.grid()
+        if image is not None:
+            self.canvas_image = ImageTk.PhotoImage(image=image)
+            self.preview_canvas.delete("all")
+            self.preview_canvas.create_image(
+                self.canvas_width // 2,
+                self.canvas_height // 2,
+                anchor="center",
+                image=self.canvas_image,
+            )
+        if self.preview_shown_id < self.preview_request_id:
+            self.after(15, self.poll_preview_results)
+        else:
+            self.preview_polling = False
 
     def set_and_update_canvas(self, attribute_name, value):
         """Sets a class attribute and updates the preview canvas.
@@ -249,8 +395,10 @@ class App(customtkinter.CTk):
         self.button_export_video.configure(state="disabled")
 
     def enable_buttons(self):
-        """Enables UI buttons."""
-        self.button_load_video.configure(state="normal")
+        """Enables UI buttons. Transcription stays disabled until the whisper model has loaded."""
+        self.button_load_video.configure(
+            state="normal" if self.model is not None else "disabled"
+        )
         self.button_export_video.configure(state="normal")
 
     def transcribe_video(self):
@@ -261,28 +409,54 @@ class App(customtkinter.CTk):
         if len(filename) == 0:
             return
         self.input_video = filename
+        if self.preview_source is not None:
+            self.preview_source.release()
+        self.preview_source = PreviewSource(
+            filename, (self.canvas_width, self.canvas_height)
+        )
+        self.update_canvas()
         self.disable_buttons()
         self.status_label.configure(text="transcribing...")
         self.status_label.grid()
+        self.progress_bar.configure(mode="determinate")
+        self.progress_bar.set(0)
         self.progress_bar.grid()
-        self.progress_bar.start()
+        self.textbox.delete("0.0", "end")
+        self.textbox.insert("0.0", header_string())
         TranscriptionWorker(
-            self.transcription_queue, self.model, self.input_video
+            self.transcription_queue,
+            self.model,
+            self.input_video,
+            cache=self.transcription_cache,
+            model_settings=self.model_settings,
         ).start()
-        self.after(500, self.poll_transcribe_results)
+        self.after(200, self.poll_transcribe_results)
 
     def poll_transcribe_results(self):
-        """Waits on transcription results."""
-        try:
-            words = self.transcription_queue.get_nowait()
-            self.textbox.delete("0.0", "end")
-            self.textbox.insert("0.0", words_to_string(words))
-            self.progress_bar.stop()
-            self.progress_bar.grid_remove()
+        """Appends newly transcribed words to the textbox and updates progress until transcription is done."""
+        while True:
+            try:
+                status, words, progress = self.transcription_queue.get_nowait()
+            except queue.Empty:
+                self.after(200, self.poll_transcribe_results)
+                return
+            if status in ("done", "error"):
+                break
+            if len(words) > 0:
+                self.textbox.insert(
+                    "end-1c",
+                    "".join("\n" + word_to_string(word) for word in words),
+                )
+            self.progress_bar.set(progress)
+            self.status_label.configure(text=f"transcribing... {progress:.0%}")
+        self.progress_bar.configure(mode="indeterminate")
+        self.progress_bar.grid_remove()
+        if status == "error":
+            self.status_label.configure(text=f"Transcription failed: {words}")
+        else:
             self.status_label.grid_remove()
-            self.enable_buttons()
-        except queue.Empty:
-            self.after(500, self.poll_transcribe_results)
+        self.enable_buttons()
+        self.update_canvas()
 
     def export_video(self):
         """Spawns a worker to work on video export."""
@@ -299,65 +473,308 @@ class App(customtkinter.CTk):
         if filename == "":
             return
         try:
-            words = string_to_words(self.textbox.get("0.0", "end").strip("\n"))
-        except Exception:
+            self.update_segments()
+        except ValueError:
             self.status_label.configure(text="Error in transcript format")
             self.status_label.grid()
             return
         self.disable_buttons()
-        segments = create_segments(words, max_segment_words=int(self.words_per_segment))
+        segments = list(self.transcript_editor.segments)
         self.status_label.configure(text="Generating subtitled video...")
         self.status_label.grid()
+        self.progress_bar.configure(mode="determinate")
+        self.progress_bar.set(0)
         self.progress_bar.grid()
-        self.progress_bar.start()
         ExportWorker(
             self.export_queue,
             filename,
             self.input_video,
             segments,
+            processes=self.export_processes,
+            metrics_log=self.metrics_log,
+            encoder=self.encoder_profile.get(),
+            export_cache=self.export_cache,
             font_scale=self.font_scale,
             orient_y_percent=self.orient_y_percent,
             outlines=[{"color": (0, 0, 0), "thickness": int(self.outline_scale)}],
             strategy=self.strategy.get(),
             current_word_scale=self.current_word_scale,
         ).start()
-        self.after(500, self.poll_export_results())
+        self.after(200, self.poll_export_results)
 
     def poll_export_results(self):
-        """Waits on export results."""
-        try:
-            status = self.export_queue.get_nowait()
-            if status == "audio":
-                self.status_label.configure(text="Adding audio from original...")
-                self.after(500, self.poll_export_results)
+        """Updates export progress until the export is done or failed."""
+        while True:
+            try:
+                status, result = self.export_queue.get_nowait()
+            except queue.Empty:
+                self.after(200, self.poll_export_results)
                 return
-            self.progress_bar.stop()
-            self.progress_bar.grid_remove()
+            if status == "progress":
+                total_frames = result["total_frames"]
+                self.progress_bar.set(
+                    result["frames"] / total_frames if total_frames > 0 else 1.0
+                )
+                self.status_label.configure(
+                    text=f"Generating subtitled video... {format_progress(result)}"
+                )
+                continue
+            break
+        self.progress_bar.configure(mode="indeterminate")
+        self.progress_bar.grid_remove()
+        if status == "error":
+            self.status_label.configure(text=f"Export failed: {result}")
+        elif result is None:
             self.status_label.grid_remove()
-            self.enable_buttons()
-        except queue.Empty:
-            self.after(500, self.poll_export_results)
+        else:
+            self.status_label.configure(
+                text=f"Exported in {result['elapsed']:.1f}s ({format_stages(result)})"
+            )
+        self.enable_buttons()
+
+
+class PreviewRequest:
+    """Everything needed to render one preview image, captured on the UI thread.
+
+    Args:
+        request_id (int): Increasing number identifying the request.
+        source (whisper_shorts_subs.preview.PreviewSource): The loaded video, or None to draw placeholder text.
+        preview_time (float): Position in the video, from 0 to 1.
+        segments (List[List[faster_whisper.transcribe.Word]]): The segments of the transcript.
+        removed_segments (List[List[faster_whisper.transcribe.Word]]): Segments edited away since the last request,
+            whose cached states can be dropped.
+        words_per_segment (int): The maximum number of words to show at a time.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+        canvas_size (Tuple[int, int]): Width and height of the preview canvas.
+        text_kwargs (dict): Style settings at full frame size.
+    """
+
+    def __init__(
+        self,
+        request_id,
+        source,
+        preview_time,
+        segments,
+        removed_segments,
+        words_per_segment,
+        strategy,
+        canvas_size,
+        text_kwargs,
+    ):
+        self.request_id = request_id
+        self.source = source
+        self.preview_time = preview_time
+        self.segments = segments
+        self.removed_segments = removed_segments
+        self.words_per_segment = words_per_segment
+        self.strategy = strategy
+        self.canvas_size = canvas_size
+        self.text_kwargs = text_kwargs
+
+
+class PreviewWorker(threading.Thread):
+    """A thread worker rendering preview images.
+
+    Only the newest request is kept: requests made while a preview is rendering replace each other, so stale previews
+    are never rendered. Results are posted to the queue as (request_id, PIL.Image.Image, None), or as
+    (request_id, None, message) if rendering failed.
+
+    Args:
+        preview_queue (queue.Queue): The queue to post rendered previews to.
+    """
+
+    def __init__(self, preview_queue):
+        self.queue = preview_queue
+        self.condition = threading.Condition()
+        self.pending = None
+        self.renderer_key = None
+        self.renderer = None
+        super().__init__(daemon=True)
+
+    def request(self, preview_request):
+        """Asks for a preview to be rendered, replacing any request that has not started yet.
+
+        Args:
+            preview_request (PreviewRequest): The preview to render.
+        """
+        with self.condition:
+            if self.pending is not None:
+                preview_request.removed_segments = (
+                    self.pending.removed_segments + preview_request.removed_segments
+                )
+            self.pending = preview_request
+            self.condition.notify()
+
+    def get_renderer(self, frame_shape, scale, strategy, text_kwargs):
+        """Fetches a renderer for the preview settings, reusing the last one and its cached states while they match.
+
+        Args:
+            frame_shape (Tuple[int, int]): The height and width of the preview frames.
+            scale (float): Preview size divided by the full frame size.
+            strategy (str): One of "whole_segment", "type" or "highlight".
+            text_kwargs (dict): Style settings at full frame size.
+
+        Returns:
+            (whisper_shorts_subs.render.SubtitleRenderer): The renderer.
+        """
+        key = (tuple(frame_shape), scale, strategy, repr(sorted(text_kwargs.items())))
+        if key != self.renderer_key:
+            self.renderer_key = key
+            self.renderer = preview_renderer(
+                frame_shape, scale, strategy, **text_kwargs
+            )
+        return self.renderer
+
+    def render(self, preview_request):
+        """Renders a preview.
+
+        Shows the frame of the loaded video at the requested time with the transcript segment on screen at that time,
+        or placeholder text on a plain background before a video is loaded. Styles are scaled to preview size instead
+        of rendering full size frames.
+
+        Args:
+            preview_request (PreviewRequest): The preview to render.
+
+        Returns:
+            (PIL.Image.Image): The rgb preview image.
+        """
+        frame = None
+        source = preview_request.source
+        if source is not None:
+            timestamp = preview_request.preview_time * source.duration
+            frame = source.frame_at(timestamp)
+            segments = preview_request.segments
+            scale = source.scale
+        if frame is None:
+            from faster_whisper.transcribe import Word
+
+            width, height = preview_request.canvas_size
+            frame = np.zeros((height, width, 3), np.uint8)
+            frame[:, :, 1] = 180
+            timestamp = 0.5
+            segments = [
+                [
+                    Word(ix, ix + 1, " text", 1.0)
+                    for ix in range(preview_request.words_per_segment)
+                ]
+            ]
+            scale = height / 1920
+        if self.renderer is not None:
+            self.renderer.discard(preview_request.removed_segments)
+        image = render_preview(
+            frame,
+            segments,
+            timestamp,
+            scale,
+            strategy=preview_request.strategy,
+            renderer=self.get_renderer(
+                frame.shape,
+                scale,
+                preview_request.strategy,
+                preview_request.text_kwargs,
+            ),
+            **preview_request.text_kwargs,
+        )
+        return Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+    def run(self):
+        """Renders the newest request whenever there is one."""
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                preview_request = self.pending
+                self.pending = None
+            try:
+                image = self.render(preview_request)
+            except Exception as e:
+                self.queue.put((preview_request.request_id, None, str(e)))
+                continue
+            self.queue.put((preview_request.request_id, image, None))
+
+
+class ModelLoader(threading.Thread):
+    """A thread worker loading the whisper model, so the window shows up while the model loads.
+
+    Once ready is set, either model holds the loaded model or error holds the exception raised while loading it.
+
+    Args:
+        model_size (str): String descriptor for the model to use.
+        model_kwargs (dict): Keyword arguments to model loading.
+    """
+
+    def __init__(self, model_size, model_kwargs):
+        self.model_size = model_size
+        self.model_kwargs = model_kwargs
+        self.model = None
+        self.error = None
+        self.ready = threading.Event()
+        super().__init__(daemon=True)
+
+    def run(self):
+        """Loads the model."""
+        try:
+            from faster_whisper import WhisperModel
+
+            self.model = WhisperModel(self.model_size, **self.model_kwargs)
+        except Exception as e:
+            self.error = e
+        self.ready.set()
 
 
 class TranscriptionWorker(threading.Thread):
     """A thread worker to transcribe the audio within a mp4.
 
+    Words are posted to the queue as ("words", List[faster_whisper.transcribe.Word], progress) as each segment is
+    decoded, followed by ("done", None, 1.0), or by ("error", message, None) if transcription failed.
+
     Args:
         transcribe_queue (queue.Queue): The queue to post results to.
         model (faster_whisper.WhisperModel): The whisper model to use for transcription.
         filename (str): File path to mp4 file containing audio to transcribe.
+        cache (whisper_shorts_subs.cache.TranscriptionCache): If provided, transcriptions are looked up in and stored
+            to this cache.
+        model_settings (dict): Settings the model was loaded with, used to key cached transcriptions.
     """
 
-    def __init__(self, transcribe_queue, model, filename):
+    def __init__(
+        self, transcribe_queue, model, filename, cache=None, model_settings=None
+    ):
         self.queue = transcribe_queue
         self.model = model
         self.filename = filename
+        self.cache = cache
+        self.model_settings = model_settings
         super().__init__(daemon=True)
 
+    def transcribe(self):
+        """Posts the words of the video, from the cache if it has them."""
+        from .transcribe import iter_transcribe_with_timestamps
+
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(self.filename, **(self.model_settings or {}))
+            words = self.cache.get(key)
+            if words is not None:
+                self.queue.put(("words", words, 1.0))
+                return
+        res = []
+        for words, progress in iter_transcribe_with_timestamps(
+            self.model, load_audio(self.filename)
+        ):
+            res.extend(words)
+            self.queue.put(("words", words, progress))
+        if key is not None:
+            self.cache.put(key, res)
+
     def run(self):
         """Runs transcription."""
-        words = transcribe_with_timestamps(self.model, self.filename)
-        self.queue.put(words)
+        try:
+            self.transcribe()
+        except Exception as e:
+            self.queue.put(("error", str(e), None))
+            return
+        self.queue.put(("done", None, 1.0))
 
 
 class ExportWorker(threading.Thread):
@@ -368,33 +785,70 @@ class ExportWorker(threading.Thread):
         filename (str): File path to put the output mp4 at.
         input_video (str):  File path containing the original video with audio source.
         segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen at the same time.
+        processes (int): Number of processes to render the video with. Defaults to the number of cpus.
+        metrics_log (str): If provided, progress and timings are appended to this file as lines of JSON.
+        encoder (Union[str, Dict]): The encoder profile to export with, see whisper_shorts_subs.encode.resolve_encoder.
+        export_cache (whisper_shorts_subs.cache.ExportCache): If provided, chunks encoded by earlier exports are
+            reused where their subtitles did not change.
         **subtitle_kwargs: Additional keyword arguments to be passed to whisper_shorts_subs.subtitle.create_subtitled_video.
+
+    Progress is posted to the queue as ("progress", metrics), with metrics as described in
+    whisper_shorts_subs.progress.ExportProgress, followed by ("done", metrics) or ("error", message).
     """
 
     def __init__(
-        self, export_queue, filename, input_video, segments, **subtitle_kwargs
+        self,
+        export_queue,
+        filename,
+        input_video,
+        segments,
+        processes=None,
+        metrics_log=None,
+        encoder="balanced",
+        export_cache=None,
+        **subtitle_kwargs,
     ):
         self.queue = export_queue
         self.filename = filename
         self.input_video = input_video
         self.segments = segments
+        self.processes = processes
+        self.metrics_log = (
+            MetricsLog(metrics_log, video=input_video, outfile=filename)
+            if metrics_log is not None
+            else None
+        )
+        self.encoder = encoder
+        self.export_cache = export_cache
         self.subtitle_kwargs = subtitle_kwargs
+        self.metrics = None
         super().__init__(daemon=True)
 
+    def post_progress(self, metrics):
+        """Forwards export metrics to the UI and the metrics log."""
+        self.metrics = metrics
+        if self.metrics_log is not None:
+            self.metrics_log(metrics)
+        self.queue.put(("progress", metrics))
+
     def run(self):
-        """Creates video with subtitles."""
-        processed_video = tempfile.NamedTemporaryFile(suffix=".mp4", delete=False)
-        processed_video.close()
-        create_subtitled_video(
-            self.input_video,
-            processed_video.name,
-            self.segments,
-            **self.subtitle_kwargs,
-        )
-        self.queue.put("audio")
-        add_movie_audio(self.input_video, processed_video.name, os.path.normpath(self.filename))
-        os.remove(processed_video.name)
-        self.queue.put("done")
+        """Creates video with subtitles and the original audio in a single encoding pass."""
+        try:
+            create_subtitled_video_parallel(
+                self.input_video,
+                os.path.normpath(self.filename),
+                self.segments,
+                processes=self.processes,
+                audio_source=self.input_video,
+                progress_callback=self.post_progress,
+                encoder=self.encoder,
+                export_cache=self.export_cache,
+                **self.subtitle_kwargs,
+            )
+        except Exception as e:
+            self.queue.put(("error", str(e)))
+            return
+        self.queue.put(("done", self.metrics))
 
 
 def run_app():
@@ -1,4 +1,99 @@
-import moviepy.editor as mp
+import os
+import tempfile
+
+import av
+import numpy as np
+
+SAMPLING_RATE = 16000
+
+
+def get_audio_codec(source):
+    """Finds the codec of the first audio stream in a media file.
+
+    Args:
+        source (str): The filepath to the media file.
+
+    Returns:
+        (Optional[str]): The ffmpeg codec name of the audio stream, or None if the file has no audio.
+    """
+    with av.open(source, metadata_errors="ignore") as container:
+        if len(container.streams.audio) == 0:
+            return None
+        return container.streams.audio[0].codec_context.name
+
+
+def extract_audio(source, sampling_rate=SAMPLING_RATE):
+    """Demuxes the first audio track of a media file and decodes it to mono float32 samples.
+
+    Only audio packets are decoded, so this is cheap even for large video containers.
+
+    Args:
+        source (str): The filepath to the media file.
+        sampling_rate (int): The sample rate to resample the audio to.
+
+    Returns:
+        (numpy.ndarray): The audio samples in [-1, 1]. Empty if the file has no audio.
+    """
+    if get_audio_codec(source) is None:
+        return np.zeros(0, np.float32)
+    # faster_whisper is only imported when audio is decoded, so exporting never loads it.
+    from faster_whisper.audio import decode_audio
+
+    return decode_audio(source, sampling_rate=sampling_rate)
+
+
+def audio_sidecar_path(source, sampling_rate=SAMPLING_RATE):
+    """Finds where the decoded audio of a media file is stored.
+
+    Args:
+        source (str): The filepath to the media file.
+        sampling_rate (int): The sample rate of the decoded audio.
+
+    Returns:
+        (str): The path of the .npy sidecar next to the media file.
+    """
+    return f"{source}.{sampling_rate}hz.npy"
+
+
+def load_audio(source, sampling_rate=SAMPLING_RATE, sidecar=True):
+    """Loads the decoded audio of a media file, decoding it at most once.
+
+    The first call decodes the audio with extract_audio and stores it as a .npy sidecar next to the media file. Later
+    calls memory map the sidecar instead of decoding again, as long as it is newer than the media file. If the
+    sidecar cannot be written, the decoded samples are returned without being stored.
+
+    Args:
+        source (str): The filepath to the media file.
+        sampling_rate (int): The sample rate to resample the audio to.
+        sidecar (bool): If False, always decodes and never reads or writes a sidecar.
+
+    Returns:
+        (numpy.ndarray): Mono float32 audio samples, which may be a read only memory map.
+    """
+    if not sidecar:
+        return extract_audio(source, sampling_rate)
+    path = audio_sidecar_path(source, sampling_rate)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(source):
+            return np.load(path, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+    samples = extract_audio(source, sampling_rate)
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".npy"
+        )
+    except OSError:
+        return samples
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, samples)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return samples
+    return np.load(path, mmap_mode="r")
 
 
 def add_movie_audio(audio_source, video_source, outfile, codec="libx264"):
@@ -10,6 +105,8 @@ def add_movie_audio(audio_source, video_source, outfile, codec="libx264"):
         outfile (str): The filepath to create the composited video at.
         codec (str): The codec to use to write the file.
     """
+    import moviepy.editor as mp
+
     audio = mp.VideoFileClip(audio_source).audio
     video = mp.VideoFileClip(video_source)
     final = video.set_audio(audio)
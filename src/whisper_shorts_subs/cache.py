@@ -0,0 +1,314 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from .audio import load_audio
+
+
+def default_cache_dir(name="transcriptions"):
+    """Finds the default directory to store cached data in.
+
+    Args:
+        name (str): The kind of data, "transcriptions" or "exports".
+
+    Returns:
+        (str): $XDG_CACHE_HOME/whisper_shorts_subs/<name>, falling back to ~/.cache.
+    """
+    cache_home = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "whisper_shorts_subs", name)
+
+
+def hash_audio(audio, block_size=1 << 20):
+    """Hashes the content of an audio source.
+
+    Args:
+        audio (Union[str, numpy.ndarray]): A filename, whose bytes are hashed, or decoded audio samples.
+        block_size (int): Number of bytes to read from a file at a time.
+
+    Returns:
+        (str): Hex sha256 digest of the content.
+    """
+    digest = hashlib.sha256()
+    if isinstance(audio, np.ndarray):
+        digest.update(str(audio.dtype).encode())
+        digest.update(np.ascontiguousarray(audio).data)
+        return digest.hexdigest()
+    with open(audio, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FileCache:
+    """An on-disk, size bounded store of one file per key.
+
+    When the store grows past max_bytes, the least recently used entries are evicted. Subclasses choose the file
+    suffix and what the files hold.
+
+    Args:
+        cache_dir (str): Directory to store entries in.
+        max_bytes (int): The maximum total size of stored entries.
+    """
+
+    suffix = ""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, key):
+        """(str): The file path of the entry for a key."""
+        return os.path.join(self.cache_dir, key + self.suffix)
+
+    def entries(self):
+        """Lists stored entries.
+
+        Returns:
+            (List[Tuple[str, float, int]]): Path, last access time and size of each entry, least recently used first.
+        """
+        res = []
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith(self.suffix):
+                continue
+            path = os.path.join(self.cache_dir, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            res.append((path, stat.st_mtime, stat.st_size))
+        return sorted(res, key=lambda entry: entry[1])
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def stats(self):
+        """Summarizes cache usage.
+
+        Returns:
+            (Dict): Hits and misses since creation plus the current number of entries and their total size in bytes.
+        """
+        entries = self.entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+        }
+
+
+class TranscriptionCache(FileCache):
+    """An on-disk, size bounded cache of transcriptions.
+
+    Entries are keyed by a hash of the audio content and the settings that affect the transcription, so the same clip
+    is only transcribed once per model configuration. When the cache grows past max_bytes, the least recently used
+    entries are evicted.
+
+    Args:
+        cache_dir (str): Directory to store entries in. Defaults to default_cache_dir().
+        max_bytes (int): The maximum total size of stored entries.
+    """
+
+    suffix = ".json"
+
+    def __init__(self, cache_dir=None, max_bytes=100 * 1024 * 1024):
+        super().__init__(
+            cache_dir if cache_dir is not None else default_cache_dir(), max_bytes
+        )
+
+    def key(self, audio, **settings):
+        """Builds the cache key for an audio source and transcription settings.
+
+        Args:
+            audio (Union[str, numpy.ndarray]): The audio source to be transcribed.
+            **settings: Anything that changes the transcription, e.g. model_size, compute_type and transcribe options.
+                Values must be json serializable.
+
+        Returns:
+            (str): The cache key.
+        """
+        digest = hashlib.sha256(hash_audio(audio).encode())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Looks up a transcription.
+
+        Args:
+            key (str): Key as returned by TranscriptionCache.key.
+
+        Returns:
+            (Optional[List[faster_whisper.transcribe.Word]]): The cached words, or None on a miss.
+        """
+        from faster_whisper.transcribe import Word
+
+        path = self.path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                rows = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [
+            Word(start, end, word, probability)
+            for start, end, word, probability in rows
+        ]
+
+    def put(self, key, words):
+        """Stores a transcription, evicting old entries if the cache is full.
+
+        Args:
+            key (str): Key as returned by TranscriptionCache.key.
+            words (List[faster_whisper.transcribe.Word]): The words to store.
+        """
+        rows = [[word.start, word.end, word.word, word.probability] for word in words]
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(rows, f)
+        os.replace(temp_path, self.path(key))
+        self.evict()
+
+
+class ExportCache(FileCache):
+    """An on-disk, size bounded cache of encoded chunks of exported videos.
+
+    Each chunk covers a fixed range of frames and is keyed by the source video, the export settings and the subtitle
+    states shown on each of its frames. Exporting again after a transcript edit then only renders and encodes the
+    chunks whose subtitles changed, see whisper_shorts_subs.export.create_subtitled_video_cached.
+
+    Args:
+        cache_dir (str): Directory to store chunks in. Defaults to default_cache_dir("exports").
+        max_bytes (int): The maximum total size of stored chunks.
+    """
+
+    suffix = ".mp4"
+
+    def __init__(self, cache_dir=None, max_bytes=1024 * 1024 * 1024):
+        super().__init__(
+            cache_dir if cache_dir is not None else default_cache_dir("exports"),
+            max_bytes,
+        )
+
+    def key(self, video, **settings):
+        """Builds the key shared by the chunks of a video exported with some settings.
+
+        The video is identified by its path, size and modification time rather than a hash of its content, which
+        would cost a full read on every export.
+
+        Args:
+            video (str): File path to the source video.
+            **settings: Anything that changes the rendered frames, e.g. the style and encoder settings. Values must be
+                json serializable.
+
+        Returns:
+            (str): The export key.
+        """
+        stat = os.stat(video)
+        digest = hashlib.sha256(
+            json.dumps(
+                [os.path.abspath(video), stat.st_size, stat.st_mtime_ns, settings],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def chunk_key(self, key, start_frame, end_frame, states):
+        """Builds the cache key of one chunk.
+
+        Args:
+            key (str): Key as returned by ExportCache.key.
+            start_frame (int): The first frame of the chunk.
+            end_frame (int): One past the last frame of the chunk.
+            states (List[Tuple[int, int, Optional[Tuple]]]): Start frame, end frame and subtitle state of each run of
+                frames in the chunk, with None for frames without subtitles.
+
+        Returns:
+            (str): The chunk key.
+        """
+        digest = hashlib.sha256(key.encode())
+        digest.update(json.dumps([start_frame, end_frame, states]).encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Looks up an encoded chunk.
+
+        Args:
+            key (str): Key as returned by ExportCache.chunk_key.
+
+        Returns:
+            (Optional[str]): The file path of the chunk, or None on a miss.
+        """
+        path = self.path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key, video):
+        """Moves an encoded chunk into the cache. Call evict once the chunks are no longer needed.
+
+        Args:
+            key (str): Key as returned by ExportCache.chunk_key.
+            video (str): File path of the encoded chunk, on the same file system as the cache.
+
+        Returns:
+            (str): The file path of the cached chunk.
+        """
+        path = self.path(key)
+        os.replace(video, path)
+        return path
+
+
+def cached_transcribe_with_timestamps(
+    cache, model, audio, model_settings=None, **transcribe_kwargs
+):
+    """Transcribes audio with whisper_shorts_subs.transcribe.transcribe_with_timestamps, reusing cached results.
+
+    Filenames are hashed as is for the cache key and only decoded with whisper_shorts_subs.audio.load_audio on a
+    miss.
+
+    Args:
+        cache (TranscriptionCache): The cache to look results up in and store them to.
+        model (faster_whisper.WhisperModel): The loaded whisper model to use for transcription.
+        audio (Union[str, numpy.ndarray]): An input audio filename or decoded audio.
+        model_settings (Dict): Settings the model was loaded with, e.g. {"model_size": "small", "compute_type": "int8"}.
+        **transcribe_kwargs: Additional keyword arguments to be passed to transcribe_with_timestamps.
+
+    Returns:
+        (List[faster_whisper.transcribe.Word]): Sequence of words inferred from the audio.
+    """
+    from .transcribe import transcribe_with_timestamps
+
+    settings = dict(model_settings if model_settings is not None else {})
+    settings.update(transcribe_kwargs)
+    key = cache.key(audio, **settings)
+    words = cache.get(key)
+    if words is None:
+        if isinstance(audio, str):
+            audio = load_audio(audio)
+        words = transcribe_with_timestamps(model, audio, **transcribe_kwargs)
+        cache.put(key, words)
+    return words
@@ -0,0 +1,391 @@
+import argparse
+import os
+import sys
+
+from .cache import TranscriptionCache
+from .encode import ENCODER_PROFILES, resolve_encoder
+from .export import create_subtitled_video_parallel
+from .progress import MetricsLog, format_stages
+from .scheduler import TranscriptionScheduler
+from .transcript import Transcript
+
+TRANSCRIPT_FORMATS = ("tsv", "npz", "json", "srt", "vtt")
+
+
+def find_videos(source):
+    """Lists the videos to process from a directory or a manifest file.
+
+    A manifest is a text file with one mp4 path per line. Relative paths are resolved against the manifest's directory
+    and blank lines or lines starting with "#" are skipped.
+
+    Args:
+        source (str): Path to a directory containing mp4 files or to a manifest file.
+
+    Returns:
+        (List[str]): Paths to the videos to process, in order.
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, filename)
+            for filename in os.listdir(source)
+            if filename.lower().endswith(".mp4")
+        )
+    base_dir = os.path.dirname(os.path.abspath(source))
+    videos = []
+    with open(source, encoding="utf-8") as manifest:
+        for line in manifest:
+            line = line.strip()
+            if len(line) == 0 or line.startswith("#"):
+                continue
+            videos.append(os.path.join(base_dir, line))
+    return videos
+
+
+def parse_outline(value):
+    """Parses an outline definition of the form "B,G,R,THICKNESS".
+
+    Args:
+        value (str): The outline definition.
+
+    Returns:
+        (Dict): Outline definition as accepted by whisper_shorts_subs.subtitle.add_text_with_outlines.
+    """
+    try:
+        blue, green, red, thickness = [int(part) for part in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Outlines should be formatted as B,G,R,THICKNESS, got '{value}'"
+        )
+    return {"color": (blue, green, red), "thickness": thickness}
+
+
+def export_transcribed_video(
+    words,
+    input_video,
+    outfile,
+    max_segment_words=None,
+    transcript_file=None,
+    processes=None,
+    max_segment_chars=None,
+    max_segment_duration=None,
+    **subtitle_kwargs,
+):
+    """Exports an already transcribed video with subtitles and its original audio.
+
+    Args:
+        words (List[faster_whisper.transcribe.Word]): The transcribed words of the video.
+        input_video (str): File path to the mp4 to subtitle.
+        outfile (str): File path to write the subtitled mp4 to.
+        max_segment_words (int): The maximum number of words to show at a time.
+        transcript_file (str): If provided, the transcript is also written to this path, in the format given by its
+            extension, see whisper_shorts_subs.transcript.Transcript.write. SRT and WebVTT captions follow the
+            segments shown on the video.
+        processes (int): Number of processes to render the video with. Defaults to the number of cpus.
+        max_segment_chars (int): The maximum number of characters to show at a time.
+        max_segment_duration (float): The maximum number of seconds a segment may span.
+        **subtitle_kwargs: Additional keyword arguments to be passed to
+            whisper_shorts_subs.export.create_subtitled_video_parallel.
+    """
+    transcript = Transcript.from_words(words)
+    ranges = transcript.segment_ranges(
+        max_segment_words=max_segment_words,
+        max_segment_chars=max_segment_chars,
+        max_segment_duration=max_segment_duration,
+    ).tolist()
+    segments = [words[start:stop] for start, stop in ranges]
+    if transcript_file is not None:
+        transcript.write(transcript_file, ranges)
+    create_subtitled_video_parallel(
+        input_video,
+        outfile,
+        segments,
+        processes=processes,
+        codec="libx264",
+        audio_source=input_video,
+        **subtitle_kwargs,
+    )
+
+
+def encoder_from_args(args):
+    """Builds the encoder profile selected on the command line.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments from build_parser.
+
+    Returns:
+        (Dict): An encoder profile for whisper_shorts_subs.encode.resolve_encoder.
+    """
+    encoder = {"profile": args.encoder_profile}
+    if args.bitrate is not None:
+        encoder.update(bitrate=args.bitrate, crf=None)
+    overrides = {
+        "codec": args.codec,
+        "preset": args.preset,
+        "crf": args.crf,
+        "threads": args.encoder_threads,
+    }
+    encoder.update(
+        {key: value for key, value in overrides.items() if value is not None}
+    )
+    return encoder
+
+
+def build_parser():
+    """Builds the argument parser for the batch entrypoint.
+
+    Returns:
+        (argparse.ArgumentParser): The parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="whisper-subs-batch",
+        description="Transcribe and subtitle many mp4 videos without the GUI.",
+    )
+    parser.add_argument(
+        "source", help="A directory of mp4 files or a manifest listing one per line."
+    )
+    parser.add_argument(
+        "-o", "--output-dir", required=True, help="Directory to write videos to."
+    )
+    parser.add_argument("--suffix", default="_subs", help="Appended to output names.")
+    parser.add_argument("--model-size", default="small")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-type", default="int8")
+    parser.add_argument("--font-scale", type=float, default=2)
+    parser.add_argument("--orient-y-percent", type=float, default=0.5)
+    parser.add_argument(
+        "--outline",
+        dest="outlines",
+        type=parse_outline,
+        action="append",
+        help="Outline as B,G,R,THICKNESS. May be repeated. Defaults to 0,0,0,8.",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["whole_segment", "type", "highlight"],
+        default="highlight",
+    )
+    parser.add_argument("--current-word-scale", type=float, default=1)
+    parser.add_argument("--max-segment-words", type=int, default=5)
+    parser.add_argument(
+        "--max-segment-chars",
+        type=int,
+        default=None,
+        help="Also start a new segment before the text would exceed this many characters.",
+    )
+    parser.add_argument(
+        "--max-segment-duration",
+        type=float,
+        default=None,
+        help="Also start a new segment before one would span more than this many seconds.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="Processes used to render each video. Defaults to the number of cpus.",
+    )
+    parser.add_argument(
+        "--encoder-profile",
+        choices=list(ENCODER_PROFILES),
+        default="balanced",
+        help="Export quality and speed preset.",
+    )
+    parser.add_argument(
+        "--codec",
+        default=None,
+        help="Override the ffmpeg video encoder of the profile.",
+    )
+    parser.add_argument(
+        "--preset", default=None, help="Override the encoder preset of the profile."
+    )
+    parser.add_argument(
+        "--crf", type=int, default=None, help="Override the constant rate factor."
+    )
+    parser.add_argument(
+        "--bitrate",
+        default=None,
+        help="Target video bitrate, e.g. 4M, instead of a constant rate factor.",
+    )
+    parser.add_argument(
+        "--encoder-threads",
+        type=int,
+        default=None,
+        help="Threads used by each encoder. Defaults to the ffmpeg default.",
+    )
+    parser.add_argument(
+        "--passthrough",
+        action="store_true",
+        help="Stream copy ranges without subtitles from h264 and hevc sources instead of re-encoding them.",
+    )
+    parser.add_argument(
+        "--transcribe-workers",
+        type=int,
+        default=1,
+        help="Number of videos to transcribe at the same time.",
+    )
+    parser.add_argument(
+        "--cpu-threads",
+        type=int,
+        default=0,
+        help="Threads used by each transcription. 0 uses the CTranslate2 default.",
+    )
+    parser.add_argument(
+        "--separate-models",
+        action="store_true",
+        help="Load one model per transcribe worker instead of sharing one.",
+    )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Skip silence with voice activity detection and transcribe speech chunks in parallel.",
+    )
+    parser.add_argument(
+        "--vad-workers",
+        type=int,
+        default=1,
+        help="With --vad, the number of speech chunks of a video to transcribe at the same time.",
+    )
+    parser.add_argument(
+        "--save-transcripts",
+        action="store_true",
+        help="Also write each transcript next to its output video.",
+    )
+    parser.add_argument(
+        "--transcript-format",
+        choices=TRANSCRIPT_FORMATS,
+        default="tsv",
+        help="File format of saved transcripts. srt and vtt captions follow the exported segments.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory of the transcription cache. Defaults to $XDG_CACHE_HOME/whisper_shorts_subs/transcriptions, "
+        "or ~/.cache/whisper_shorts_subs/transcriptions. Encoded export chunks are cached separately in the "
+        "exports directory next to it and are not affected.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=100,
+        help="Maximum transcription cache size in MB. 0 disables the cache.",
+    )
+    parser.add_argument(
+        "--metrics-log",
+        default=None,
+        help="Append export progress and stage timings to this file as lines of JSON.",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Re-process existing outputs."
+    )
+    return parser
+
+
+def run_batch(argv=None):
+    """Entrypoint for the batch executable.
+
+    Args:
+        argv (List[str]): Command line arguments. Defaults to sys.argv.
+
+    Returns:
+        (int): The process exit status.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    encoder = encoder_from_args(args)
+    try:
+        resolve_encoder(encoder)
+    except ValueError as e:
+        parser.error(str(e))
+    videos = find_videos(args.source)
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = (
+        TranscriptionCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+        if args.cache_max_mb > 0
+        else None
+    )
+    scheduler = TranscriptionScheduler(
+        args.model_size,
+        workers=args.transcribe_workers,
+        cpu_threads=args.cpu_threads,
+        shared_model=not args.separate_models,
+        model_workers=(
+            (1 if args.separate_models else args.transcribe_workers)
+            * (args.vad_workers if args.vad else 1)
+        ),
+        cache=cache,
+        device=args.device,
+        compute_type=args.compute_type,
+    )
+    jobs = []
+    for ix, input_video in enumerate(videos):
+        name = os.path.splitext(os.path.basename(input_video))[0] + args.suffix
+        outfile = os.path.join(args.output_dir, name + ".mp4")
+        if os.path.exists(outfile) and not args.overwrite:
+            print(f"[{ix + 1}/{len(videos)}] skipping {input_video}, output exists")
+            continue
+        transcription = (
+            scheduler.submit(input_video, vad=True, vad_workers=args.vad_workers)
+            if args.vad
+            else scheduler.submit(input_video)
+        )
+        jobs.append((ix, input_video, name, outfile, transcription))
+    failures = []
+    for ix, input_video, name, outfile, transcription in jobs:
+        print(f"[{ix + 1}/{len(videos)}] {input_video} -> {outfile}")
+        reports = []
+        metrics_log = (
+            MetricsLog(args.metrics_log, video=input_video, outfile=outfile)
+            if args.metrics_log is not None
+            else None
+        )
+
+        def report_progress(metrics):
+            reports.append(metrics)
+            if metrics_log is not None:
+                metrics_log(metrics)
+
+        try:
+            export_transcribed_video(
+                transcription.result(),
+                input_video,
+                outfile,
+                max_segment_words=args.max_segment_words,
+                max_segment_chars=args.max_segment_chars,
+                max_segment_duration=args.max_segment_duration,
+                transcript_file=(
+                    os.path.join(args.output_dir, f"{name}.{args.transcript_format}")
+                    if args.save_transcripts
+                    else None
+                ),
+                processes=args.processes,
+                passthrough=args.passthrough,
+                encoder=encoder,
+                font_scale=args.font_scale,
+                orient_y_percent=args.orient_y_percent,
+                outlines=args.outlines,
+                strategy=args.strategy,
+                current_word_scale=args.current_word_scale,
+                show_progress=False,
+                progress_callback=report_progress,
+            )
+        except Exception as e:
+            print(f"failed to process {input_video}: {e}", file=sys.stderr)
+            failures.append(input_video)
+            continue
+        if len(reports) > 0:
+            metrics = reports[-1]
+            print(
+                f"    {metrics['frames']} frames in {metrics['elapsed']:.1f}s, "
+                f"{metrics['fps']:.1f} fps ({format_stages(metrics)})"
+            )
+    scheduler.shutdown()
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"transcription cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['entries']} entries, {stats['bytes']} bytes"
+        )
+    if len(failures) > 0:
+        print(f"{len(failures)} of {len(videos)} videos failed", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,184 @@
+import numpy as np
+
+from .segmentation import segment_ranges
+from .util import string_to_word
+
+
+class EditableTranscript:
+    """Keeps a transcript in the textbox format parsed and segmented as it is edited.
+
+    Each update is compared with the previous text line by line, and only the lines between the unchanged beginning
+    and end are parsed again. Segmenting then restarts at the segment before the first changed word and stops as
+    soon as a new segment starts where an old one did after the last changed word, because segment boundaries only
+    depend on the words before them. Editing a few words of a long transcript therefore costs about as much as the
+    edit, not the whole transcript.
+
+    Args:
+        text (str): The initial transcript, starting with a header line.
+        delim (str): The delimiter between columns.
+        **segment_kwargs: Rules passed to whisper_shorts_subs.segmentation.segment_ranges, e.g. word_overlap_delay or
+            max_segment_words.
+    """
+
+    def __init__(self, text="", delim="\t", **segment_kwargs):
+        self.delim = delim
+        self.segment_kwargs = segment_kwargs
+        self.lines = []
+        self.words = []
+        self.error_count = 0
+        self.segments = []
+        self.ranges = np.zeros((0, 2), np.int64)
+        self.segmented_count = 0
+        self.dirty = None
+        self.update(text)
+
+    def parse_line(self, line):
+        """(Optional[faster_whisper.transcribe.Word]): The word on a line, or None if the line does not parse."""
+        try:
+            return string_to_word(line, self.delim)
+        except ValueError:
+            return None
+
+    def update(self, text):
+        """Replaces the transcript text, parsing only the lines that changed.
+
+        Args:
+            text (str): The transcript, starting with a header line.
+
+        Returns:
+            (Tuple[int, int, int]): The index of the first changed line after the header, and the number of lines
+                removed and inserted there.
+        """
+        old_lines = self.lines
+        new_lines = text.split("\n")[1:]
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]
+        ):
+            suffix += 1
+        removed = len(old_lines) - prefix - suffix
+        inserted = len(new_lines) - prefix - suffix
+        if removed == 0 and inserted == 0:
+            return prefix, 0, 0
+        words = [
+            self.parse_line(line)
+            for line in new_lines[prefix : len(new_lines) - suffix]
+        ]
+        old_words = self.words[prefix : prefix + removed]
+        self.error_count += sum(word is None for word in words) - sum(
+            word is None for word in old_words
+        )
+        self.lines[prefix : prefix + removed] = new_lines[
+            prefix : len(new_lines) - suffix
+        ]
+        self.words[prefix : prefix + removed] = words
+        self.mark_dirty(prefix, removed, inserted)
+        return prefix, removed, inserted
+
+    def mark_dirty(self, index, removed, inserted):
+        """Widens the range of words that changed since the last segmentation to cover an edit.
+
+        Args:
+            index (int): The index of the first changed word.
+            removed (int): The number of words removed there.
+            inserted (int): The number of words inserted in their place.
+        """
+        if self.dirty is None:
+            self.dirty = (index, index + inserted)
+            return
+        start, stop = self.dirty
+        if stop >= index + removed:
+            stop += inserted - removed
+        elif stop > index:
+            stop = index + inserted
+        self.dirty = (min(start, index), max(stop, index + inserted))
+
+    def configure(self, **segment_kwargs):
+        """Changes the segmentation rules, segmenting the whole transcript again if they differ.
+
+        Args:
+            **segment_kwargs: Rules passed to whisper_shorts_subs.segmentation.segment_ranges.
+        """
+        if segment_kwargs == self.segment_kwargs:
+            return
+        self.segment_kwargs = segment_kwargs
+        self.dirty = (0, len(self.words))
+        self.ranges = np.zeros((0, 2), np.int64)
+        self.segmented_count = 0
+
+    def window_ranges(self, start, stop):
+        """Segments the words from start to stop as if they were a whole transcript.
+
+        Returns:
+            (numpy.ndarray): The start and one past the end index of the words of each segment, in transcript indices.
+        """
+        words = self.words[start:stop]
+        return (
+            segment_ranges(
+                [word.start for word in words],
+                [word.end for word in words],
+                text_lengths=[len(word.word.strip()) for word in words],
+                **self.segment_kwargs,
+            )
+            + start
+        )
+
+    def resegment(self):
+        """Brings segments up to date with the words, segmenting only around the words that changed.
+
+        Returns:
+            (Tuple[int, List[List[faster_whisper.transcribe.Word]], List[List[faster_whisper.transcribe.Word]]]): The
+                index of the first replaced segment, the segments removed there and the segments inserted in their
+                place.
+
+        Raises:
+            ValueError: If some lines do not parse. The segments are left as they were, and the changes are kept
+                until the next call.
+        """
+        if self.error_count > 0:
+            raise ValueError(f"{self.error_count} lines of the transcript do not parse")
+        if self.dirty is None:
+            return len(self.segments), [], []
+        start, stop = self.dirty
+        count = len(self.words)
+        shift = count - self.segmented_count
+        old = self.ranges
+        # Segments before the one holding the last unchanged word cannot change, because each boundary depends only
+        # on the words up to it.
+        first = (
+            int(np.searchsorted(old[:, 1], start - 1, side="right")) if start > 0 else 0
+        )
+        restart = int(old[first, 0]) if start > 0 else 0
+        extra = 64
+        while True:
+            window_stop = min(count, max(stop, restart) + extra)
+            if len(old) == 0:
+                window_stop = count
+            new = self.window_ranges(restart, window_stop)
+            if window_stop == count:
+                # Without old ranges, e.g. after configure, every old segment is replaced.
+                last = len(old) if len(old) > 0 else len(self.segments)
+                break
+            # Past the changed words, a segment starting where an old one did means all later ones match as well.
+            candidates = new[new[:, 0] >= stop, 0]
+            old_index = np.searchsorted(old[:, 0], candidates - shift)
+            matches = np.flatnonzero(
+                old[np.minimum(old_index, len(old) - 1), 0] == candidates - shift
+            )
+            if len(matches) > 0:
+                last = int(old_index[matches[0]])
+                new = new[new[:, 0] < candidates[matches[0]]]
+                break
+            extra *= 4
+        words = self.words
+        removed = self.segments[first:last]
+        inserted = [words[ix:jx] for ix, jx in new.tolist()]
+        self.segments[first:last] = inserted
+        self.ranges = np.concatenate([old[:first], new, old[last:] + shift])
+        self.segmented_count = count
+        self.dirty = None
+        return first, removed, inserted
@@ -0,0 +1,354 @@
+import functools
+import os
+import subprocess
+import tempfile
+
+import av
+import cv2
+import imageio_ffmpeg
+
+from .audio import get_audio_codec
+
+MP4_AUDIO_CODECS = ("aac", "mp3", "alac", "ac3", "eac3")
+ANNEXB_FILTERS = {"h264": "h264_mp4toannexb", "hevc": "hevc_mp4toannexb"}
+ENCODER_PROFILES = {
+    "draft": {"codec": "libx264", "preset": "ultrafast", "crf": 28},
+    "balanced": {"codec": "libx264", "preset": "medium", "crf": 23},
+    "final": {"codec": "libx264", "preset": "slow", "crf": 18},
+}
+
+
+def get_ffmpeg_exe():
+    """Finds the ffmpeg executable, preferring the IMAGEIO_FFMPEG_EXE override and the binary bundled with moviepy.
+
+    Returns:
+        (str): Path to an ffmpeg executable.
+    """
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(args):
+    """Runs ffmpeg with the given arguments, raising on failure.
+
+    Args:
+        args (List[str]): Arguments to pass to ffmpeg, not including the executable.
+
+    Raises:
+        RuntimeError: If ffmpeg exits with a non-zero status.
+    """
+    command = [get_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error"] + args
+    process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed with exit code {process.returncode}: {process.stderr.decode(errors='replace')}"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def available_encoders():
+    """Lists the video encoders the ffmpeg executable was built with.
+
+    Returns:
+        (FrozenSet[str]): The encoder names, e.g. "libx264".
+    """
+    process = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-encoders"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    res = set()
+    for line in process.stdout.decode(errors="replace").splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and len(fields[0]) == 6 and fields[0].startswith("V"):
+            res.add(fields[1])
+    return frozenset(res)
+
+
+def resolve_encoder(encoder):
+    """Expands an encoder profile into its full settings.
+
+    Args:
+        encoder (Union[str, Dict]): The name of one of ENCODER_PROFILES, or a dict with any of the keys "codec",
+            "preset", "crf", "bitrate", "threads", "pix_fmt" and "repeat_headers", which repeats the parameter sets
+            before every keyframe so the video can be joined with others. A dict may name a base profile under
+            "profile" to override some of its settings. ex: {'profile': 'final', 'threads': 4}
+
+    Returns:
+        (Dict): The settings, with codec and pix_fmt always set.
+
+    Raises:
+        ValueError: If the profile is unknown, or ffmpeg has no such encoder.
+    """
+    if isinstance(encoder, str):
+        encoder = {"profile": encoder}
+    settings = dict(encoder)
+    profile = settings.pop("profile", None)
+    if profile is not None:
+        if profile not in ENCODER_PROFILES:
+            raise ValueError(
+                f"Unknown encoder profile {profile!r}, expected one of {', '.join(ENCODER_PROFILES)}"
+            )
+        settings = dict(ENCODER_PROFILES[profile], **settings)
+    settings.setdefault("codec", "libx264")
+    settings.setdefault("pix_fmt", "yuv420p")
+    if settings["codec"] not in available_encoders():
+        raise ValueError(f"ffmpeg does not support the encoder {settings['codec']!r}")
+    return settings
+
+
+def encoder_args(encoder):
+    """Builds the ffmpeg output arguments for an encoder profile.
+
+    Args:
+        encoder (Union[str, Dict]): An encoder profile, see resolve_encoder.
+
+    Returns:
+        (List[str]): Arguments selecting and configuring the video encoder.
+    """
+    settings = resolve_encoder(encoder)
+    args = ["-c:v", settings["codec"], "-pix_fmt", settings["pix_fmt"]]
+    if settings.get("preset") is not None:
+        args += ["-preset", str(settings["preset"])]
+    if settings.get("crf") is not None:
+        args += ["-crf", str(settings["crf"])]
+    if settings.get("bitrate") is not None:
+        args += ["-b:v", str(settings["bitrate"])]
+    if settings.get("threads") is not None:
+        args += ["-threads", str(settings["threads"])]
+    if settings.get("repeat_headers"):
+        args += ["-bsf:v", "dump_extra=freq=keyframe"]
+    return args
+
+
+def get_video_format(source):
+    """Finds the codec and pixel format of the first video stream in a media file.
+
+    Args:
+        source (str): The filepath to the media file.
+
+    Returns:
+        (Tuple[Optional[str], Optional[str]]): The ffmpeg codec and pixel format names, or (None, None) if the file has
+            no video.
+    """
+    with av.open(source, metadata_errors="ignore") as container:
+        if len(container.streams.video) == 0:
+            return None, None
+        codec_context = container.streams.video[0].codec_context
+        return codec_context.name, codec_context.pix_fmt
+
+
+def keyframe_times(source, fps):
+    """Lists the keyframes of the first video stream in a media file without decoding it.
+
+    Args:
+        source (str): The filepath to the media file.
+        fps (float): Frames per second of the video, used to convert timestamps to frame numbers.
+
+    Returns:
+        (List[Tuple[int, float]]): Frame number and presentation time in seconds of each keyframe, in order.
+    """
+    res = []
+    with av.open(source, metadata_errors="ignore") as container:
+        stream = container.streams.video[0]
+        start_time = stream.start_time or 0
+        for packet in container.demux(stream):
+            if not packet.is_keyframe or packet.pts is None:
+                continue
+            seconds = float((packet.pts - start_time) * stream.time_base)
+            res.append((int(round(seconds * fps)), seconds))
+    return sorted(set(res))
+
+
+def copy_video_range(source, outfile, start_seconds, frames, codec_name):
+    """Copies a keyframe aligned range of frames from a video without re-encoding it.
+
+    The output is written as a Matroska file with in-band parameter sets, so it can be joined with ranges encoded
+    separately.
+
+    Args:
+        source (str): The filepath to the video.
+        outfile (str): File path to write the range to, usually ending in .mkv.
+        start_seconds (float): Presentation time of the keyframe the range starts at.
+        frames (int): Number of frames to copy.
+        codec_name (str): The codec of the source video, as returned by get_video_format.
+    """
+    run_ffmpeg(
+        ["-ss", f"{start_seconds:.6f}", "-i", source]
+        + ["-map", "0:v:0", "-frames:v", str(frames), "-c:v", "copy", "-an"]
+        + (
+            ["-bsf:v", ANNEXB_FILTERS[codec_name]]
+            if codec_name in ANNEXB_FILTERS
+            else []
+        )
+        + ["-f", "matroska", outfile]
+    )
+
+
+def audio_input_args(audio_source, input_index=1):
+    """Builds ffmpeg arguments that add the audio track of a file to the output.
+
+    The audio stream is copied when mp4 can hold it as is and encoded to aac otherwise.
+
+    Args:
+        audio_source (str): File path to take the audio track from.
+        input_index (int): The ffmpeg input index audio_source will have.
+
+    Returns:
+        (Tuple[List[str], List[str]]): Input arguments and output arguments for ffmpeg.
+    """
+    codec = get_audio_codec(audio_source)
+    if codec is None:
+        return [], []
+    audio_codec = "copy" if codec in MP4_AUDIO_CODECS else "aac"
+    return (
+        ["-i", audio_source],
+        ["-map", f"{input_index}:a:0", "-c:a", audio_codec],
+    )
+
+
+class FFmpegVideoWriter:
+    """A cv2.VideoWriter replacement that pipes raw frames into a single ffmpeg encoder process.
+
+    Args:
+        outfile (str): File path to write the encoded video to.
+        fps (float): Frames per second of the output.
+        frame_size (Tuple[int, int]): Width and height of the frames that will be written.
+        codec (str): The ffmpeg video encoder to use, with its default settings.
+        audio_source (str): If provided, the audio track of this file is muxed into the output.
+        encoder (Union[str, Dict]): If provided, the encoder profile to use instead of codec, see resolve_encoder.
+    """
+
+    def __init__(
+        self, outfile, fps, frame_size, codec="libx264", audio_source=None, encoder=None
+    ):
+        width, height = frame_size
+        audio_inputs, audio_outputs = (
+            audio_input_args(audio_source) if audio_source is not None else ([], [])
+        )
+        command = (
+            [get_ffmpeg_exe(), "-y", "-hide_banner", "-loglevel", "error"]
+            + ["-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}"]
+            + ["-r", f"{fps}", "-i", "-"]
+            + audio_inputs
+            + ["-map", "0:v:0"]
+            + (
+                encoder_args(encoder)
+                if encoder is not None
+                else ["-c:v", codec, "-pix_fmt", "yuv420p"]
+            )
+            + (
+                ["-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2"]
+                if width % 2 or height % 2
+                else []
+            )
+            + (audio_outputs if audio_outputs else ["-an"])
+            + ["-movflags", "+faststart", outfile]
+        )
+        # A pipe that nobody reads while frames are written would fill up and block ffmpeg, and then the writer.
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            command, stdin=subprocess.PIPE, stderr=self.stderr
+        )
+
+    def write(self, frame):
+        """Sends a bgr frame to the encoder.
+
+        Args:
+            frame (numpy.ndarray): The frame to encode.
+
+        Raises:
+            RuntimeError: If ffmpeg exited early, e.g. because the encoder settings are invalid.
+        """
+        try:
+            self.process.stdin.write(
+                memoryview(frame.data if frame.flags.c_contiguous else frame.copy())
+            )
+        except BrokenPipeError:
+            # ffmpeg exited early, release raises its exit code and error output instead.
+            self.release()
+            raise
+
+    def release(self):
+        """Finishes encoding and waits for ffmpeg to exit.
+
+        Raises:
+            RuntimeError: If ffmpeg exits with a non-zero status.
+        """
+        if not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        self.process.wait()
+        if self.stderr.closed:
+            return
+        self.stderr.seek(0)
+        stderr = self.stderr.read()
+        self.stderr.close()
+        if self.process.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg failed with exit code {self.process.returncode}: {stderr.decode(errors='replace')}"
+            )
+
+
+def open_video_writer(
+    outfile, fps, frame_size, codec="mp4v", audio_source=None, encoder=None
+):
+    """Opens a writer for encoded frames.
+
+    Args:
+        outfile (str): File path to write the encoded video to.
+        fps (float): Frames per second of the output.
+        frame_size (Tuple[int, int]): Width and height of the frames that will be written.
+        codec (str): "mp4v" to write with cv2.VideoWriter, otherwise the ffmpeg video encoder to pipe frames into.
+        audio_source (str): If provided, the audio track of this file is muxed into the output. Requires an ffmpeg
+            encoder.
+        encoder (Union[str, Dict]): If provided, the ffmpeg encoder profile to use instead of codec, see
+            resolve_encoder.
+
+    Returns:
+        (Union[cv2.VideoWriter, FFmpegVideoWriter]): An object with write(frame) and release() methods.
+    """
+    if codec == "mp4v" and audio_source is None and encoder is None:
+        return cv2.VideoWriter(
+            outfile, cv2.VideoWriter_fourcc(*"mp4v"), fps, frame_size
+        )
+    return FFmpegVideoWriter(
+        outfile,
+        fps,
+        frame_size,
+        codec=codec,
+        audio_source=audio_source,
+        encoder=encoder,
+    )
+
+
+def concat_videos(videos, outfile, audio_source=None):
+    """Concatenates videos with identical encoding settings without re-encoding them.
+
+    Args:
+        videos (List[str]): File paths of the videos to join, in order.
+        outfile (str): File path to write the joined video to.
+        audio_source (str): If provided, the audio track of this file is muxed into the output.
+    """
+    list_file = tempfile.NamedTemporaryFile(
+        "w", suffix=".txt", delete=False, encoding="utf-8"
+    )
+    try:
+        for video in videos:
+            path = os.path.abspath(video).replace("\\", "/").replace("'", "'\\''")
+            list_file.write(f"file '{path}'\n")
+        list_file.close()
+        audio_inputs, audio_outputs = (
+            audio_input_args(audio_source) if audio_source is not None else ([], [])
+        )
+        run_ffmpeg(
+            ["-f", "concat", "-safe", "0", "-i", list_file.name]
+            + audio_inputs
+            + ["-map", "0:v:0", "-c:v", "copy"]
+            + audio_outputs
+            + ["-movflags", "+faststart", outfile]
+        )
+    finally:
+        list_file.close()
+        os.remove(list_file.name)
@@ -0,0 +1,521 @@
+import bisect
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from functools import partial
+
+import cv2
+import numpy as np
+
+from .encode import (
+    concat_videos,
+    copy_video_range,
+    get_video_format,
+    keyframe_times,
+    resolve_encoder,
+)
+from .progress import ExportProgress, post_progress
+from .subtitle import create_subtitled_video
+from .timeline import build_timeline
+
+PASSTHROUGH_ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+
+def split_frame_ranges(length, chunks):
+    """Splits a frame count into contiguous, nearly equal ranges.
+
+    Args:
+        length (int): The total number of frames.
+        chunks (int): The number of ranges to create.
+
+    Returns:
+        (List[Tuple[int, int]]): Start (inclusive) and end (exclusive) frame indices of each range.
+    """
+    chunks = max(1, min(chunks, length))
+    chunk_size = math.ceil(length / chunks)
+    return [
+        (start, min(start + chunk_size, length))
+        for start in range(0, length, chunk_size)
+    ]
+
+
+def split_gop_ranges(length, keyframes, chunk_frames):
+    """Splits a frame count into ranges of about chunk_frames frames that start at keyframes where possible.
+
+    The ranges only depend on their arguments, so exports of the same video are split the same way every time.
+
+    Args:
+        length (int): The total number of frames.
+        keyframes (List[int]): Frame numbers of the keyframes of the source video.
+        chunk_frames (int): The minimum length of a range. A range is cut at chunk_frames frames when the next
+            keyframe is more than twice that far away.
+
+    Returns:
+        (List[Tuple[int, int]]): Start (inclusive) and end (exclusive) frame indices of each range.
+    """
+    chunk_frames = max(1, chunk_frames)
+    keyframes = sorted(k for k in keyframes if 0 < k < length)
+    res = []
+    start = 0
+    while start < length:
+        ix = bisect.bisect_left(keyframes, start + chunk_frames)
+        end = start + chunk_frames
+        if ix < len(keyframes) and keyframes[ix] <= start + 2 * chunk_frames:
+            end = keyframes[ix]
+        end = min(end, length)
+        res.append((start, end))
+        start = end
+    return res
+
+
+def plan_passthrough(frame_states, keyframes):
+    """Splits a video into keyframe aligned pieces that can be stream copied and pieces that must be rendered.
+
+    A group of pictures can be copied when none of its frames display subtitles. Neighbouring groups that are both
+    copied or both rendered are merged.
+
+    Args:
+        frame_states (numpy.ndarray): State id of each frame, -1 for frames without subtitles, as in
+            whisper_shorts_subs.timeline.Timeline.frame_states.
+        keyframes (List[int]): Frame numbers of the keyframes of the source video.
+
+    Returns:
+        (List[Tuple[int, int, bool]]): Start frame, end frame (exclusive) and whether to copy, for each piece in order.
+    """
+    length = len(frame_states)
+    if length == 0:
+        return []
+    boundaries = sorted({0} | {k for k in keyframes if 0 < k < length})
+    has_text = np.add.reduceat((frame_states >= 0).astype(np.int64), boundaries)
+    ends = boundaries[1:] + [length]
+    res = []
+    for ix, (start, end) in enumerate(zip(boundaries, ends)):
+        copy = bool(has_text[ix] == 0) and (start > 0 or 0 in keyframes)
+        if len(res) > 0 and res[-1][2] == copy:
+            res[-1] = (res[-1][0], end, copy)
+        else:
+            res.append((start, end, copy))
+    return res
+
+
+def _init_render_process():
+    """Keeps each render process to one OpenCV thread, as the pool already provides the parallelism."""
+    cv2.setNumThreads(1)
+
+
+def _render_chunk(args):
+    """Renders one frame range of a video, used as the process pool entrypoint."""
+    (
+        video,
+        outfile,
+        segments,
+        start_frame,
+        end_frame,
+        subtitle_kwargs,
+        progress_callback,
+    ) = args
+    create_subtitled_video(
+        video,
+        outfile,
+        segments,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        progress_callback=progress_callback,
+        **dict(subtitle_kwargs, show_progress=False),
+    )
+    return outfile
+
+
+def render_chunks(jobs, processes, progress=None):
+    """Renders frame ranges of a video, in a process pool when there is more than one process and job.
+
+    Args:
+        jobs (List[Tuple]): (video, outfile, segments, start_frame, end_frame, subtitle_kwargs) for each range.
+        processes (int): The maximum number of worker processes.
+        progress (whisper_shorts_subs.progress.ExportProgress): If provided, the progress of each job is folded into
+            it and reported as the jobs run.
+    """
+    if processes <= 1 or len(jobs) <= 1:
+        for ix, job in enumerate(jobs):
+            callback = None
+            if progress is not None:
+                callback = partial(_report_child, progress, ix)
+            _render_chunk(job + (callback,))
+        return
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(jobs)), initializer=_init_render_process
+    ) as executor:
+        if progress is None:
+            list(executor.map(_render_chunk, [job + (None,) for job in jobs]))
+            return
+        with multiprocessing.Manager() as manager:
+            progress_queue = manager.Queue()
+            futures = [
+                executor.submit(
+                    _render_chunk, job + (partial(post_progress, progress_queue, ix),)
+                )
+                for ix, job in enumerate(jobs)
+            ]
+            pending = futures
+            while len(pending) > 0:
+                _, pending = wait(
+                    pending, timeout=progress.interval, return_when=FIRST_EXCEPTION
+                )
+                while True:
+                    try:
+                        progress.update_child(*progress_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                progress.report()
+            for future in futures:
+                future.result()
+
+
+def _report_child(progress, key, metrics):
+    """Folds the metrics of an in-process job into the overall progress and reports it."""
+    progress.update_child(key, metrics)
+    progress.report()
+
+
+def create_subtitled_video_parallel(
+    video,
+    outfile,
+    segments,
+    processes=None,
+    chunks=None,
+    audio_source=None,
+    passthrough=False,
+    progress_callback=None,
+    export_cache=None,
+    **subtitle_kwargs,
+):
+    """Creates a subtitled video by rendering frame ranges in parallel processes.
+
+    Each worker seeks its own cv2.VideoCapture to the start of its range and encodes it to a temporary file. The
+    encoded chunks are then joined in order without re-encoding, muxing in the audio track at the same time.
+
+    With passthrough, groups of pictures without subtitles are stream copied from the source instead of being decoded
+    and re-encoded, see create_subtitled_video_passthrough. Otherwise, with an export_cache, chunks encoded by earlier
+    exports are reused where their subtitles are unchanged, see create_subtitled_video_cached.
+
+    Args:
+        video (str): File path to the input video.
+        outfile (str): File path to write the subtitled video to.
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        processes (int): The number of worker processes. Defaults to the number of cpus.
+        chunks (int): The number of frame ranges to split the video into. Defaults to the number of processes.
+        audio_source (str): If provided, the audio track of this file is muxed into the output.
+        passthrough (bool): If True, stream copies subtitle free ranges when the source format allows it.
+        progress_callback (Callable[[Dict], None]): If provided, called periodically with the progress of the whole
+            export, see whisper_shorts_subs.progress.ExportProgress.
+        export_cache (whisper_shorts_subs.cache.ExportCache): If provided, encoded chunks are looked up in and stored
+            to this cache.
+        **subtitle_kwargs: Additional keyword arguments to be passed to whisper_shorts_subs.subtitle.create_subtitled_video.
+    """
+    processes = processes if processes is not None else os.cpu_count() or 1
+    chunks = chunks if chunks is not None else processes
+    if passthrough and create_subtitled_video_passthrough(
+        video,
+        outfile,
+        segments,
+        processes=processes,
+        chunks=chunks,
+        audio_source=audio_source,
+        progress_callback=progress_callback,
+        **subtitle_kwargs,
+    ):
+        return
+    if export_cache is not None:
+        create_subtitled_video_cached(
+            video,
+            outfile,
+            segments,
+            export_cache,
+            processes=processes,
+            audio_source=audio_source,
+            progress_callback=progress_callback,
+            **subtitle_kwargs,
+        )
+        return
+    cap = cv2.VideoCapture(video)
+    length = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    frame_ranges = split_frame_ranges(length, chunks)
+    if processes <= 1 or len(frame_ranges) <= 1:
+        create_subtitled_video(
+            video,
+            outfile,
+            segments,
+            audio_source=audio_source,
+            progress_callback=progress_callback,
+            **subtitle_kwargs,
+        )
+        return
+    progress = (
+        ExportProgress(length, progress_callback)
+        if progress_callback is not None
+        else None
+    )
+    chunk_dir = tempfile.mkdtemp()
+    try:
+        jobs = [
+            (
+                video,
+                os.path.join(chunk_dir, f"chunk_{ix:05d}.mp4"),
+                segments,
+                start_frame,
+                end_frame,
+                subtitle_kwargs,
+            )
+            for ix, (start_frame, end_frame) in enumerate(frame_ranges)
+        ]
+        render_chunks(jobs, processes, progress)
+        mux_start = time.perf_counter()
+        concat_videos([job[1] for job in jobs], outfile, audio_source=audio_source)
+        if progress is not None:
+            progress.add(mux=time.perf_counter() - mux_start)
+            progress.report(force=True)
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+
+def create_subtitled_video_passthrough(
+    video,
+    outfile,
+    segments,
+    processes=1,
+    chunks=None,
+    audio_source=None,
+    progress_callback=None,
+    **subtitle_kwargs,
+):
+    """Creates a subtitled video, re-encoding only the groups of pictures that display subtitles.
+
+    Keyframe aligned ranges without subtitles are copied from the source as is. Ranges with subtitles are rendered
+    and encoded with the encoder matching the source codec, optionally in parallel processes, and all pieces are then
+    joined in order. This only works for h264 and hevc sources in yuv420p, other sources are left untouched.
+
+    Args:
+        video (str): File path to the input video.
+        outfile (str): File path to write the subtitled video to.
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        processes (int): The number of worker processes rendering ranges with subtitles.
+        chunks (int): The number of pieces to split the ranges with subtitles into. Defaults to the number of
+            processes.
+        audio_source (str): If provided, the audio track of this file is muxed into the output.
+        progress_callback (Callable[[Dict], None]): If provided, called periodically with the progress of the whole
+            export, see whisper_shorts_subs.progress.ExportProgress. Copied frames count as processed.
+        **subtitle_kwargs: Additional keyword arguments to be passed to whisper_shorts_subs.subtitle.create_subtitled_video.
+            The codec is chosen to match the source, keeping the other settings of an encoder profile.
+
+    Returns:
+        (bool): True if the video was created, False if the source format does not support passthrough.
+    """
+    codec_name, pix_fmt = get_video_format(video)
+    if codec_name not in PASSTHROUGH_ENCODERS or pix_fmt != "yuv420p":
+        return False
+    encoder = subtitle_kwargs.get("encoder")
+    # The joined file keeps the parameter sets of its first piece, so re-encoded pieces repeat their own in-band.
+    encoder = dict(
+        resolve_encoder(
+            encoder
+            if encoder is not None
+            else {"codec": PASSTHROUGH_ENCODERS[codec_name]}
+        ),
+        codec=PASSTHROUGH_ENCODERS[codec_name],
+        pix_fmt=pix_fmt,
+        repeat_headers=True,
+    )
+    subtitle_kwargs = dict(
+        subtitle_kwargs, codec=PASSTHROUGH_ENCODERS[codec_name], encoder=encoder
+    )
+    cap = cv2.VideoCapture(video)
+    length = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    timeline = build_timeline(
+        segments, fps, length, subtitle_kwargs.get("strategy", "whole_segment")
+    )
+    keyframes = dict(keyframe_times(video, fps))
+    pieces = plan_passthrough(timeline.frame_states, list(keyframes))
+    render_frames = sum(end - start for start, end, copy in pieces if not copy)
+    chunks = chunks if chunks is not None else max(1, processes)
+    chunk_size = max(1, math.ceil(render_frames / chunks))
+    progress = (
+        ExportProgress(length, progress_callback)
+        if progress_callback is not None
+        else None
+    )
+    piece_dir = tempfile.mkdtemp()
+    try:
+        piece_files = []
+        jobs = []
+        for start, end, copy in pieces:
+            if copy:
+                piece_file = os.path.join(
+                    piece_dir, f"piece_{len(piece_files):05d}.mkv"
+                )
+                copy_start = time.perf_counter()
+                copy_video_range(
+                    video, piece_file, keyframes[start], end - start, codec_name
+                )
+                if progress is not None:
+                    progress.add(end - start, mux=time.perf_counter() - copy_start)
+                    progress.report()
+                piece_files.append(piece_file)
+                continue
+            range_chunks = max(1, round((end - start) / chunk_size))
+            for chunk_start, chunk_end in split_frame_ranges(end - start, range_chunks):
+                piece_file = os.path.join(
+                    piece_dir, f"piece_{len(piece_files):05d}.mkv"
+                )
+                jobs.append(
+                    (
+                        video,
+                        piece_file,
+                        segments,
+                        start + chunk_start,
+                        start + chunk_end,
+                        subtitle_kwargs,
+                    )
+                )
+                piece_files.append(piece_file)
+        render_chunks(jobs, processes, progress)
+        mux_start = time.perf_counter()
+        concat_videos(piece_files, outfile, audio_source=audio_source)
+        if progress is not None:
+            progress.add(mux=time.perf_counter() - mux_start)
+            progress.report(force=True)
+    finally:
+        shutil.rmtree(piece_dir, ignore_errors=True)
+    return True
+
+
+def chunk_states(timeline, start_frame, end_frame):
+    """Lists the subtitle states shown on a range of frames, in a form that can be compared between exports.
+
+    Args:
+        timeline (whisper_shorts_subs.timeline.Timeline): The frame to state mapping of the video.
+        start_frame (int): The first frame of the range.
+        end_frame (int): One past the last frame of the range.
+
+    Returns:
+        (List[Tuple[int, int, Optional[Tuple]]]): Start and end frame relative to start_frame, and state of each run
+            of frames, with None for frames without subtitles.
+    """
+    return [
+        (
+            start - start_frame,
+            end - start_frame,
+            timeline.states[state_id] if state_id >= 0 else None,
+        )
+        for start, end, state_id in timeline.runs(start_frame, end_frame)
+    ]
+
+
+def create_subtitled_video_cached(
+    video,
+    outfile,
+    segments,
+    cache,
+    processes=1,
+    chunk_seconds=2.0,
+    audio_source=None,
+    progress_callback=None,
+    **subtitle_kwargs,
+):
+    """Creates a subtitled video, re-rendering only the chunks whose subtitles changed since an earlier export.
+
+    The video is split into keyframe aligned chunks of about chunk_seconds, see split_gop_ranges, and each chunk is
+    keyed by the subtitle states shown on its frames. Chunks found in the cache are reused as they are, the others are
+    rendered and encoded, optionally in parallel processes, and stored. All chunks are then joined in order without
+    re-encoding. After a small transcript edit, only the few chunks around the edited segments are encoded again.
+
+    Args:
+        video (str): File path to the input video.
+        outfile (str): File path to write the subtitled video to.
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        cache (whisper_shorts_subs.cache.ExportCache): The cache to look chunks up in and store them to.
+        processes (int): The number of worker processes rendering chunks.
+        chunk_seconds (float): The approximate length of each chunk. Shorter chunks re-encode less around an edit, but
+            cost more to start and join.
+        audio_source (str): If provided, the audio track of this file is muxed into the output.
+        progress_callback (Callable[[Dict], None]): If provided, called periodically with the progress of the whole
+            export, see whisper_shorts_subs.progress.ExportProgress. Reused frames count as processed.
+        **subtitle_kwargs: Additional keyword arguments to be passed to whisper_shorts_subs.subtitle.create_subtitled_video.
+            They are part of the cache key.
+
+    Returns:
+        (int): The number of chunks that were rendered.
+    """
+    cap = cv2.VideoCapture(video)
+    length = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    timeline = build_timeline(
+        segments, fps, length, subtitle_kwargs.get("strategy", "whole_segment")
+    )
+    frame_ranges = split_gop_ranges(
+        length,
+        [frame for frame, _ in keyframe_times(video, fps)],
+        int(round(chunk_seconds * fps)),
+    )
+    key = cache.key(video, **subtitle_kwargs)
+    progress = (
+        ExportProgress(length, progress_callback)
+        if progress_callback is not None
+        else None
+    )
+    chunk_dir = tempfile.mkdtemp(dir=cache.cache_dir)
+    try:
+        chunk_files = []
+        jobs = []
+        for start_frame, end_frame in frame_ranges:
+            chunk_key = cache.chunk_key(
+                key,
+                start_frame,
+                end_frame,
+                chunk_states(timeline, start_frame, end_frame),
+            )
+            chunk_file = cache.get(chunk_key)
+            if chunk_file is None:
+                jobs.append(
+                    (
+                        video,
+                        os.path.join(chunk_dir, chunk_key + cache.suffix),
+                        segments,
+                        start_frame,
+                        end_frame,
+                        subtitle_kwargs,
+                    )
+                )
+                chunk_file = chunk_key
+            elif progress is not None:
+                progress.add(end_frame - start_frame)
+            chunk_files.append(chunk_file)
+        render_chunks(jobs, processes, progress)
+        rendered = {}
+        for job in jobs:
+            chunk_key = os.path.splitext(os.path.basename(job[1]))[0]
+            rendered[chunk_key] = cache.put(chunk_key, job[1])
+        mux_start = time.perf_counter()
+        concat_videos(
+            [rendered.get(chunk_file, chunk_file) for chunk_file in chunk_files],
+            outfile,
+            audio_source=audio_source,
+        )
+        if progress is not None:
+            progress.add(mux=time.perf_counter() - mux_start)
+            progress.report(force=True)
+    finally:
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+    cache.evict()
+    return len(jobs)
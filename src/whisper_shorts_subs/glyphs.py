@@ -0,0 +1,336 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class Glyph:
+    """The coverage bitmap of one character drawn with cv2.putText.
+
+    Args:
+        mask (numpy.ndarray): uint8 coverage, 0-255, cropped to the pixels the character touches.
+        x (int): Left edge of the mask relative to the origin the character was drawn at.
+        y (int): Top edge of the mask relative to the origin the character was drawn at.
+    """
+
+    def __init__(self, mask, x, y):
+        self.mask = mask
+        self.x = x
+        self.y = y
+
+
+class GlyphAtlas:
+    """A thread safe, size bounded cache of glyph bitmaps and of the layout of words.
+
+    Each character is drawn with cv2.putText once per font, scale, thickness and line type, which covers the fill and
+    every outline width, and kept for composing text later.
+
+    Args:
+        max_glyphs (int): The maximum number of glyph bitmaps, and separately of laid out words, to keep around.
+    """
+
+    def __init__(self, max_glyphs=4096):
+        self.max_glyphs = max_glyphs
+        self.glyphs = OrderedDict()
+        self.runs = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def glyph(self, char, font, font_scale, thickness, line_type=cv2.LINE_AA):
+        """Fetches the bitmap of a character, drawing it if it is not cached.
+
+        Args:
+            char (str): The character.
+            font (int): The cv2 font.
+            font_scale (float): The size of the text.
+            thickness (int): The stroke thickness.
+            line_type (int): The cv2 line type.
+
+        Returns:
+            (Optional[Glyph]): The glyph, or None if the character draws nothing.
+        """
+        key = (char, font, font_scale, thickness, line_type)
+        with self.lock:
+            if key in self.glyphs:
+                self.hits += 1
+                self.glyphs.move_to_end(key)
+                return self.glyphs[key]
+        (width, height), baseline = cv2.getTextSize(char, font, font_scale, thickness)
+        pad = thickness + 2
+        origin = (pad, pad + height)
+        canvas = np.zeros((height + baseline + 2 * pad, width + 2 * pad), np.uint8)
+        cv2.putText(canvas, char, origin, font, font_scale, 255, thickness, line_type)
+        x, y, w, h = cv2.boundingRect(canvas)
+        glyph = None
+        if w > 0 and h > 0:
+            glyph = Glyph(
+                np.ascontiguousarray(canvas[y : y + h, x : x + w]),
+                x - origin[0],
+                y - origin[1],
+            )
+        with self.lock:
+            self.misses += 1
+            self.glyphs[key] = glyph
+            if len(self.glyphs) > self.max_glyphs:
+                self.glyphs.popitem(last=False)
+        return glyph
+
+    def place(self, text, origin, font, font_scale, thickness, line_type=cv2.LINE_AA):
+        """Lays text out the way cv2.putText does.
+
+        Each character starts where cv2.getTextSize says the text up to and including it ends, less the width of the
+        character itself, rounded to whole pixels.
+
+        Args:
+            text (str): The text.
+            origin (Tuple[int, int]): The bottom left corner of the text, as passed to cv2.putText.
+            font (int): The cv2 font.
+            font_scale (float): The size of the text.
+            thickness (int): The stroke thickness.
+            line_type (int): The cv2 line type.
+
+        Returns:
+            (List[Tuple[Glyph, int, int]]): Each visible glyph with the position of its top left corner.
+        """
+        key = (text, font, font_scale, thickness, line_type)
+        with self.lock:
+            run = self.runs.get(key)
+            if run is not None:
+                self.runs.move_to_end(key)
+        if run is None:
+            run = []
+            for ix, char in enumerate(text):
+                glyph = self.glyph(char, font, font_scale, thickness, line_type)
+                if glyph is None:
+                    continue
+                pen = (
+                    cv2.getTextSize(text[: ix + 1], font, font_scale, thickness)[0][0]
+                    - cv2.getTextSize(char, font, font_scale, thickness)[0][0]
+                )
+                run.append((glyph, pen + glyph.x, glyph.y))
+            with self.lock:
+                self.runs[key] = run
+                if len(self.runs) > self.max_glyphs:
+                    self.runs.popitem(last=False)
+        return [(glyph, origin[0] + x, origin[1] + y) for glyph, x, y in run]
+
+
+DEFAULT_ATLAS = GlyphAtlas()
+
+
+class TextRasterizer:
+    """Composes outlined text from cached glyph bitmaps instead of calling cv2.putText for every word and outline.
+
+    Text is laid out exactly like whisper_shorts_subs.subtitle.add_text_with_outlines, or
+    whisper_shorts_subs.subtitle.add_words_with_outlines when highlighting. Each outline and the fill form a layer,
+    whose coverage is the per pixel maximum of its glyphs, and the layers are composited in drawing order into a
+    premultiplied color and transmission. Characters are positioned to whole pixels, so edges can differ slightly from
+    cv2.putText, which places them with subpixel precision.
+
+    Args:
+        highlight (bool): If True, lays out words separately and colors the highlighted one.
+        atlas (GlyphAtlas): The glyph cache to use. Defaults to one shared by all rasterizers.
+        orient (None or Tuple[int, int]): The Location of the text relative to the top left corner.
+        font (int): The cv2 font to use.
+        font_scale (float): The size of the text.
+        font_color (Tuple[int, int, int]): Tuple containing ints 0-255 indicating bgr color.
+        highlight_color (Tuple[int, int, int]): If a word is highlighted, it will be displayed in this color.
+        thickness (int): The thickness of the text.
+        line_type (int): The cv2 line type.
+        outlines (List[Dict]): Definitions of outline color and thicknesses. ex: [{'color': (0, 0, 0), 'thickness': 8}]
+        orient_x_percent (float): If orient is None, the percentage of the screen from the left at which the text should
+            be centered horizontally.
+        orient_y_percent (float): If orient is None, the percentage of the screen from the top at which the text should
+            be centered vertically.
+        current_word_scale (float): Multiplier on the size of the highlighted word.
+    """
+
+    def __init__(
+        self,
+        highlight=False,
+        atlas=None,
+        orient=None,
+        font=cv2.FONT_HERSHEY_TRIPLEX,
+        font_scale=2,
+        font_color=None,
+        highlight_color=None,
+        thickness=2,
+        line_type=cv2.LINE_AA,
+        outlines=None,
+        orient_x_percent=0.5,
+        orient_y_percent=0.5,
+        current_word_scale=1,
+    ):
+        self.highlight = highlight
+        self.atlas = atlas if atlas is not None else DEFAULT_ATLAS
+        self.orient = orient
+        self.font = font
+        self.font_scale = font_scale
+        self.font_color = font_color if font_color is not None else (255, 255, 255)
+        self.highlight_color = (
+            highlight_color if highlight_color is not None else (0, 0, 255)
+        )
+        self.thickness = thickness
+        self.line_type = line_type
+        outlines = (
+            outlines if outlines is not None else [{"color": (0, 0, 0), "thickness": 8}]
+        )
+        if isinstance(outlines, list):
+            for outline in outlines:
+                if (
+                    not isinstance(outline, dict)
+                    or "color" not in outline
+                    or "thickness" not in outline
+                ):
+                    raise ValueError(
+                        "Please provide outline options in the following format: [{'color': ..., 'thickness': ...}]"
+                    )
+        else:
+            outlines = []
+        self.outlines = outlines
+        self.orient_x_percent = orient_x_percent
+        self.orient_y_percent = orient_y_percent
+        self.current_word_scale = current_word_scale
+
+    def text_origin(self, words, frame_shape):
+        """(Tuple[int, int]): The origin of the text in the frame, as computed by add_text_with_outlines."""
+        if self.orient is not None:
+            return self.orient
+        text_size = cv2.getTextSize(
+            " ".join(words), self.font, self.font_scale, self.thickness
+        )[0]
+        return (
+            int((frame_shape[1] - text_size[0]) * self.orient_x_percent),
+            int((frame_shape[0] + text_size[1]) * self.orient_y_percent),
+        )
+
+    def layers(self, words, highlight_index, frame_shape):
+        """Lays out the glyphs of each layer in drawing order.
+
+        Args:
+            words (Sequence[str]): The words to draw.
+            highlight_index (int): With highlight, the index of the word to highlight, if any.
+            frame_shape (Tuple[int, int]): The height and width of the frame.
+
+        Returns:
+            (List[Tuple[Tuple[int, int, int], List[Tuple[Glyph, int, int]]]]): The color and placed glyphs of each
+                layer.
+        """
+        origin = self.text_origin(words, frame_shape)
+        strokes = [
+            (outline["color"], outline["thickness"]) for outline in self.outlines
+        ]
+        if not self.highlight:
+            text = " ".join(words)
+            return [
+                (color, self.place(text, origin, self.font_scale, thickness))
+                for color, thickness in strokes + [(self.font_color, self.thickness)]
+            ]
+        text_width = cv2.getTextSize(
+            " ".join(words), self.font, self.font_scale, self.thickness
+        )[0][0]
+        word_widths = [
+            cv2.getTextSize(word, self.font, self.font_scale, self.thickness)[0][0]
+            for word in words
+        ]
+        space_size = 0
+        if len(word_widths) > 1:
+            space_size = (text_width - sum(word_widths)) / (len(word_widths) - 1)
+        word_origins = []
+        current_x_offset = 0
+        for ix, word in enumerate(words):
+            scale = self.font_scale
+            if ix == highlight_index:
+                scale = self.current_word_scale * self.font_scale
+            word_origins.append(((int(origin[0] + current_x_offset), origin[1]), scale))
+            current_x_offset += (
+                cv2.getTextSize(word, self.font, scale, self.thickness)[0][0]
+                + space_size
+            )
+        res = []
+        for color, thickness in strokes:
+            glyphs = []
+            for word, (word_origin, scale) in zip(words, word_origins):
+                glyphs += self.place(word, word_origin, scale, thickness)
+            res.append((color, glyphs))
+        for ix, (word, (word_origin, scale)) in enumerate(zip(words, word_origins)):
+            color = self.highlight_color if ix == highlight_index else self.font_color
+            glyphs = self.place(word, word_origin, scale, self.thickness)
+            if len(res) > len(strokes) and res[-1][0] == color:
+                res[-1][1].extend(glyphs)
+            else:
+                res.append((color, glyphs))
+        return res
+
+    def place(self, text, origin, font_scale, thickness):
+        """Lays out text with this rasterizer's font, see GlyphAtlas.place."""
+        return self.atlas.place(
+            text, origin, self.font, font_scale, thickness, self.line_type
+        )
+
+    def rasterize(self, words, highlight_index, frame_shape):
+        """Renders text into a cropped overlay.
+
+        Args:
+            words (Sequence[str]): The words to draw.
+            highlight_index (int): With highlight, the index of the word to highlight, if any.
+            frame_shape (Tuple[int, int]): The height and width of the frame.
+
+        Returns:
+            (Optional[Tuple[int, int, numpy.ndarray, numpy.ndarray]]): The left and top edge of the overlay in the
+                frame, its premultiplied bgr color and its per channel transmission, as used by
+                whisper_shorts_subs.render.Sprite, or None if nothing is drawn inside the frame.
+        """
+        height, width = frame_shape[:2]
+        layers = self.layers(words, highlight_index, frame_shape)
+        placed = [(glyph, x, y) for _, glyphs in layers for glyph, x, y in glyphs]
+        if len(placed) == 0:
+            return None
+        x0 = max(min(x for _, x, _ in placed), 0)
+        y0 = max(min(y for _, _, y in placed), 0)
+        x1 = min(max(x + glyph.mask.shape[1] for glyph, x, _ in placed), width)
+        y1 = min(max(y + glyph.mask.shape[0] for glyph, _, y in placed), height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        planes = np.zeros((3, y1 - y0, x1 - x0), np.float32)
+        transmission = np.ones((y1 - y0, x1 - x0), np.float32)
+        for layer_color, glyphs in layers:
+            boxes = []
+            for glyph, x, y in glyphs:
+                gx0, gy0 = max(x, x0), max(y, y0)
+                gx1 = min(x + glyph.mask.shape[1], x1)
+                gy1 = min(y + glyph.mask.shape[0], y1)
+                if gx1 > gx0 and gy1 > gy0:
+                    boxes.append((glyph, x, y, gx0, gy0, gx1, gy1))
+            if len(boxes) == 0:
+                continue
+            lx0, ly0 = min(box[3] for box in boxes), min(box[4] for box in boxes)
+            lx1, ly1 = max(box[5] for box in boxes), max(box[6] for box in boxes)
+            coverage = np.zeros((ly1 - ly0, lx1 - lx0), np.uint8)
+            for glyph, x, y, gx0, gy0, gx1, gy1 in boxes:
+                target = coverage[gy0 - ly0 : gy1 - ly0, gx0 - lx0 : gx1 - lx0]
+                np.maximum(
+                    target,
+                    glyph.mask[gy0 - y : gy1 - y, gx0 - x : gx1 - x],
+                    out=target,
+                )
+            alpha = coverage * np.float32(1 / 255)
+            keep = 1 - alpha
+            rows = slice(ly0 - y0, ly1 - y0)
+            columns = slice(lx0 - x0, lx1 - x0)
+            for plane, channel in zip(planes, layer_color):
+                plane[rows, columns] *= keep
+                if channel != 0:
+                    plane[rows, columns] += alpha * np.float32(channel)
+            transmission[rows, columns] *= keep
+        planes += 0.5
+        transmission *= 255
+        transmission += 0.5
+        return (
+            x0,
+            y0,
+            cv2.merge([plane.astype(np.uint8) for plane in planes]),
+            cv2.merge([transmission.astype(np.uint8)] * 3),
+        )
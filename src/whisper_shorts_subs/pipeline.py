@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+
+import numpy as np
+
+
+class FramePool:
+    """A fixed set of reusable frame buffers.
+
+    Decoding into buffers taken from the pool, and returning them once they are encoded, avoids allocating a new
+    array for every frame. It also bounds the number of frames in flight, since acquire blocks while all buffers are in
+    use.
+
+    Args:
+        shape (Tuple[int, ...]): Shape of each buffer, e.g. (height, width, 3).
+        count (int): The number of buffers.
+        dtype (numpy.dtype): Data type of each buffer.
+    """
+
+    def __init__(self, shape, count, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.free = queue.Queue()
+        for _ in range(count):
+            self.free.put(np.empty(self.shape, self.dtype))
+
+    def acquire(self, timeout=None):
+        """Takes a buffer from the pool, waiting for one to be released if all are in use.
+
+        Args:
+            timeout (float): If provided, the maximum number of seconds to wait.
+
+        Returns:
+            (numpy.ndarray): The buffer. Its content is undefined.
+
+        Raises:
+            queue.Empty: If no buffer was released within timeout.
+        """
+        return self.free.get(timeout=timeout)
+
+    def release(self, buffer):
+        """Returns a buffer to the pool. Arrays that do not match the pool's shape and dtype are dropped.
+
+        Args:
+            buffer (numpy.ndarray): A buffer previously acquired, or a frame allocated elsewhere.
+        """
+        if buffer.shape == self.shape and buffer.dtype == self.dtype:
+            self.free.put(buffer)
+
+
+class PipelineStopped(Exception):
+    """Raised inside a pipeline stage when another stage failed."""
+
+
+def _acquire(pool, stop):
+    """Takes a buffer from a pool, giving up once the pipeline is stopped."""
+    while True:
+        if stop.is_set():
+            raise PipelineStopped()
+        try:
+            return pool.acquire(timeout=0.1)
+        except queue.Empty:
+            continue
+
+
+def _put(frame_queue, item, stop):
+    """Puts an item on a bounded queue, giving up once the pipeline is stopped."""
+    while True:
+        if stop.is_set():
+            raise PipelineStopped()
+        try:
+            frame_queue.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+def _get(frame_queue, stop):
+    """Gets an item from a queue, giving up once the pipeline is stopped."""
+    while True:
+        if stop.is_set():
+            raise PipelineStopped()
+        try:
+            return frame_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+
+
+def run_pipeline(
+    cap,
+    out,
+    frame_indices,
+    render_frame,
+    frame_shape,
+    queue_size=4,
+    progress=None,
+    on_frame=None,
+):
+    """Decodes, renders and encodes frames on separate threads linked by bounded queues.
+
+    OpenCV releases the GIL while decoding and drawing and the ffmpeg encoder runs in its own process, so the three
+    stages overlap instead of running one after another. Frames are decoded into buffers from a FramePool and returned
+    to it after being encoded.
+
+    Args:
+        cap (cv2.VideoCapture): The capture to read from, positioned at the first frame to process.
+        out (Union[cv2.VideoWriter, whisper_shorts_subs.encode.FFmpegVideoWriter]): The writer to encode frames with.
+        frame_indices (range): The numbers of the frames that will be read.
+        render_frame (Callable[[int, numpy.ndarray], None]): Draws onto a frame inplace, given its number.
+        frame_shape (Tuple[int, int, int]): Height, width and channels of the decoded frames.
+        queue_size (int): The maximum number of frames waiting between two stages.
+        progress (whisper_shorts_subs.progress.ExportProgress): If provided, frames and time spent in each stage are
+            added to it and reported.
+        on_frame (Callable[[], None]): If provided, called after each frame is encoded, e.g. to advance a progress bar.
+
+    Returns:
+        (int): The number of frames encoded, which is less than len(frame_indices) if the video ended early.
+    """
+    pool = FramePool(frame_shape, 2 * queue_size + 3)
+    decoded = queue.Queue(maxsize=queue_size)
+    rendered = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+
+    def add_time(**stage_seconds):
+        if progress is not None:
+            progress.add(**stage_seconds)
+
+    def decode():
+        try:
+            for frame_index in frame_indices:
+                buffer = _acquire(pool, stop)
+                start = time.perf_counter()
+                ret, frame = cap.read(buffer)
+                add_time(decode=time.perf_counter() - start)
+                if not ret:
+                    pool.release(buffer)
+                    break
+                if frame is not buffer:
+                    pool.release(buffer)
+                _put(decoded, (frame_index, frame), stop)
+            _put(decoded, None, stop)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    def render():
+        try:
+            while True:
+                item = _get(decoded, stop)
+                if item is not None:
+                    start = time.perf_counter()
+                    render_frame(*item)
+                    add_time(render=time.perf_counter() - start)
+                _put(rendered, item, stop)
+                if item is None:
+                    return
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = [
+        threading.Thread(target=decode, daemon=True),
+        threading.Thread(target=render, daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    frames = 0
+    try:
+        while True:
+            item = _get(rendered, stop)
+            if item is None:
+                break
+            frame = item[1]
+            start = time.perf_counter()
+            out.write(frame)
+            add_time(encode=time.perf_counter() - start)
+            pool.release(frame)
+            frames += 1
+            if progress is not None:
+                progress.add(1)
+                progress.report()
+            if on_frame is not None:
+                on_frame()
+    except PipelineStopped:
+        pass
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+    if len(errors) > 0:
+        raise errors[0]
+    return frames
+
+
+class FanOutCapture:
+    """Wraps a capture so that each frame is read once and copied into every slot of a stacked buffer.
+
+    Used with FanOutWriter to run several renders of the same video through run_pipeline, passing it a frame_shape of
+    (count, height, width, channels).
+
+    Args:
+        cap (cv2.VideoCapture): The capture to read from.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+
+    def read(self, buffer):
+        """Decodes the next frame into buffer[0] and copies it into the other slots.
+
+        Args:
+            buffer (numpy.ndarray): A stacked buffer of shape (count, height, width, channels).
+
+        Returns:
+            (Tuple[bool, numpy.ndarray]): Whether a frame was read, and the buffer.
+        """
+        ret, frame = self.cap.read(buffer[0])
+        if not ret:
+            return False, buffer
+        if not np.shares_memory(frame, buffer[0]):
+            buffer[0] = frame
+        buffer[1:] = buffer[0]
+        return True, buffer
+
+
+class FanOutWriter:
+    """Writes each slot of a stacked frame buffer to its own writer.
+
+    Args:
+        writers (List[Union[cv2.VideoWriter, whisper_shorts_subs.encode.FFmpegVideoWriter]]): One writer per slot.
+    """
+
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write(self, frames):
+        """Sends frames[i] to the i-th writer.
+
+        Args:
+            frames (numpy.ndarray): A stacked buffer of shape (count, height, width, channels).
+        """
+        for writer, frame in zip(self.writers, frames):
+            writer.write(frame)
+
+    def release(self):
+        """Finishes every writer, raising the first error only after all of them were released."""
+        errors = []
+        for writer in self.writers:
+            try:
+                writer.release()
+            except Exception as e:
+                errors.append(e)
+        if len(errors) > 0:
+            raise errors[0]
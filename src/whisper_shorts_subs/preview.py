@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .render import SubtitleRenderer, subtitle_state
+from .timeline import segment_at
+
+
+def fit_size(frame_size, box_size):
+    """Scales a frame size to fit inside a box, keeping its aspect ratio.
+
+    Args:
+        frame_size (Tuple[int, int]): Width and height of the frame.
+        box_size (Tuple[int, int]): Width and height of the box to fit into.
+
+    Returns:
+        (Tuple[Tuple[int, int], float]): The scaled width and height, and the scale factor.
+    """
+    scale = min(box_size[0] / frame_size[0], box_size[1] / frame_size[1])
+    return (
+        max(1, int(round(frame_size[0] * scale))),
+        max(1, int(round(frame_size[1] * scale))),
+    ), scale
+
+
+class PreviewSource:
+    """Reads downscaled frames of a video for previews, keeping the most recently used ones in memory.
+
+    The video is opened once and each requested frame is decoded, shrunk to fit the preview box and cached, so
+    scrubbing back and forth over the same range does not decode again.
+
+    Args:
+        video (str): File path to the video.
+        box_size (Tuple[int, int]): Width and height of the area the preview is shown in.
+        max_frames (int): The maximum number of downscaled frames to keep around.
+    """
+
+    def __init__(self, video, box_size, max_frames=32):
+        self.video = video
+        self.cap = cv2.VideoCapture(video)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.frame_size = (
+            int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        self.preview_size, self.scale = fit_size(self.frame_size, box_size)
+        self.max_frames = max_frames
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.next_frame = None
+
+    @property
+    def duration(self):
+        """(float): Length of the video in seconds."""
+        return self.frame_count / self.fps
+
+    def frame_index(self, timestamp):
+        """(int): The number of the frame displayed at a time in seconds, clamped to the video."""
+        return min(max(int(timestamp * self.fps), 0), max(self.frame_count - 1, 0))
+
+    def frame_at(self, timestamp):
+        """Fetches the downscaled frame displayed at a time.
+
+        Args:
+            timestamp (float): The time in seconds.
+
+        Returns:
+            (Optional[numpy.ndarray]): The bgr frame at preview size, or None if it could not be read. Callers must not
+                modify it, as it is shared with the cache.
+        """
+        frame_index = self.frame_index(timestamp)
+        with self.lock:
+            if frame_index in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(frame_index)
+                return self.cache[frame_index]
+            self.misses += 1
+            if frame_index != self.next_frame:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+            ret, frame = self.cap.read()
+            if not ret:
+                self.next_frame = None
+                return None
+            self.next_frame = frame_index + 1
+            frame = cv2.resize(frame, self.preview_size, interpolation=cv2.INTER_AREA)
+            self.cache[frame_index] = frame
+            if len(self.cache) > self.max_frames:
+                self.cache.popitem(last=False)
+            return frame
+
+    def release(self):
+        """Closes the video."""
+        with self.lock:
+            self.cap.release()
+            self.cache.clear()
+
+
+def scale_text_kwargs(
+    scale, orient=None, font_scale=2, thickness=2, outlines=None, **text_kwargs
+):
+    """Scales text style settings from full frame size to preview size.
+
+    Args:
+        scale (float): Preview size divided by the full frame size.
+        orient (None or Tuple[int, int]): The location of the text on the full frame.
+        font_scale (float): The size of the text on the full frame.
+        thickness (float): The thickness of the text on the full frame.
+        outlines (List[Dict]): Definitions of outline color and thicknesses on the full frame.
+        **text_kwargs: Other style settings, passed through unchanged.
+
+    Returns:
+        (Dict): Keyword arguments for whisper_shorts_subs.render.SubtitleRenderer at preview size.
+    """
+    outlines = (
+        outlines if outlines is not None else [{"color": (0, 0, 0), "thickness": 8}]
+    )
+    return dict(
+        text_kwargs,
+        orient=(
+            (int(orient[0] * scale), int(orient[1] * scale))
+            if orient is not None
+            else None
+        ),
+        font_scale=font_scale * scale,
+        thickness=max(1, int(round(thickness * scale))),
+        outlines=[
+            dict(outline, thickness=max(1, int(round(outline["thickness"] * scale))))
+            for outline in outlines
+        ],
+    )
+
+
+def preview_renderer(frame_shape, scale, strategy="whole_segment", **text_kwargs):
+    """Creates a renderer for preview frames.
+
+    Args:
+        frame_shape (Tuple[int, int]): The height and width of the preview frames.
+        scale (float): Preview size divided by the full frame size.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+        **text_kwargs: Style settings at full frame size, e.g. font_scale, outlines, orient_y_percent.
+
+    Returns:
+        (whisper_shorts_subs.render.SubtitleRenderer): The renderer, with styles scaled to preview size.
+    """
+    return SubtitleRenderer(
+        frame_shape, strategy=strategy, **scale_text_kwargs(scale, **text_kwargs)
+    )
+
+
+def render_preview(
+    frame,
+    segments,
+    timestamp,
+    scale,
+    strategy="whole_segment",
+    renderer=None,
+    **text_kwargs,
+):
+    """Draws the subtitles displayed at a time onto a preview frame.
+
+    Args:
+        frame (numpy.ndarray): The downscaled frame. It is not modified.
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        timestamp (float): The time in seconds of the frame.
+        scale (float): Preview size divided by the full frame size.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+        renderer (whisper_shorts_subs.render.SubtitleRenderer): A renderer made by preview_renderer with the same
+            settings, to reuse states it has cached. If None, a new one is made.
+        **text_kwargs: Style settings at full frame size, e.g. font_scale, outlines, orient_y_percent.
+
+    Returns:
+        (numpy.ndarray): A new image with the subtitles applied.
+    """
+    segment = segment_at(segments, timestamp)
+    if segment is None:
+        return np.copy(frame)
+    if renderer is None:
+        renderer = preview_renderer(frame.shape, scale, strategy, **text_kwargs)
+    return renderer.render(
+        frame, subtitle_state(segment, timestamp, strategy), inplace=False
+    )
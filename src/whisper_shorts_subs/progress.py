@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+STAGES = ("decode", "render", "encode", "mux")
+
+
+class ExportProgress:
+    """Tracks how far an export got and where its time went, reporting to a callback.
+
+    Time is split into stages: "decode" for reading frames, "render" for drawing subtitles, "encode" for writing
+    frames to the encoder and flushing it, and "mux" for stream copying and joining files. Progress of work done
+    elsewhere, e.g. in worker processes, is folded in with update_child, in which case stage times are summed across
+    workers and can exceed the elapsed time.
+
+    The callback receives a dict with:
+        frames (int): Frames processed so far.
+        total_frames (int): Frames in the export.
+        elapsed (float): Seconds since the export started.
+        fps (float): Frames processed per second so far.
+        eta (Optional[float]): Estimated seconds until the export is done, None until a frame was processed.
+        stages (Dict[str, float]): Seconds spent in each stage.
+
+    Args:
+        total_frames (int): Frames in the export.
+        callback (Callable[[Dict], None]): If provided, called with the current metrics as the export progresses.
+        interval (float): The minimum number of seconds between callbacks, unless forced.
+    """
+
+    def __init__(self, total_frames, callback=None, interval=0.5):
+        self.total_frames = total_frames
+        self.callback = callback
+        self.interval = interval
+        self.frames = 0
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.children = {}
+        self.started = time.perf_counter()
+        self.last_report = None
+        self.lock = threading.Lock()
+
+    def add(self, frames=0, **stage_seconds):
+        """Records processed frames and time spent. Safe to call from several threads.
+
+        Args:
+            frames (int): Number of frames finished.
+            **stage_seconds: Seconds to add to each stage, e.g. decode=0.01.
+        """
+        with self.lock:
+            self.frames += frames
+            for stage, seconds in stage_seconds.items():
+                self.stages[stage] += seconds
+
+    def update_child(self, key, metrics):
+        """Replaces the latest metrics reported by a part of the export running elsewhere.
+
+        Args:
+            key: Identifies the part, e.g. its chunk index.
+            metrics (Dict): The metrics the part reported, as passed to a callback.
+        """
+        self.children[key] = metrics
+
+    def metrics(self):
+        """(Dict): The current metrics, as passed to the callback."""
+        with self.lock:
+            frames = self.frames
+            stages = dict(self.stages)
+        frames += sum(child["frames"] for child in self.children.values())
+        for child in self.children.values():
+            for stage, seconds in child["stages"].items():
+                stages[stage] += seconds
+        elapsed = time.perf_counter() - self.started
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        return {
+            "frames": frames,
+            "total_frames": self.total_frames,
+            "elapsed": elapsed,
+            "fps": fps,
+            "eta": max(self.total_frames - frames, 0) / fps if fps > 0 else None,
+            "stages": stages,
+        }
+
+    def report(self, force=False):
+        """Passes the current metrics to the callback, at most once per interval unless forced.
+
+        Args:
+            force (bool): If True, reports regardless of when the last report was.
+        """
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        if (
+            not force
+            and self.last_report is not None
+            and now - self.last_report < self.interval
+        ):
+            return
+        self.last_report = now
+        self.callback(self.metrics())
+
+
+def format_progress(metrics):
+    """Describes export metrics in one line for status displays.
+
+    Args:
+        metrics (Dict): Metrics as passed to an ExportProgress callback.
+
+    Returns:
+        (str): e.g. "45% 120.3 fps, 0:12 left".
+    """
+    total_frames = metrics["total_frames"]
+    fraction = metrics["frames"] / total_frames if total_frames > 0 else 1.0
+    res = f"{fraction:.0%} {metrics['fps']:.1f} fps"
+    if metrics["eta"] is not None:
+        minutes, seconds = divmod(int(round(metrics["eta"])), 60)
+        res += f", {minutes}:{seconds:02d} left"
+    return res
+
+
+def format_stages(metrics):
+    """Describes where the time of an export went.
+
+    Args:
+        metrics (Dict): Metrics as passed to an ExportProgress callback.
+
+    Returns:
+        (str): e.g. "decode 1.2s, render 0.3s, encode 4.0s, mux 0.1s".
+    """
+    return ", ".join(
+        f"{stage} {seconds:.1f}s" for stage, seconds in metrics["stages"].items()
+    )
+
+
+class MetricsLog:
+    """A progress callback appending each report to a file as a line of JSON.
+
+    Args:
+        path (str): File path of the log. Lines are appended if it already exists.
+        **fields: Extra values written with every line, e.g. the input video.
+    """
+
+    def __init__(self, path, **fields):
+        self.path = path
+        self.fields = fields
+
+    def __call__(self, metrics):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(dict(self.fields, time=time.time(), **metrics)) + "\n")
+
+
+def post_progress(progress_queue, key, metrics):
+    """Progress callback for worker processes, forwarding metrics to a queue as (key, metrics)."""
+    progress_queue.put((key, metrics))
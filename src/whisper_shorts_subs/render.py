@@ -0,0 +1,290 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from .glyphs import TextRasterizer
+from .subtitle import add_text_with_outlines, add_words_with_outlines
+
+
+def subtitle_state(segment, timestamp, strategy="whole_segment"):
+    """Determines what should be displayed for a segment at a given time.
+
+    Args:
+        segment (List[faster_whisper.transcribe.Word]): The segment currently on screen.
+        timestamp (float): The time in seconds of the frame being rendered.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+
+    Returns:
+        (Tuple[Tuple[str, ...], Optional[int]]): A hashable state made of the words to draw and the index of the
+            highlighted word, if any.
+    """
+    if strategy == "highlight":
+        highlight_index = None
+        for ix, word in enumerate(segment):
+            if (timestamp > word.start) and (timestamp <= word.end):
+                highlight_index = ix
+        return tuple(word.word.strip() for word in segment), highlight_index
+    if strategy == "type":
+        return (
+            tuple(word.word.strip() for word in segment if timestamp > word.start),
+            None,
+        )
+    return tuple(word.word.strip() for word in segment), None
+
+
+class Sprite:
+    """A cropped, pre-rendered subtitle overlay.
+
+    The overlay is stored as a premultiplied color image and a per channel transmission map so that blending onto a
+    frame is ``frame * transmission / 255 + color``.
+
+    Args:
+        x (int): Left edge of the sprite in frame coordinates.
+        y (int): Top edge of the sprite in frame coordinates.
+        color (numpy.ndarray): Premultiplied bgr color of the overlay.
+        transmission (numpy.ndarray): How much of the underlying frame shows through, 0-255.
+    """
+
+    def __init__(self, x, y, color, transmission):
+        self.x = x
+        self.y = y
+        self.color = color
+        self.transmission = transmission
+
+    @property
+    def nbytes(self):
+        """(int): Memory used by the sprite's pixel data."""
+        return self.color.nbytes + self.transmission.nbytes
+
+    def blend(self, image):
+        """Blends the sprite onto an image inplace.
+
+        Args:
+            image (numpy.ndarray): The image to draw on. Must be the frame size the sprite was rendered for.
+
+        Returns:
+            (numpy.ndarray): The image with the sprite applied.
+        """
+        height, width = self.color.shape[:2]
+        roi = image[self.y : self.y + height, self.x : self.x + width]
+        roi[:] = cv2.add(
+            cv2.multiply(roi, self.transmission, scale=1 / 255), self.color
+        )
+        return image
+
+
+class SubtitleRenderer:
+    """Renders each distinct subtitle state once and blends the cached result onto frames.
+
+    Text drawn with ``cv2.putText`` only changes at word boundaries, so instead of redrawing every outline on every
+    frame, each state is rasterized once onto a black and a white canvas. The difference between the two gives the
+    overlay's transmission, the black render gives its premultiplied color, and both are cropped to the text's
+    bounding box.
+
+    By default states are composed from cached glyph bitmaps by a whisper_shorts_subs.glyphs.TextRasterizer, which
+    skips the full width canvases and the repeated ``cv2.putText`` calls for every word and outline.
+
+    Args:
+        frame_shape (Tuple[int, int]): The height and width of the frames to render onto.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+        max_cached_states (int): The maximum number of rendered states to keep around.
+        use_glyph_atlas (bool): If False, rasterizes states by drawing them with ``cv2.putText``, which places
+            characters with subpixel precision.
+        **text_kwargs: Keyword arguments for whisper_shorts_subs.subtitle.add_text_with_outlines or
+            whisper_shorts_subs.subtitle.add_words_with_outlines, e.g. font_scale, outlines, orient_y_percent.
+    """
+
+    def __init__(
+        self,
+        frame_shape,
+        strategy="whole_segment",
+        max_cached_states=256,
+        use_glyph_atlas=True,
+        **text_kwargs,
+    ):
+        self.frame_shape = tuple(frame_shape[:2])
+        self.strategy = strategy
+        self.max_cached_states = max_cached_states
+        self.text_kwargs = text_kwargs
+        self.text_kwargs.pop("inplace", None)
+        if strategy != "highlight":
+            self.text_kwargs.pop("current_word_scale", None)
+            self.text_kwargs.pop("highlight_color", None)
+        self.text_rasterizer = None
+        if use_glyph_atlas:
+            self.text_rasterizer = TextRasterizer(
+                highlight=strategy == "highlight", **self.text_kwargs
+            )
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def draw(self, image, state, orient=None):
+        """Draws a state directly onto an image with cv2, bypassing the cache.
+
+        Args:
+            image (numpy.ndarray): The image to draw on inplace.
+            state (Tuple[Tuple[str, ...], Optional[int]]): State as returned by subtitle_state.
+            orient (Tuple[int, int]): If provided, overrides the text origin, e.g. when drawing onto a crop of the frame.
+
+        Returns:
+            (numpy.ndarray): The image with text applied to it.
+        """
+        words, highlight_index = state
+        text_kwargs = self.text_kwargs
+        if orient is not None:
+            text_kwargs = dict(text_kwargs, orient=orient)
+        if self.strategy == "highlight":
+            return add_words_with_outlines(
+                image,
+                list(words),
+                highlight_index=highlight_index,
+                **text_kwargs,
+            )
+        return add_text_with_outlines(image, " ".join(words), **text_kwargs)
+
+    def caption_band(self, state):
+        """Finds the text origin of a state and the rows of the frame its text can touch.
+
+        The band is bounded by the text's ascent and descent at the largest scale in use, padded by the widest outline,
+        so drawing into just those rows gives the same pixels as drawing on the whole frame.
+
+        Args:
+            state (Tuple[Tuple[str, ...], Optional[int]]): State as returned by subtitle_state.
+
+        Returns:
+            (Tuple[Tuple[int, int], int, int]): The text origin in frame coordinates, and the first and one past the
+                last row of the band.
+        """
+        height, width = self.frame_shape
+        text = " ".join(state[0])
+        font = self.text_kwargs.get("font", cv2.FONT_HERSHEY_TRIPLEX)
+        font_scale = self.text_kwargs.get("font_scale", 2)
+        thickness = self.text_kwargs.get("thickness", 2)
+        orient = self.text_kwargs.get("orient")
+        if orient is None:
+            text_size = cv2.getTextSize(text, font, font_scale, thickness)[0]
+            orient = (
+                int(
+                    (width - text_size[0])
+                    * self.text_kwargs.get("orient_x_percent", 0.5)
+                ),
+                int(
+                    (height + text_size[1])
+                    * self.text_kwargs.get("orient_y_percent", 0.5)
+                ),
+            )
+        max_scale = font_scale * max(1, self.text_kwargs.get("current_word_scale", 1))
+        (_, text_height), baseline = cv2.getTextSize(text, font, max_scale, thickness)
+        outlines = self.text_kwargs.get("outlines")
+        outlines = outlines if outlines is not None else [{"thickness": 8}]
+        if not isinstance(outlines, list):
+            outlines = []
+        pad = max([thickness] + [outline["thickness"] for outline in outlines]) + 2
+        pad += text_height // 2
+        y0 = min(max(orient[1] - text_height - pad, 0), height)
+        y1 = min(max(orient[1] + baseline + pad, y0), height)
+        return orient, y0, y1
+
+    def rasterize(self, state):
+        """Renders a state into a cropped sprite.
+
+        Without the glyph atlas, only the caption band of the frame is drawn, see caption_band.
+
+        Args:
+            state (Tuple[Tuple[str, ...], Optional[int]]): State as returned by subtitle_state.
+
+        Returns:
+            (Optional[Sprite]): The rendered sprite, or None if the state draws nothing.
+        """
+        if len(state[0]) == 0:
+            return None
+        if self.text_rasterizer is not None:
+            overlay = self.text_rasterizer.rasterize(
+                state[0], state[1], self.frame_shape
+            )
+            return Sprite(*overlay) if overlay is not None else None
+        width = self.frame_shape[1]
+        orient, band_y0, band_y1 = self.caption_band(state)
+        band_height = band_y1 - band_y0
+        if band_height == 0:
+            return None
+        band_orient = (orient[0], orient[1] - band_y0)
+        black = self.draw(
+            np.zeros((band_height, width, 3), np.uint8), state, band_orient
+        )
+        white = self.draw(
+            np.full((band_height, width, 3), 255, np.uint8), state, band_orient
+        )
+        changed = cv2.bitwise_or(black, cv2.bitwise_not(white))
+        x, y0, w, h = cv2.boundingRect(changed.reshape(band_height, width * 3))
+        if w == 0 or h == 0:
+            return None
+        y1 = y0 + h
+        x0, x1 = x // 3, -(-(x + w) // 3)
+        transmission = cv2.subtract(white[y0:y1, x0:x1], black[y0:y1, x0:x1])
+        return Sprite(
+            x0,
+            band_y0 + y0,
+            np.ascontiguousarray(black[y0:y1, x0:x1]),
+            transmission,
+        )
+
+    def get_sprite(self, state):
+        """Fetches the sprite for a state, rendering it if it is not cached.
+
+        Args:
+            state (Tuple[Tuple[str, ...], Optional[int]]): State as returned by subtitle_state.
+
+        Returns:
+            (Optional[Sprite]): The rendered sprite, or None if the state draws nothing.
+        """
+        if state in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(state)
+            return self.cache[state]
+        self.misses += 1
+        sprite = self.rasterize(state)
+        self.cache[state] = sprite
+        if len(self.cache) > self.max_cached_states:
+            self.cache.popitem(last=False)
+        return sprite
+
+    def discard(self, segments):
+        """Drops the cached states that display any of some segments, e.g. after they were edited.
+
+        Args:
+            segments (List[List[faster_whisper.transcribe.Word]]): The segments whose states are no longer needed.
+
+        Returns:
+            (int): The number of states dropped.
+        """
+        texts = set()
+        for segment in segments:
+            words = tuple(word.word.strip() for word in segment)
+            texts.add(words)
+            if self.strategy == "type":
+                texts.update(words[:ix] for ix in range(len(words)))
+        stale = [state for state in self.cache if state[0] in texts]
+        for state in stale:
+            del self.cache[state]
+        return len(stale)
+
+    def render(self, image, state, inplace=True):
+        """Applies a subtitle state to an image.
+
+        Args:
+            image (numpy.ndarray): The frame to draw on.
+            state (Tuple[Tuple[str, ...], Optional[int]]): State as returned by subtitle_state.
+            inplace (bool): If True, will modify the image inplace.
+
+        Returns:
+            (numpy.ndarray): The image data with text applied to it.
+        """
+        if not inplace:
+            image = np.copy(image)
+        sprite = self.get_sprite(state)
+        if sprite is not None:
+            sprite.blend(image)
+        return image
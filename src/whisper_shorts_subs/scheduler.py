@@ -0,0 +1,120 @@
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from faster_whisper import WhisperModel
+
+from .audio import load_audio
+from .cache import cached_transcribe_with_timestamps
+from .transcribe import transcribe_with_timestamps
+
+
+class TranscriptionScheduler:
+    """Transcribes many files concurrently with a pool of whisper models.
+
+    CTranslate2 releases the GIL while decoding, so jobs run on threads. With shared_model, a single WhisperModel is
+    loaded with num_workers set to the number of workers, which lets that many transcriptions run on it at once while
+    keeping one copy of the weights in memory. Otherwise each worker loads its own model. Either way, cpu_threads sets
+    the threads used by each transcription, so few workers with many threads favour latency and many workers with few
+    threads favour throughput.
+
+    Args:
+        model_size (str): String descriptor for the model to use.
+        workers (int): The number of transcriptions to run at the same time.
+        cpu_threads (int): Threads used by each transcription. 0 uses the CTranslate2 default.
+        shared_model (bool): If True, all workers share one model instance.
+        model_workers (int): Concurrent transcriptions each model instance supports. Defaults to workers for a shared
+            model and 1 otherwise. Raise it when jobs transcribe speech chunks in parallel with vad_workers.
+        cache (whisper_shorts_subs.cache.TranscriptionCache): If provided, transcriptions are looked up in and stored
+            to this cache.
+        **model_kwargs: Additional keyword arguments to model loading, e.g. device and compute_type.
+    """
+
+    def __init__(
+        self,
+        model_size="small",
+        workers=1,
+        cpu_threads=0,
+        shared_model=True,
+        model_workers=None,
+        cache=None,
+        **model_kwargs,
+    ):
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.model_settings = dict(model_kwargs, model_size=model_size)
+        self.models = queue.Queue()
+        if shared_model:
+            model = WhisperModel(
+                model_size,
+                cpu_threads=cpu_threads,
+                num_workers=model_workers or self.workers,
+                **model_kwargs,
+            )
+            for _ in range(self.workers):
+                self.models.put(model)
+        else:
+            for _ in range(self.workers):
+                self.models.put(
+                    WhisperModel(
+                        model_size,
+                        cpu_threads=cpu_threads,
+                        num_workers=model_workers or 1,
+                        **model_kwargs,
+                    )
+                )
+        self.executor = ThreadPoolExecutor(max_workers=self.workers)
+
+    def _transcribe(self, audio, transcribe_kwargs):
+        """Runs one job on a model borrowed from the pool."""
+        model = self.models.get()
+        try:
+            if self.cache is not None:
+                return cached_transcribe_with_timestamps(
+                    self.cache, model, audio, self.model_settings, **transcribe_kwargs
+                )
+            if isinstance(audio, str):
+                audio = load_audio(audio)
+            return transcribe_with_timestamps(model, audio, **transcribe_kwargs)
+        finally:
+            self.models.put(model)
+
+    def submit(self, audio, **transcribe_kwargs):
+        """Queues a file for transcription.
+
+        Args:
+            audio (Union[str, numpy.ndarray]): An input audio filename or decoded audio.
+            **transcribe_kwargs: Additional keyword arguments to be passed to
+                whisper_shorts_subs.transcribe.transcribe_with_timestamps.
+
+        Returns:
+            (concurrent.futures.Future): Resolves to the List[faster_whisper.transcribe.Word] for the file.
+        """
+        return self.executor.submit(self._transcribe, audio, transcribe_kwargs)
+
+    def transcribe_all(self, audio_sources, **transcribe_kwargs):
+        """Transcribes many files concurrently.
+
+        Args:
+            audio_sources (Iterable[Union[str, numpy.ndarray]]): The audio filenames or decoded audio to transcribe.
+            **transcribe_kwargs: Additional keyword arguments to be passed to
+                whisper_shorts_subs.transcribe.transcribe_with_timestamps.
+
+        Returns:
+            (List[List[faster_whisper.transcribe.Word]]): The words of each audio source, in input order.
+        """
+        futures = [self.submit(audio, **transcribe_kwargs) for audio in audio_sources]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs and releases the worker threads.
+
+        Args:
+            wait (bool): If True, waits for queued jobs to finish.
+        """
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
@@ -0,0 +1,96 @@
+import bisect
+
+import numpy as np
+
+
+def segment_ranges(
+    starts,
+    ends,
+    word_overlap_delay=0.5,
+    max_segment_words=None,
+    max_segment_chars=None,
+    max_segment_duration=None,
+    text_lengths=None,
+):
+    """Splits a transcript into segments to display on the screen at a time.
+
+    A new segment starts after a pause of at least word_overlap_delay, and segments are filled greedily up to the
+    limits given. Every segment holds at least one word, even if that word alone exceeds a limit. Pauses and word
+    counts are found with numpy over the whole transcript. The character and duration limits need a pass over the
+    segments, which binary searches cumulative line lengths and end times instead of adding words one at a time.
+
+    Args:
+        starts (numpy.ndarray): Start time in seconds of each word.
+        ends (numpy.ndarray): End time in seconds of each word.
+        word_overlap_delay (float): The minimum pause between two words that starts a new segment.
+        max_segment_words (int): The maximum number of words in each segment.
+        max_segment_chars (int): The maximum number of characters in each segment's text, counting one space between
+            words. Requires text_lengths.
+        max_segment_duration (float): The maximum time in seconds from the start of a segment's first word to the end
+            of its last.
+        text_lengths (numpy.ndarray): Number of characters of each word, without surrounding whitespace.
+
+    Returns:
+        (numpy.ndarray): An int array of shape (segments, 2) with the start and one past the end index of the words
+            of each segment, in order.
+
+    Raises:
+        ValueError: If max_segment_chars is given without text_lengths.
+    """
+    starts = np.asarray(starts, np.float64)
+    ends = np.asarray(ends, np.float64)
+    count = len(starts)
+    if count == 0:
+        return np.zeros((0, 2), np.int64)
+    breaks = np.flatnonzero(ends[:-1] + word_overlap_delay <= starts[1:]) + 1
+    if max_segment_chars is None and max_segment_duration is None:
+        run_starts = np.concatenate([[0], breaks])
+        run_lengths = np.diff(np.concatenate([run_starts, [count]]))
+        segment_starts = run_starts
+        if max_segment_words is not None:
+            position = np.arange(count) - np.repeat(run_starts, run_lengths)
+            segment_starts = np.flatnonzero(position % max(max_segment_words, 1) == 0)
+        return np.stack(
+            [segment_starts, np.concatenate([segment_starts[1:], [count]])], axis=1
+        )
+    if max_segment_chars is not None:
+        if text_lengths is None:
+            raise ValueError("max_segment_chars requires the text length of each word")
+        line_ends = np.concatenate(
+            [[0], np.cumsum(np.asarray(text_lengths, np.int64) + 1)]
+        ).tolist()
+    latest_ends = np.maximum.accumulate(ends).tolist()
+    starts = starts.tolist()
+    ends = ends.tolist()
+    breaks = breaks.tolist() + [count]
+    res = []
+    start = 0
+    next_break = 0
+    while start < count:
+        while breaks[next_break] <= start:
+            next_break += 1
+        stop = breaks[next_break]
+        if max_segment_words is not None:
+            stop = min(stop, start + max_segment_words)
+        if max_segment_chars is not None:
+            stop = min(
+                stop,
+                bisect.bisect_right(
+                    line_ends, line_ends[start] + max_segment_chars + 1, start + 1
+                )
+                - 1,
+            )
+        if max_segment_duration is not None:
+            latest_end = starts[start] + max_segment_duration
+            if start > 0 and latest_ends[start - 1] > latest_end:
+                # An earlier word ends after this segment may, so the running maximum cannot be searched.
+                duration_stop = start
+                while duration_stop < stop and ends[duration_stop] <= latest_end:
+                    duration_stop += 1
+                stop = duration_stop
+            else:
+                stop = min(stop, bisect.bisect_right(latest_ends, latest_end, start))
+        stop = max(stop, start + 1)
+        res.append((start, stop))
+        start = stop
+    return np.array(res, np.int64)
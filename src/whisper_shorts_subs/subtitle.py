@@ -1,36 +1,49 @@
+import os
+import time
+
 import cv2
 import numpy as np
 import tqdm
 
+from .encode import open_video_writer
+from .segmentation import segment_ranges
+
 
-def create_segments(words, word_overlap_delay=0.5, max_segment_words=None):
+def create_segments(
+    words,
+    word_overlap_delay=0.5,
+    max_segment_words=None,
+    max_segment_chars=None,
+    max_segment_duration=None,
+):
     """Splits words into logical segments to display on the screen at a time.
 
+    Boundaries are found with whisper_shorts_subs.segmentation.segment_ranges.
+
     Args:
         words (List[faster_whisper.transcribe.Word]): The word list to break into segments.
         word_overlap_delay (float): The maximum time between words before a new segment is determined.
         max_segment_words (int): The maximum number of words in each segment.
+        max_segment_chars (int): The maximum number of characters in each segment's text.
+        max_segment_duration (float): The maximum time in seconds each segment spans.
 
     Returns:
         (List[List[faster_whisper.transcribe.Word]]): A list of segments of words formed by splitting the input.
     """
-    max_segment_words = (
-        max_segment_words if max_segment_words is not None else len(words) + 1
+    ranges = segment_ranges(
+        [word.start for word in words],
+        [word.end for word in words],
+        word_overlap_delay=word_overlap_delay,
+        max_segment_words=max_segment_words,
+        max_segment_chars=max_segment_chars,
+        max_segment_duration=max_segment_duration,
+        text_lengths=(
+            [len(word.word.strip()) for word in words]
+            if max_segment_chars is not None
+            else None
+        ),
     )
-    res = []
-    current = [words[0]]
-    for word in words[1:]:
-        if (
-            len(current) >= max_segment_words
-            or current[-1].end + word_overlap_delay <= word.start
-        ):
-            res.append(current)
-            current = [word]
-        else:
-            current.append(word)
-    if len(current) > 0:
-        res.append(current)
-    return res
+    return [words[start:stop] for start, stop in ranges.tolist()]
 
 
 def add_text_with_outlines(
@@ -151,8 +164,8 @@ def add_words_with_outlines(
     result = image
     if not inplace:
         result = np.copy(image)
+    text_size = cv2.getTextSize(" ".join(words), font, font_scale, thickness)[0]
     if orient is None:
-        text_size = cv2.getTextSize(" ".join(words), font, font_scale, thickness)[0]
         orient = (
             int((image.shape[1] - text_size[0]) * orient_x_percent),
             int((image.shape[0] + text_size[1]) * orient_y_percent),
@@ -232,88 +245,244 @@ def create_subtitled_video(
     orient_y_percent=0.5,
     current_word_scale=1,
     strategy="whole_segment",
+    start_frame=0,
+    end_frame=None,
+    show_progress=True,
+    codec="mp4v",
+    audio_source=None,
+    progress_callback=None,
+    pipelined=None,
+    encoder=None,
 ):
-    """Processes an entire input video, creating an output video with subtitles but no audio.
+    """Processes an entire input video, creating an output video with subtitles.
+
+    The state shown on each frame is looked up in a whisper_shorts_subs.timeline.Timeline built once up front, and
+    each distinct state is rendered once by a whisper_shorts_subs.render.SubtitleRenderer and blended onto the frames
+    that display it. Decoding, blending and encoding run on separate threads, see
+    whisper_shorts_subs.pipeline.run_pipeline.
 
     Args:
+        video (str): File path to the input video.
+        outfile (str): File path to write the subtitled video to.
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        orient (None or Tuple[int, int]): The Location of the text relative to the top left corner.
+        font (int): The cv2 font to use.
+        font_scale (float): The size of the text.
+        font_color (Tuple[int, int, int]): Tuple containing ints 0-255 indicating bgr color.
+        thickness (float): The thickness of the text.
+        line_type (int): The cv2 line type.
+        outlines (List[Dict]): Definitions of outline color and thicknesses. ex: [{'color': (0, 0, 0), 'thickness': 8}]
+        inplace (bool): Kept for compatibility. Decoded frames are not referenced anywhere else, so subtitles are always
+            blended onto them inplace.
+        orient_x_percent (float): If orient is None, the percentage of the screen from the left at which the text should
+            be centered horizontally.
+        orient_y_percent (float): If orient is None, the percentage of the screen from the top at which the text should
+            be centered vertically.
+        current_word_scale (float): Multiplier on the size of the highlighted word when strategy is "highlight".
+        strategy (str): One of "whole_segment", "type" or "highlight".
+        start_frame (int): Index of the first frame of the input to process.
+        end_frame (int): If provided, index one past the last frame of the input to process.
+        show_progress (bool): If True, displays a progress bar on stdout.
+        codec (str): "mp4v" to write with cv2.VideoWriter, otherwise the ffmpeg video encoder to pipe frames into.
+        audio_source (str): If provided, the audio track of this file is muxed into the output in the same pass, which
+            requires an ffmpeg codec. Otherwise the output has no audio.
+        progress_callback (Callable[[Dict], None]): If provided, called periodically with the frames processed and the
+            time spent decoding, rendering and encoding, see whisper_shorts_subs.progress.ExportProgress.
+        pipelined (bool): If False, decodes, blends and encodes each frame in turn on the calling thread. Defaults to
+            True when there is more than one cpu.
+        encoder (Union[str, Dict]): If provided, the ffmpeg encoder profile to use instead of codec, e.g. "draft" or
+            "final", see whisper_shorts_subs.encode.resolve_encoder.
+    """
+    create_subtitled_videos(
+        video,
+        [
+            {
+                "outfile": outfile,
+                "strategy": strategy,
+                "codec": codec,
+                "encoder": encoder,
+                "current_word_scale": current_word_scale,
+                "orient": orient,
+                "font": font,
+                "font_scale": font_scale,
+                "font_color": font_color,
+                "thickness": thickness,
+                "line_type": line_type,
+                "outlines": outlines,
+                "orient_x_percent": orient_x_percent,
+                "orient_y_percent": orient_y_percent,
+            }
+        ],
+        segments,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        show_progress=show_progress,
+        audio_source=audio_source,
+        progress_callback=progress_callback,
+        pipelined=pipelined,
+    )
 
-    Returns:
+
+def create_subtitled_videos(
+    video,
+    outputs,
+    segments,
+    start_frame=0,
+    end_frame=None,
+    show_progress=True,
+    audio_source=None,
+    progress_callback=None,
+    pipelined=None,
+):
+    """Creates several subtitled videos in different styles from a single pass over the input video.
+
+    Each frame is decoded once and copied to every output, which renders its own subtitles onto the copy and feeds its
+    own encoder, so decoding is shared between style variants instead of repeated for each of them.
+
+    Args:
+        video (str): File path to the input video.
+        outputs (List[Dict]): One dict per video to create, with the file path to write it to under "outfile". Other
+            keys override the defaults of create_subtitled_video for that output: "strategy", "codec", "encoder",
+            any text style setting such as "font_scale", "outlines" or "orient_y_percent", and "segments" to display
+            a different segmentation of the transcript.
+            ex: [{'outfile': 'a.mp4', 'font_scale': 2}, {'outfile': 'b.mp4', 'strategy': 'highlight'}]
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time, unless an output provides its own.
+        start_frame (int): Index of the first frame of the input to process.
+        end_frame (int): If provided, index one past the last frame of the input to process.
+        show_progress (bool): If True, displays a progress bar on stdout.
+        audio_source (str): If provided, the audio track of this file is muxed into every output in the same pass,
+            which requires ffmpeg codecs. Otherwise the outputs have no audio.
+        progress_callback (Callable[[Dict], None]): If provided, called periodically with the frames processed and the
+            time spent decoding, rendering and encoding, summed over all outputs, see
+            whisper_shorts_subs.progress.ExportProgress.
+        pipelined (bool): If False, decodes, blends and encodes each frame in turn on the calling thread. Defaults to
+            True when there is more than one cpu.
+
+    Raises:
+        ValueError: If outputs is empty or an output has no outfile.
     """
+    from .pipeline import FanOutCapture, FanOutWriter, run_pipeline
+    from .progress import ExportProgress
+    from .render import SubtitleRenderer
+    from .timeline import build_timeline
+
+    if len(outputs) == 0:
+        raise ValueError("Please provide at least one output")
+    for output in outputs:
+        if "outfile" not in output:
+            raise ValueError(
+                "Please provide the file path of each output under 'outfile'"
+            )
     cap = cv2.VideoCapture(video)
     length = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
     fps = cap.get(cv2.CAP_PROP_FPS)
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    out = cv2.VideoWriter(outfile, fourcc, fps, (frame_width, frame_height))
-    segment_index = 0
-    for _ in tqdm.tqdm(range(length)):
-        ret, frame = cap.read()
-        if not ret:
-            break
-        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
-        if segment_index >= len(segments):
-            out.write(frame)
-            continue
-        if timestamp > segments[segment_index][-1].end:
-            segment_index += 1
-            if segment_index >= len(segments):
-                out.write(frame)
-                continue
-        if timestamp < segments[segment_index][0].start:
-            out.write(frame)
-            continue
-        if strategy == "highlight":
-            words = []
-            highlight_index = None
-            for ix, word in enumerate(segments[segment_index]):
-                words.append(word.word.strip())
-                if (timestamp > word.start) and (timestamp <= word.end):
-                    highlight_index = ix
-            frame = add_words_with_outlines(
-                frame,
-                words,
-                highlight_index=highlight_index,
-                current_word_scale=current_word_scale,
-                orient=orient,
-                font=font,
-                font_scale=font_scale,
-                font_color=font_color,
-                thickness=thickness,
-                line_type=line_type,
-                outlines=outlines,
-                inplace=inplace,
-                orient_x_percent=orient_x_percent,
-                orient_y_percent=orient_y_percent,
-            )
-            out.write(frame)
-            continue
-        if strategy == "type":
-            current_text = " ".join(
-                [
-                    word.word.strip()
-                    for word in segments[segment_index]
-                    if timestamp > word.start
-                ]
+    writers = []
+    renderers = []
+    timelines = []
+    timeline_cache = {}
+    try:
+        for output in outputs:
+            text_kwargs = dict(output)
+            outfile = text_kwargs.pop("outfile")
+            output_segments = text_kwargs.pop("segments", segments)
+            strategy = text_kwargs.pop("strategy", "whole_segment")
+            codec = text_kwargs.pop("codec", "mp4v")
+            encoder = text_kwargs.pop("encoder", None)
+            renderers.append(
+                SubtitleRenderer(
+                    (frame_height, frame_width), strategy=strategy, **text_kwargs
+                )
             )
-        else:
-            current_text = " ".join(
-                [word.word.strip() for word in segments[segment_index]]
+            timeline_key = (id(output_segments), strategy)
+            if timeline_key not in timeline_cache:
+                timeline_cache[timeline_key] = build_timeline(
+                    output_segments, fps, length, strategy
+                )
+            timelines.append(timeline_cache[timeline_key])
+            writers.append(
+                open_video_writer(
+                    outfile,
+                    fps,
+                    (frame_width, frame_height),
+                    codec=codec,
+                    audio_source=audio_source,
+                    encoder=encoder,
+                )
             )
-        frame = add_text_with_outlines(
-            frame,
-            current_text,
-            orient=orient,
-            font=font,
-            font_scale=font_scale,
-            font_color=font_color,
-            thickness=thickness,
-            line_type=line_type,
-            outlines=outlines,
-            inplace=inplace,
-            orient_x_percent=orient_x_percent,
-            orient_y_percent=orient_y_percent,
+    except BaseException:
+        cap.release()
+        for writer in writers:
+            writer.release()
+        raise
+    end_frame = length if end_frame is None else min(end_frame, length)
+    progress = ExportProgress(end_frame - start_frame, progress_callback)
+    if start_frame > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+    def render_frames(frame_index, frames):
+        for renderer, timeline, frame in zip(renderers, timelines, frames):
+            state_id = timeline.frame_states[frame_index]
+            if state_id >= 0:
+                renderer.render(frame, timeline.states[state_id])
+
+    if len(outputs) == 1:
+        source, out, frame_shape = cap, writers[0], (frame_height, frame_width, 3)
+
+        def render(frame_index, frame):
+            render_frames(frame_index, [frame])
+
+    else:
+        source, out, frame_shape = (
+            FanOutCapture(cap),
+            FanOutWriter(writers),
+            (len(outputs), frame_height, frame_width, 3),
         )
-        out.write(frame)
-    cap.release()
-    out.release()
+        render = render_frames
+    if pipelined is None:
+        pipelined = (os.cpu_count() or 1) > 1
+    try:
+        if pipelined:
+            with tqdm.tqdm(
+                total=end_frame - start_frame, disable=not show_progress
+            ) as progress_bar:
+                run_pipeline(
+                    source,
+                    out,
+                    range(start_frame, end_frame),
+                    render,
+                    frame_shape,
+                    progress=progress,
+                    on_frame=progress_bar.update,
+                )
+        else:
+            buffer = np.empty(frame_shape, np.uint8)
+            for frame_index in tqdm.tqdm(
+                range(start_frame, end_frame), disable=not show_progress
+            ):
+                decode_start = time.perf_counter()
+                ret, frame = source.read(buffer)
+                if not ret:
+                    break
+                render_start = time.perf_counter()
+                render(frame_index, frame)
+                encode_start = time.perf_counter()
+                out.write(frame)
+                encode_end = time.perf_counter()
+                progress.add(
+                    1,
+                    decode=render_start - decode_start,
+                    render=encode_start - render_start,
+                    encode=encode_end - encode_start,
+                )
+                progress.report()
+    finally:
+        # Also release on failure, so ffmpeg does not keep running on a half written file.
+        cap.release()
+        release_start = time.perf_counter()
+        out.release()
+    progress.add(encode=time.perf_counter() - release_start)
+    progress.report(force=True)
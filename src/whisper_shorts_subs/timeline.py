@@ -0,0 +1,154 @@
+import numpy as np
+
+from .render import subtitle_state
+
+
+class Timeline:
+    """A precomputed mapping from frame numbers to the subtitle state displayed on them.
+
+    Args:
+        frame_states (numpy.ndarray): int32 array with the index into states for each frame, or -1 for frames without
+            subtitles.
+        states (List[Tuple[Tuple[str, ...], Optional[int]]]): The distinct states, as returned by
+            whisper_shorts_subs.render.subtitle_state.
+    """
+
+    def __init__(self, frame_states, states):
+        self.frame_states = frame_states
+        self.states = states
+
+    def __len__(self):
+        return len(self.frame_states)
+
+    def state_at(self, frame):
+        """Looks up the state displayed on a frame.
+
+        Args:
+            frame (int): The frame number.
+
+        Returns:
+            (Optional[Tuple[Tuple[str, ...], Optional[int]]]): The state, or None if the frame has no subtitles.
+        """
+        if frame < 0 or frame >= len(self.frame_states):
+            return None
+        state_id = self.frame_states[frame]
+        return self.states[state_id] if state_id >= 0 else None
+
+    def runs(self, start_frame=0, end_frame=None):
+        """Splits a frame range into runs of frames that display the same state.
+
+        Args:
+            start_frame (int): The first frame of the range.
+            end_frame (int): If provided, one past the last frame of the range.
+
+        Returns:
+            (List[Tuple[int, int, int]]): Start frame, end frame (exclusive) and state id of each run.
+        """
+        frame_states = self.frame_states[start_frame:end_frame]
+        if len(frame_states) == 0:
+            return []
+        changes = np.flatnonzero(np.diff(frame_states)) + 1
+        starts = np.concatenate([[0], changes])
+        ends = np.concatenate([changes, [len(frame_states)]])
+        return [
+            (int(start) + start_frame, int(end) + start_frame, int(frame_states[start]))
+            for start, end in zip(starts, ends)
+        ]
+
+
+def frame_keys(segment, timestamps, strategy):
+    """Computes an array that is equal for two frames of a segment exactly when they display the same state.
+
+    Args:
+        segment (List[faster_whisper.transcribe.Word]): The segment on screen.
+        timestamps (numpy.ndarray): The times in seconds of the frames showing the segment.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+
+    Returns:
+        (numpy.ndarray): One row per frame.
+    """
+    if strategy not in ("highlight", "type"):
+        return np.zeros((len(timestamps), 1), np.int8)
+    starts = np.array([word.start for word in segment])
+    ends = np.array([word.end for word in segment])
+    after_start = timestamps[:, None] > starts[None, :]
+    if strategy == "type":
+        return after_start
+    active = after_start & (timestamps[:, None] <= ends[None, :])
+    last_active = len(segment) - 1 - np.argmax(active[:, ::-1], axis=1)
+    return np.where(active.any(axis=1), last_active, -1)[:, None]
+
+
+def build_timeline(segments, fps, frame_count, strategy="whole_segment"):
+    """Precomputes which subtitle state each frame of a video displays.
+
+    Frame n is taken to be displayed at n / fps seconds. A frame shows the first segment that has not ended yet, as
+    long as that segment has started.
+
+    Args:
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        fps (float): Frames per second of the video.
+        frame_count (int): Number of frames in the video.
+        strategy (str): One of "whole_segment", "type" or "highlight".
+
+    Returns:
+        (Timeline): The frame to state mapping.
+    """
+    frame_states = np.full(frame_count, -1, np.int32)
+    states = []
+    state_ids = {}
+    if len(segments) == 0 or frame_count == 0:
+        return Timeline(frame_states, states)
+    timestamps = np.arange(frame_count) / fps
+    segment_starts = np.array([segment[0].start for segment in segments])
+    segment_ends = np.maximum.accumulate([segment[-1].end for segment in segments])
+    segment_indices = np.searchsorted(segment_ends, timestamps, side="left")
+    unique_indices, run_starts, run_lengths = np.unique(
+        segment_indices, return_index=True, return_counts=True
+    )
+    for segment_index, run_start, run_length in zip(
+        unique_indices, run_starts, run_lengths
+    ):
+        if segment_index >= len(segments):
+            continue
+        frames = np.arange(run_start, run_start + run_length)
+        frames = frames[timestamps[frames] >= segment_starts[segment_index]]
+        if len(frames) == 0:
+            continue
+        segment = segments[segment_index]
+        _, first_frames, inverse = np.unique(
+            frame_keys(segment, timestamps[frames], strategy),
+            axis=0,
+            return_index=True,
+            return_inverse=True,
+        )
+        ids = np.empty(len(first_frames), np.int32)
+        for ix, first_frame in enumerate(first_frames):
+            state = subtitle_state(segment, timestamps[frames[first_frame]], strategy)
+            if state not in state_ids:
+                state_ids[state] = len(states)
+                states.append(state)
+            ids[ix] = state_ids[state]
+        frame_states[frames] = ids[inverse.reshape(-1)]
+    return Timeline(frame_states, states)
+
+
+def segment_at(segments, timestamp):
+    """Finds the segment displayed at a time, following the same rule as build_timeline.
+
+    Args:
+        segments (List[List[faster_whisper.transcribe.Word]]): Segments containing the words to display on the screen
+            at the same time.
+        timestamp (float): The time in seconds.
+
+    Returns:
+        (Optional[List[faster_whisper.transcribe.Word]]): The segment on screen, or None if there is none.
+    """
+    if len(segments) == 0:
+        return None
+    segment_ends = np.maximum.accumulate([segment[-1].end for segment in segments])
+    segment_index = int(np.searchsorted(segment_ends, timestamp, side="left"))
+    if segment_index >= len(segments) or timestamp < segments[segment_index][0].start:
+        return None
+    return segments[segment_index]
@@ -1,9 +1,171 @@
+from concurrent.futures import ThreadPoolExecutor
 from faster_whisper.transcribe import Word
 import re
 
+from .audio import SAMPLING_RATE, load_audio
 
-def transcribe_with_timestamps(
+
+def format_word(word, lowercase=False, uppercase=False, remove_punctuation=False):
+    """Applies text normalization options to a transcribed word.
+
+    Args:
+        word (faster_whisper.transcribe.Word): The word to format.
+        lowercase (bool): If True, will make the word lowercase.
+        uppercase (bool): If True, will make the word uppercase. Has precedence over lowercase.
+        remove_punctuation (bool): If True, will remove punctuation from the word.
+
+    Returns:
+        (faster_whisper.transcribe.Word): The formatted word.
+    """
+    text = word.word
+    if lowercase:
+        text = text.lower()
+    if uppercase:
+        text = text.upper()
+    if remove_punctuation:
+        text = re.sub(r"[^\w\s]", "", text)
+    return Word(word.start, word.end, text, word.probability)
+
+
+def iter_transcribe_with_timestamps(
     model, audio, lowercase=False, uppercase=False, remove_punctuation=False
+):
+    """Transcribes a file's audio, yielding words as each segment is decoded.
+
+    Args:
+        model (faster_whisper.WhisperModel): The loaded whisper model to use for transcription.
+        audio (Union[str, BinaryIO, numpy.ndarray]): An input audio filename or content for model.transcribe.
+        lowercase (bool): If True, will ensure all words in the output are lowercase.
+        uppercase (bool): If True, will ensure all words in the output are uppercase. Has precedence over lowercase.
+        remove_punctuation (bool): If True, will ensure all words in the output contain no punctuation.
+
+    Yields:
+        (Tuple[List[faster_whisper.transcribe.Word], float]): The words of the latest decoded segment and the fraction
+            of the audio transcribed so far, from 0 to 1.
+    """
+    segments, info = model.transcribe(audio, word_timestamps=True)
+    for segment in segments:
+        words = [
+            format_word(word, lowercase, uppercase, remove_punctuation)
+            for word in segment.words
+        ]
+        progress = min(segment.end / info.duration, 1.0) if info.duration > 0 else 1.0
+        yield words, progress
+
+
+def speech_chunks(
+    audio,
+    max_chunk_seconds=30,
+    max_gap_seconds=2,
+    vad_options=None,
+    sampling_rate=SAMPLING_RATE,
+):
+    """Finds the speech in audio with voice activity detection and groups it into chunks to transcribe.
+
+    Neighbouring speech regions are merged while the gap between them is at most max_gap_seconds and the merged chunk
+    is at most max_chunk_seconds long, so each chunk fits in one whisper window and silence is skipped.
+
+    Args:
+        audio (numpy.ndarray): Mono float32 audio samples.
+        max_chunk_seconds (float): The maximum length of a chunk.
+        max_gap_seconds (float): The maximum silence to keep inside a chunk.
+        vad_options (Dict): Keyword arguments for faster_whisper.vad.VadOptions.
+        sampling_rate (int): The sample rate of the audio.
+
+    Returns:
+        (List[Tuple[int, int]]): Start (inclusive) and end (exclusive) sample indices of each chunk.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    vad_options = dict(vad_options if vad_options is not None else {})
+    vad_options.setdefault("max_speech_duration_s", max_chunk_seconds)
+    regions = get_speech_timestamps(
+        audio, VadOptions(**vad_options), sampling_rate=sampling_rate
+    )
+    max_chunk = int(max_chunk_seconds * sampling_rate)
+    max_gap = int(max_gap_seconds * sampling_rate)
+    res = []
+    for region in regions:
+        start, end = region["start"], region["end"]
+        if (
+            len(res) > 0
+            and start - res[-1][1] <= max_gap
+            and end - res[-1][0] <= max_chunk
+        ):
+            res[-1] = (res[-1][0], end)
+        else:
+            res.append((start, end))
+    return res
+
+
+def transcribe_with_vad(
+    model,
+    audio,
+    workers=1,
+    max_chunk_seconds=30,
+    vad_options=None,
+    lowercase=False,
+    uppercase=False,
+    remove_punctuation=False,
+):
+    """Transcribes only the speech in audio, with chunks transcribed in parallel.
+
+    Word timestamps are shifted from each chunk back onto the original timeline. For chunks to actually run at the
+    same time, the model should be loaded with num_workers of at least workers.
+
+    Args:
+        model (faster_whisper.WhisperModel): The loaded whisper model to use for transcription.
+        audio (Union[str, numpy.ndarray]): An input audio filename, loaded with whisper_shorts_subs.audio.load_audio,
+            or 16 kHz mono samples.
+        workers (int): The number of chunks to transcribe at the same time.
+        max_chunk_seconds (float): The maximum length of a chunk.
+        vad_options (Dict): Keyword arguments for faster_whisper.vad.VadOptions.
+        lowercase (bool): If True, will ensure all words in the output are lowercase.
+        uppercase (bool): If True, will ensure all words in the output are uppercase. Has precedence over lowercase.
+        remove_punctuation (bool): If True, will ensure all words in the output contain no punctuation.
+
+    Returns:
+        (List[faster_whisper.transcribe.Word]): Sequence of words inferred from the audio.
+    """
+    if not hasattr(audio, "dtype"):
+        audio = load_audio(audio)
+    chunks = speech_chunks(audio, max_chunk_seconds, vad_options=vad_options)
+
+    def transcribe_chunk(chunk):
+        start, end = chunk
+        offset = start / SAMPLING_RATE
+        segments, _ = model.transcribe(audio[start:end], word_timestamps=True)
+        return [
+            format_word(
+                Word(
+                    word.start + offset,
+                    word.end + offset,
+                    word.word,
+                    word.probability,
+                ),
+                lowercase,
+                uppercase,
+                remove_punctuation,
+            )
+            for segment in segments
+            for word in segment.words
+        ]
+
+    res = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for words in executor.map(transcribe_chunk, chunks):
+            res.extend(words)
+    return res
+
+
+def transcribe_with_timestamps(
+    model,
+    audio,
+    lowercase=False,
+    uppercase=False,
+    remove_punctuation=False,
+    vad=False,
+    vad_workers=1,
 ):
     """Transcribes a file's audio into Word objects containing the words and their start and end times.
 
@@ -13,20 +175,25 @@ def transcribe_with_timestamps(
         lowercase (bool): If True, will ensure all words in the output are lowercase.
         uppercase (bool): If True, will ensure all words in the output are uppercase. Has precedence over lowercase.
         remove_punctuation (bool): If True, will ensure all words in the output contain no punctuation.
+        vad (bool): If True, skips silence with voice activity detection and transcribes speech chunks in parallel with
+            transcribe_with_vad.
+        vad_workers (int): If vad is True, the number of chunks to transcribe at the same time.
 
     Returns:
         (List[faster_whisper.transcribe.Word]): Sequence of words inferred from the audio file.
     """
-    segments, _ = model.transcribe(audio, word_timestamps=True)
+    if vad:
+        return transcribe_with_vad(
+            model,
+            audio,
+            workers=vad_workers,
+            lowercase=lowercase,
+            uppercase=uppercase,
+            remove_punctuation=remove_punctuation,
+        )
     res = []
-    for segment in segments:
-        for word in segment.words:
-            text = word.word
-            if lowercase:
-                text = text.lower()
-            if uppercase:
-                text = text.upper()
-            if remove_punctuation:
-                text = re.sub(r"[^\w\s]", "", text)
-            res.append(Word(word.start, word.end, text, word.probability))
+    for words, _ in iter_transcribe_with_timestamps(
+        model, audio, lowercase, uppercase, remove_punctuation
+    ):
+        res.extend(words)
     return res
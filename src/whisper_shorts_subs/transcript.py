@@ -0,0 +1,353 @@
+import json
+import os
+
+import numpy as np
+from faster_whisper.transcribe import Word
+
+from .segmentation import segment_ranges
+from .util import header_string
+
+
+def format_timestamp(seconds, decimal_marker=","):
+    """Formats a time for subtitle files.
+
+    Args:
+        seconds (float): The time in seconds.
+        decimal_marker (str): "," for SRT, "." for WebVTT.
+
+    Returns:
+        (str): e.g. "01:02:03,456".
+    """
+    milliseconds = int(round(max(seconds, 0) * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+class Transcript:
+    """Transcribed words stored as columns.
+
+    Times and probabilities are numpy arrays, and each word's text is an index into a table of distinct words, so
+    long transcripts take little memory and load, save and convert in bulk. The tab separated textbox format is one
+    view of it, alongside .npz, JSON, SRT and WebVTT.
+
+    Args:
+        starts (numpy.ndarray): Start time in seconds of each word.
+        ends (numpy.ndarray): End time in seconds of each word.
+        probabilities (numpy.ndarray): Probability of each word.
+        word_ids (numpy.ndarray): Index of each word's text in vocabulary.
+        vocabulary (List[str]): The distinct word texts, including their leading spaces.
+    """
+
+    def __init__(self, starts, ends, probabilities, word_ids, vocabulary):
+        self.starts = np.asarray(starts, np.float64)
+        self.ends = np.asarray(ends, np.float64)
+        self.probabilities = np.asarray(probabilities, np.float64)
+        self.word_ids = np.asarray(word_ids, np.int32)
+        self.vocabulary = list(vocabulary)
+
+    @classmethod
+    def from_columns(cls, texts, starts, ends, probabilities):
+        """Builds a transcript from one sequence per column, interning the word texts.
+
+        Args:
+            texts (Iterable[str]): The text of each word.
+            starts (Sequence[float]): Start time in seconds of each word.
+            ends (Sequence[float]): End time in seconds of each word.
+            probabilities (Sequence[float]): Probability of each word.
+
+        Returns:
+            (Transcript): The transcript.
+        """
+        ids = {}
+        word_ids = [ids.setdefault(text, len(ids)) for text in texts]
+        return cls(starts, ends, probabilities, word_ids, list(ids))
+
+    @classmethod
+    def from_words(cls, words):
+        """Builds a transcript from faster_whisper words.
+
+        Args:
+            words (List[faster_whisper.transcribe.Word]): The transcribed words.
+
+        Returns:
+            (Transcript): The transcript.
+        """
+        return cls.from_columns(
+            [word.word for word in words],
+            [word.start for word in words],
+            [word.end for word in words],
+            [word.probability for word in words],
+        )
+
+    @classmethod
+    def from_string(cls, word_string, delim="\t"):
+        """Parses the textbox format, as output by to_string or whisper_shorts_subs.util.words_to_string.
+
+        Args:
+            word_string (str): The formatted transcript, starting with a header line. Blank lines are ignored.
+            delim (str): The delimiter between columns.
+
+        Returns:
+            (Transcript): The transcript.
+
+        Raises:
+            ValueError: If the lines do not have four columns or a number does not parse.
+        """
+        lines = [line for line in word_string.split("\n")[1:] if line.strip()]
+        if len(lines) == 0:
+            return cls.from_columns([], [], [], [])
+        fields = delim.join(lines).split(delim)
+        if len(fields) != 4 * len(lines):
+            raise ValueError(
+                f"Expected 4 columns on each of {len(lines)} lines, got {len(fields)} values"
+            )
+        return cls.from_columns(
+            fields[0::4],
+            np.array(fields[1::4], np.float64),
+            np.array(fields[2::4], np.float64),
+            np.array(fields[3::4], np.float64),
+        )
+
+    @classmethod
+    def from_json(cls, text):
+        """Parses a transcript written by to_json.
+
+        Args:
+            text (str): A JSON list of objects with "word", "start", "end" and "probability".
+
+        Returns:
+            (Transcript): The transcript.
+        """
+        rows = json.loads(text)
+        return cls.from_columns(
+            [row["word"] for row in rows],
+            [row["start"] for row in rows],
+            [row["end"] for row in rows],
+            [row["probability"] for row in rows],
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Loads a transcript saved with save.
+
+        Args:
+            path (str): File path to the .npz file.
+
+        Returns:
+            (Transcript): The transcript.
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["starts"],
+                data["ends"],
+                data["probabilities"],
+                data["word_ids"],
+                data["vocabulary"].tolist(),
+            )
+
+    @classmethod
+    def read(cls, path):
+        """Reads a transcript, choosing the format from the file extension.
+
+        Args:
+            path (str): File path ending in .npz, .json, or anything else for the textbox format.
+
+        Returns:
+            (Transcript): The transcript.
+
+        Raises:
+            ValueError: For .srt and .vtt files, which do not store word probabilities.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npz":
+            return cls.load(path)
+        if extension in (".srt", ".vtt"):
+            raise ValueError(f"Cannot read transcripts from {extension} files")
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if extension == ".json":
+            return cls.from_json(text)
+        return cls.from_string(text.strip("\n"))
+
+    def __len__(self):
+        return len(self.word_ids)
+
+    def __getitem__(self, index):
+        """Fetches a word, or a transcript of a slice of the words sharing this one's vocabulary."""
+        if isinstance(index, slice):
+            return Transcript(
+                self.starts[index],
+                self.ends[index],
+                self.probabilities[index],
+                self.word_ids[index],
+                self.vocabulary,
+            )
+        return Word(
+            float(self.starts[index]),
+            float(self.ends[index]),
+            self.vocabulary[self.word_ids[index]],
+            float(self.probabilities[index]),
+        )
+
+    def texts(self):
+        """(List[str]): The text of each word."""
+        vocabulary = self.vocabulary
+        return [vocabulary[word_id] for word_id in self.word_ids.tolist()]
+
+    def words(self):
+        """(List[faster_whisper.transcribe.Word]): The transcript as faster_whisper words."""
+        return [
+            Word(start, end, text, probability)
+            for text, start, end, probability in zip(
+                self.texts(),
+                self.starts.tolist(),
+                self.ends.tolist(),
+                self.probabilities.tolist(),
+            )
+        ]
+
+    def text_lengths(self):
+        """(numpy.ndarray): Number of characters of each word, without surrounding whitespace."""
+        lengths = np.array([len(text.strip()) for text in self.vocabulary], np.int64)
+        return lengths[self.word_ids] if len(lengths) > 0 else np.zeros(0, np.int64)
+
+    def segment_ranges(self, **segment_kwargs):
+        """Splits the transcript into segments to display on the screen at a time.
+
+        Args:
+            **segment_kwargs: Limits passed to whisper_shorts_subs.segmentation.segment_ranges, e.g. max_segment_words,
+                max_segment_chars or max_segment_duration.
+
+        Returns:
+            (numpy.ndarray): The start and one past the end index of the words of each segment.
+        """
+        return segment_ranges(
+            self.starts, self.ends, text_lengths=self.text_lengths(), **segment_kwargs
+        )
+
+    def to_string(self, delim="\t"):
+        """Formats the transcript for the textbox, like whisper_shorts_subs.util.words_to_string.
+
+        Args:
+            delim (str): The delimiter to place between columns.
+
+        Returns:
+            (str): The header line followed by one line per word.
+        """
+        line_format = delim.join(["%s", "%.2f", "%.2f", "%.3f"])
+        return "\n".join(
+            [header_string(delim)]
+            + [
+                line_format % row
+                for row in zip(
+                    self.texts(),
+                    self.starts.tolist(),
+                    self.ends.tolist(),
+                    self.probabilities.tolist(),
+                )
+            ]
+        )
+
+    def to_json(self):
+        """(str): The transcript as a JSON list of objects with "word", "start", "end" and "probability"."""
+        return json.dumps(
+            [
+                {"word": text, "start": start, "end": end, "probability": probability}
+                for text, start, end, probability in zip(
+                    self.texts(),
+                    self.starts.tolist(),
+                    self.ends.tolist(),
+                    self.probabilities.tolist(),
+                )
+            ]
+        )
+
+    def cues(self, ranges=None):
+        """Groups words into timed captions.
+
+        Args:
+            ranges (Iterable[Tuple[int, int]]): Start and one past the end index of the words in each caption. Defaults
+                to one caption per word.
+
+        Returns:
+            (List[Tuple[float, float, str]]): Start time, end time and text of each caption.
+        """
+        texts = self.texts()
+        if ranges is None:
+            ranges = ((ix, ix + 1) for ix in range(len(texts)))
+        return [
+            (
+                float(self.starts[start]),
+                float(self.ends[stop - 1]),
+                "".join(texts[start:stop]).strip(),
+            )
+            for start, stop in ranges
+            if stop > start
+        ]
+
+    def to_srt(self, ranges=None):
+        """Formats the transcript as SubRip subtitles.
+
+        Args:
+            ranges (Iterable[Tuple[int, int]]): Word index ranges of each caption, see cues.
+
+        Returns:
+            (str): The SRT file content.
+        """
+        return "".join(
+            f"{ix}\n{format_timestamp(start)} --> {format_timestamp(end)}\n{text}\n\n"
+            for ix, (start, end, text) in enumerate(self.cues(ranges), 1)
+        )
+
+    def to_vtt(self, ranges=None):
+        """Formats the transcript as WebVTT subtitles.
+
+        Args:
+            ranges (Iterable[Tuple[int, int]]): Word index ranges of each caption, see cues.
+
+        Returns:
+            (str): The WebVTT file content.
+        """
+        return "WEBVTT\n\n" + "".join(
+            f"{format_timestamp(start, '.')} --> {format_timestamp(end, '.')}\n{text}\n\n"
+            for start, end, text in self.cues(ranges)
+        )
+
+    def save(self, path):
+        """Saves the transcript in the compressed binary .npz format.
+
+        Args:
+            path (str): File path to write to. numpy appends .npz if it is missing.
+        """
+        np.savez_compressed(
+            path,
+            starts=self.starts,
+            ends=self.ends,
+            probabilities=self.probabilities,
+            word_ids=self.word_ids,
+            vocabulary=np.array(self.vocabulary, dtype=str),
+        )
+
+    def write(self, path, ranges=None):
+        """Writes the transcript, choosing the format from the file extension.
+
+        Args:
+            path (str): File path ending in .npz, .json, .srt, .vtt, or anything else for the textbox format.
+            ranges (Iterable[Tuple[int, int]]): For .srt and .vtt, word index ranges of each caption, see cues.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".npz":
+            self.save(path)
+            return
+        if extension == ".json":
+            text = self.to_json()
+        elif extension == ".srt":
+            text = self.to_srt(ranges)
+        elif extension == ".vtt":
+            text = self.to_vtt(ranges)
+        else:
+            text = self.to_string()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
@@ -1,4 +1,45 @@
-from faster_whisper.transcribe import Word
+def header_string(delim="\t"):
+    """Creates the header line of a formatted transcription string.
+
+    Args:
+        delim (str): The delimiter to place between columns of transcription data.
+
+    Returns:
+        (str): The column names joined by the delimiter.
+    """
+    return f"WORD{delim}START{delim}END{delim}PROBABILITY"
+
+
+def word_to_string(word, delim="\t"):
+    """Converts a single transcribed word to a line of a formatted transcription string.
+
+    Args:
+        word (faster_whisper.transcribe.Word): The transcribed word.
+        delim (str): The delimiter to place between columns of transcription data.
+
+    Returns:
+        (str): The formatted line, without a trailing newline.
+    """
+    return f"{word.word}{delim}{word.start:.2f}{delim}{word.end:.2f}{delim}{word.probability:.3f}"
+
+
+def string_to_word(line, delim="\t"):
+    """Parses a single line of a formatted transcription string, as output by word_to_string.
+
+    Args:
+        line (str): The formatted line.
+        delim (str): The delimiter between columns in the line.
+
+    Returns:
+        (faster_whisper.transcribe.Word): The word data parsed from the line.
+
+    Raises:
+        ValueError: If the line does not have four columns or a number does not parse.
+    """
+    from faster_whisper.transcribe import Word
+
+    word, start, end, prob = line.split(delim)
+    return Word(float(start), float(end), word, float(prob))
 
 
 def words_to_string(words, delim="\t"):
@@ -11,10 +52,9 @@ def words_to_string(words, delim="\t"):
     Returns:
         (str): Formatted string containing transcription word data.
     """
-    res = f"WORD{delim}START{delim}END{delim}PROBABILITY\n"
-    for word in words:
-        res += f"{word.word}{delim}{word.start:.2f}{delim}{word.end:.2f}{delim}{word.probability:.3f}\n"
-    return res.strip("\n")
+    return "\n".join(
+        [header_string(delim)] + [word_to_string(word, delim) for word in words]
+    )
 
 
 def string_to_words(word_string, delim="\t"):
@@ -27,8 +67,4 @@ def string_to_words(word_string, delim="\t"):
     Returns:
         (List[faster_whisper.transcribe.Word]): List of word data parsed from the input string.
     """
-    res = []
-    for line in word_string.split("\n")[1:]:
-        word, start, end, prob = line.split(delim)
-        res.append(Word(float(start), float(end), word, float(prob)))
-    return res
+    return [string_to_word(line, delim) for line in word_string.split("\n")[1:]]
@@ -0,0 +1,86 @@
+import queue
+import subprocess
+import sys
+
+from whisper_shorts_subs.app import (
+    ModelLoader,
+    PreviewRequest,
+    PreviewWorker,
+    TranscriptionWorker,
+)
+
+
+def make_request(request_id):
+    return PreviewRequest(
+        request_id=request_id,
+        source=None,
+        preview_time=0,
+        segments=[],
+        removed_segments=[],
+        words_per_segment=3,
+        strategy="highlight",
+        canvas_size=(90, 160),
+        text_kwargs={"font_scale": 2},
+    )
+
+
+def test_preview_worker_renders_newest_request_only():
+    preview_queue = queue.Queue()
+    worker = PreviewWorker(preview_queue)
+    for request_id in range(1, 6):
+        worker.request(make_request(request_id))
+    worker.start()
+    request_id, image, error = preview_queue.get(timeout=10)
+    assert request_id == 5 and error is None
+    assert image.size == (90, 160)
+    assert preview_queue.empty()
+
+
+def test_preview_worker_posts_render_errors():
+    preview_queue = queue.Queue()
+    worker = PreviewWorker(preview_queue)
+    preview_request = make_request(1)
+    preview_request.text_kwargs = {"font_scale": "large"}
+    worker.request(preview_request)
+    worker.start()
+    request_id, image, error = preview_queue.get(timeout=10)
+    assert request_id == 1 and image is None
+    assert error
+
+
+def test_model_loader_loads_in_background(monkeypatch):
+    monkeypatch.setattr(
+        "faster_whisper.WhisperModel", lambda size, **kwargs: (size, kwargs)
+    )
+    loader = ModelLoader("tiny", {"device": "cpu"})
+    loader.start()
+    assert loader.ready.wait(10)
+    assert loader.model == ("tiny", {"device": "cpu"}) and loader.error is None
+
+    def fail(size, **kwargs):
+        raise RuntimeError("no model")
+
+    monkeypatch.setattr("faster_whisper.WhisperModel", fail)
+    loader = ModelLoader("tiny", {})
+    loader.start()
+    assert loader.ready.wait(10)
+    assert loader.model is None and str(loader.error) == "no model"
+
+
+def test_transcription_worker_posts_errors(tmp_path):
+    transcribe_queue = queue.Queue()
+    worker = TranscriptionWorker(transcribe_queue, None, str(tmp_path / "missing.mp4"))
+    worker.start()
+    status, message, progress = transcribe_queue.get(timeout=10)
+    assert status == "error" and message and progress is None
+
+
+def test_app_import_is_lazy():
+    code = (
+        "import sys, whisper_shorts_subs.app; "
+        "print(' '.join(sorted({'faster_whisper', 'ctranslate2'} & set(sys.modules))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
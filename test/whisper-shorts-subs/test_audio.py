@@ -0,0 +1,20 @@
+import numpy as np
+import whisper_shorts_subs.audio as audio
+
+
+def test_load_audio_sidecar(tmp_path, monkeypatch):
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b"")
+    calls = []
+
+    def fake_extract_audio(source, sampling_rate):
+        calls.append(source)
+        return np.arange(4, dtype=np.float32)
+
+    monkeypatch.setattr(audio, "extract_audio", fake_extract_audio)
+    first = audio.load_audio(str(video))
+    second = audio.load_audio(str(video))
+    assert len(calls) == 1
+    assert isinstance(second, np.memmap)
+    assert np.array_equal(first, second)
+    assert (tmp_path / "clip.mp4.16000hz.npy").exists()
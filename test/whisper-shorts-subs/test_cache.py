@@ -0,0 +1,28 @@
+import os
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.cache import TranscriptionCache
+
+
+def test_transcription_cache(tmp_path):
+    audio = tmp_path / "clip.mp4"
+    audio.write_bytes(b"not really a video")
+    words = [Word(0.1, 1.1, " apple", 0.8), Word(1.4, 2.1, " orange", 0.9)]
+    cache = TranscriptionCache(str(tmp_path / "cache"))
+    key = cache.key(str(audio), model_size="small", compute_type="int8")
+    assert key != cache.key(str(audio), model_size="tiny", compute_type="int8")
+    assert cache.get(key) is None
+    cache.put(key, words)
+    assert cache.get(key) == words
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_transcription_cache_eviction(tmp_path):
+    cache = TranscriptionCache(str(tmp_path), max_bytes=100)
+    words = [Word(0.1, 1.1, " apple", 0.8)]
+    for ix, key in enumerate(["a", "b", "c"]):
+        cache.put(key, words)
+        os.utime(cache.path(key), (ix, ix))
+    cache.get("a")
+    cache.put("d", words)
+    assert cache.get("b") is None
+    assert cache.get("a") == words and cache.get("d") == words
@@ -0,0 +1,53 @@
+import os
+from whisper_shorts_subs.cli import (
+    build_parser,
+    encoder_from_args,
+    find_videos,
+    parse_outline,
+)
+
+
+def test_find_videos(tmp_path):
+    for name in ["b.mp4", "a.MP4", "notes.txt"]:
+        (tmp_path / name).write_text("")
+    assert find_videos(str(tmp_path)) == [
+        os.path.join(str(tmp_path), "a.MP4"),
+        os.path.join(str(tmp_path), "b.mp4"),
+    ]
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# clips\nb.mp4\n\nsub/c.mp4\n")
+    assert find_videos(str(manifest)) == [
+        os.path.join(str(tmp_path), "b.mp4"),
+        os.path.join(str(tmp_path), "sub/c.mp4"),
+    ]
+
+
+def test_parse_outline():
+    assert parse_outline("0,0,255,6") == {"color": (0, 0, 255), "thickness": 6}
+
+
+def test_encoder_from_args():
+    args = build_parser().parse_args(
+        ["clips", "-o", "out", "--encoder-profile", "draft"]
+    )
+    assert encoder_from_args(args) == {"profile": "draft"}
+    args = build_parser().parse_args(
+        [
+            "clips",
+            "-o",
+            "out",
+            "--bitrate",
+            "4M",
+            "--encoder-threads",
+            "2",
+            "--preset",
+            "fast",
+        ]
+    )
+    assert encoder_from_args(args) == {
+        "profile": "balanced",
+        "bitrate": "4M",
+        "crf": None,
+        "preset": "fast",
+        "threads": 2,
+    }
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.editing import EditableTranscript
+from whisper_shorts_subs.subtitle import create_segments
+from whisper_shorts_subs.util import header_string, word_to_string
+
+WORDS = [Word(ix * 0.3, ix * 0.3 + 0.25, f" w{ix % 7}", 0.9) for ix in range(200)]
+
+
+def to_text(lines):
+    return "\n".join([header_string()] + lines)
+
+
+def test_editable_transcript_matches_full_segmentation():
+    rng = random.Random(0)
+    lines = [word_to_string(word) for word in WORDS]
+    transcript = EditableTranscript(to_text(lines), max_segment_words=4)
+    for _ in range(50):
+        index = rng.randint(0, len(lines))
+        stop = min(len(lines), index + rng.randint(0, 3))
+        lines[index:stop] = [
+            word_to_string(Word(start, start + 0.2, " new", 0.5))
+            for start in sorted(rng.uniform(0, 60) for _ in range(rng.randint(0, 3)))
+        ]
+        transcript.update(to_text(lines))
+        transcript.resegment()
+        words = [word for segment in transcript.segments for word in segment]
+        assert transcript.segments == create_segments(words, max_segment_words=4)
+        assert [word_to_string(word) for word in words] == lines
+    transcript.configure(max_segment_words=2)
+    transcript.resegment()
+    assert transcript.segments == create_segments(transcript.words, max_segment_words=2)
+
+
+def test_editable_transcript_resegments_only_around_edits():
+    lines = [word_to_string(word) for word in WORDS]
+    transcript = EditableTranscript(to_text(lines), max_segment_words=5)
+    transcript.resegment()
+    lines[101] = word_to_string(Word(30.3, 30.5, " edited", 0.5))
+    assert transcript.update(to_text(lines)) == (101, 1, 1)
+    index, removed, inserted = transcript.resegment()
+    assert index == 20 and len(removed) == len(inserted) == 1
+    assert inserted[0][1].word == " edited"
+    assert transcript.resegment() == (40, [], [])
+
+
+def test_editable_transcript_keeps_segments_until_lines_parse():
+    lines = [word_to_string(word) for word in WORDS[:10]]
+    transcript = EditableTranscript(to_text(lines), max_segment_words=5)
+    transcript.resegment()
+    segments = list(transcript.segments)
+    transcript.update(to_text(lines[:4] + ["bad"] + lines[4:]))
+    with pytest.raises(ValueError):
+        transcript.resegment()
+    assert transcript.segments == segments
+    transcript.update(to_text(lines[:4] + lines[5:]))
+    transcript.resegment()
+    assert transcript.segments == create_segments(transcript.words, max_segment_words=5)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from whisper_shorts_subs.encode import FFmpegVideoWriter, encoder_args, resolve_encoder
+
+
+def test_resolve_encoder():
+    assert resolve_encoder("draft") == {
+        "codec": "libx264",
+        "preset": "ultrafast",
+        "crf": 28,
+        "pix_fmt": "yuv420p",
+    }
+    settings = resolve_encoder({"profile": "final", "threads": 2, "crf": None})
+    assert settings["preset"] == "slow" and settings["crf"] is None
+    assert settings["threads"] == 2
+    with pytest.raises(ValueError):
+        resolve_encoder("lossless")
+    with pytest.raises(ValueError):
+        resolve_encoder({"codec": "not_an_encoder"})
+
+
+def test_encoder_args():
+    assert encoder_args({"profile": "balanced", "bitrate": "4M", "crf": None}) == [
+        "-c:v",
+        "libx264",
+        "-pix_fmt",
+        "yuv420p",
+        "-preset",
+        "medium",
+        "-b:v",
+        "4M",
+    ]
+
+
+def test_ffmpeg_video_writer_reports_early_exits(tmp_path):
+    out = FFmpegVideoWriter(
+        str(tmp_path / "out.mp4"), 10, (64, 64), codec="not_an_encoder"
+    )
+    frame = np.zeros((64, 64, 3), np.uint8)
+    with pytest.raises(RuntimeError, match="not_an_encoder"):
+        for _ in range(1000):
+            out.write(frame)
+    out.release()
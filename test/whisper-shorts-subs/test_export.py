@@ -0,0 +1,113 @@
+import av
+import cv2
+import numpy as np
+import pytest
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.cache import ExportCache
+from whisper_shorts_subs.export import (
+    create_subtitled_video_cached,
+    create_subtitled_video_passthrough,
+    plan_passthrough,
+    split_frame_ranges,
+    split_gop_ranges,
+)
+
+
+def test_split_frame_ranges():
+    assert split_frame_ranges(10, 3) == [(0, 4), (4, 8), (8, 10)]
+    assert split_frame_ranges(2, 8) == [(0, 1), (1, 2)]
+    assert split_frame_ranges(5, 1) == [(0, 5)]
+
+
+def test_plan_passthrough():
+    frame_states = np.full(100, -1, np.int32)
+    frame_states[35:45] = 0
+    frame_states[70:72] = 1
+    assert plan_passthrough(frame_states, [0, 30, 60, 90]) == [
+        (0, 30, True),
+        (30, 90, False),
+        (90, 100, True),
+    ]
+    assert plan_passthrough(frame_states, [30, 60, 90])[0] == (0, 90, False)
+    assert plan_passthrough(np.full(10, -1, np.int32), [0, 5]) == [(0, 10, True)]
+    assert plan_passthrough(np.zeros(0, np.int32), [0]) == []
+
+
+def test_split_gop_ranges():
+    assert split_gop_ranges(100, [0, 30, 60, 90], 25) == [
+        (0, 30),
+        (30, 60),
+        (60, 90),
+        (90, 100),
+    ]
+    assert split_gop_ranges(100, [0, 30, 60, 90], 40) == [(0, 60), (60, 100)]
+    assert split_gop_ranges(50, [0], 20) == [(0, 20), (20, 40), (40, 50)]
+    assert split_gop_ranges(0, [0], 20) == []
+
+
+def test_create_subtitled_video_cached_renders_changed_chunks(tmp_path):
+    video = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"mp4v"), 10, (90, 160))
+    for _ in range(60):
+        out.write(np.zeros((160, 90, 3), np.uint8))
+    out.release()
+    cache = ExportCache(str(tmp_path / "cache"))
+    segments = [[Word(ix + 0.2, ix + 0.8, " hi", 0.9)] for ix in range(6)]
+    kwargs = dict(chunk_seconds=1, font_scale=0.5)
+    outfile = str(tmp_path / "out.mp4")
+    chunks = create_subtitled_video_cached(video, outfile, segments, cache, **kwargs)
+    assert chunks > 1
+    assert create_subtitled_video_cached(video, outfile, segments, cache, **kwargs) == 0
+    segments[3] = [Word(3.2, 3.8, " edited", 0.9)]
+    rendered = create_subtitled_video_cached(video, outfile, segments, cache, **kwargs)
+    assert 0 < rendered < chunks
+    cap = cv2.VideoCapture(outfile)
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 60
+    cap.release()
+
+
+def decode_frames(video):
+    with av.open(video) as container:
+        return [frame.to_ndarray(format="bgr24") for frame in container.decode(video=0)]
+
+
+@pytest.mark.parametrize("codec", ["libx264", "libx265"])
+def test_create_subtitled_video_passthrough(tmp_path, codec):
+    video = str(tmp_path / "clip.mp4")
+    with av.open(video, "w") as container:
+        stream = container.add_stream(codec, rate=10)
+        stream.width, stream.height, stream.pix_fmt = 96, 160, "yuv420p"
+        stream.codec_context.gop_size = 10
+        stream.options = (
+            {"x264-params": "keyint=10:min-keyint=10:scenecut=0:bframes=0"}
+            if codec == "libx264"
+            else {
+                "x265-params": "keyint=10:min-keyint=10:scenecut=0:bframes=0:log-level=error"
+            }
+        )
+        for ix in range(60):
+            frame = np.full((160, 96, 3), 40 + ix, np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(frame, "bgr24")):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    outfile = str(tmp_path / "out.mp4")
+    segments = [[Word(2.0, 3.5, " HI", 0.9)]]
+    assert create_subtitled_video_passthrough(
+        video,
+        outfile,
+        segments,
+        encoder="draft",
+        font_scale=1,
+        font_color=(255, 255, 255),
+    )
+    source = decode_frames(video)
+    frames = decode_frames(outfile)
+    assert len(frames) == 60
+    for ix, (frame, source_frame) in enumerate(zip(frames, source)):
+        if 20 <= ix <= 35:
+            assert np.count_nonzero(frame > 200) > 50
+        elif 20 <= ix < 40:
+            assert np.abs(frame.astype(int) - source_frame).max() < 20
+        else:
+            np.testing.assert_array_equal(frame, source_frame)
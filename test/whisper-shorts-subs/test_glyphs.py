@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+from whisper_shorts_subs.glyphs import GlyphAtlas, TextRasterizer
+from whisper_shorts_subs.render import SubtitleRenderer
+
+
+def test_glyph_atlas_places_text_like_put_text():
+    atlas = GlyphAtlas()
+    font = cv2.FONT_HERSHEY_TRIPLEX
+    expected = np.zeros((120, 400), np.uint8)
+    cv2.putText(expected, "hello", (20, 80), font, 2, 255, 2, cv2.LINE_AA)
+    result = np.zeros_like(expected)
+    for glyph, x, y in atlas.place("hello", (20, 80), font, 2, 2):
+        height, width = glyph.mask.shape
+        target = result[y : y + height, x : x + width]
+        np.maximum(target, glyph.mask, out=target)
+    assert (result != expected).mean() < 0.01
+    assert atlas.glyph(" ", font, 2, 2) is None
+    misses = atlas.misses
+    atlas.place("hell", (0, 0), font, 2, 2)
+    assert atlas.misses == misses and atlas.hits > 0
+
+
+def test_text_rasterizer_matches_direct_draw():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (640, 360, 3), dtype=np.uint8)
+    outlines = [
+        {"color": (0, 0, 0), "thickness": 8},
+        {"color": (0, 90, 0), "thickness": 4},
+    ]
+    for strategy, state in [
+        ("whole_segment", (("some", "text"), None)),
+        ("highlight", (("some", "text"), 1)),
+    ]:
+        renderer = SubtitleRenderer(
+            frame.shape,
+            strategy=strategy,
+            font_scale=1,
+            outlines=outlines,
+            current_word_scale=1.5,
+        )
+        expected = renderer.draw(np.copy(frame), state)
+        result = renderer.render(frame, state, inplace=False)
+        difference = np.abs(result.astype(int) - expected.astype(int))
+        assert difference.max() <= 32 and (difference > 2).mean() < 0.001
+
+
+def test_text_rasterizer_clips_to_frame():
+    rasterizer = TextRasterizer(orient=(-20, 10), font_scale=1)
+    x, y, color, transmission = rasterizer.rasterize(("clipped",), None, (100, 100))
+    assert (x, y) == (0, 0)
+    assert color.shape == transmission.shape and color.shape[1] <= 100
+    assert (
+        TextRasterizer(orient=(200, 50)).rasterize(("gone",), None, (100, 100)) is None
+    )
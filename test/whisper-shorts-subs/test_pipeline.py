@@ -0,0 +1,123 @@
+import cv2
+import numpy as np
+import pytest
+import whisper_shorts_subs.subtitle as subtitle
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.pipeline import (
+    FanOutCapture,
+    FanOutWriter,
+    FramePool,
+    run_pipeline,
+)
+
+
+class FakeCapture:
+    def __init__(self, frames):
+        self.frames = frames
+        self.position = 0
+
+    def read(self, image=None):
+        if self.position >= self.frames:
+            return False, None
+        image[:] = self.position
+        self.position += 1
+        return True, image
+
+
+class FakeWriter:
+    def __init__(self):
+        self.frames = []
+        self.buffers = set()
+
+    def write(self, frame):
+        self.frames.append(frame.copy())
+        self.buffers.add(id(frame))
+
+    def release(self):
+        self.released = True
+
+
+def test_frame_pool():
+    pool = FramePool((2, 2, 3), 1)
+    buffer = pool.acquire()
+    pool.release(np.zeros((1, 1, 3), np.uint8))
+    pool.release(buffer)
+    assert pool.acquire(timeout=1) is buffer
+
+
+def test_run_pipeline_keeps_order_and_reuses_buffers():
+    out = FakeWriter()
+
+    def render_frame(frame_index, frame):
+        frame[0, 0, 0] = frame_index + 100
+
+    frames = run_pipeline(
+        FakeCapture(40), out, range(50), render_frame, (4, 4, 3), queue_size=2
+    )
+    assert frames == 40
+    assert [int(frame[1, 1, 0]) for frame in out.frames] == list(range(40))
+    assert [int(frame[0, 0, 0]) for frame in out.frames] == list(range(100, 140))
+    assert len(out.buffers) <= 7
+
+
+def test_run_pipeline_raises_stage_errors():
+    def render_frame(frame_index, frame):
+        if frame_index == 5:
+            raise ValueError("bad frame")
+
+    with pytest.raises(ValueError):
+        run_pipeline(FakeCapture(40), FakeWriter(), range(40), render_frame, (4, 4, 3))
+
+
+def test_run_pipeline_fans_out_to_several_outputs():
+    outs = [FakeWriter(), FakeWriter()]
+
+    def render_frames(frame_index, frames):
+        for ix, frame in enumerate(frames):
+            frame[0, 0, 0] = 100 * (ix + 1) // 2 + frame_index
+
+    frames = run_pipeline(
+        FanOutCapture(FakeCapture(20)),
+        FanOutWriter(outs),
+        range(20),
+        render_frames,
+        (2, 4, 4, 3),
+    )
+    assert frames == 20
+    for ix, out in enumerate(outs):
+        assert [int(frame[1, 1, 0]) for frame in out.frames] == list(range(20))
+        assert [int(frame[0, 0, 0]) for frame in out.frames] == [
+            100 * (ix + 1) // 2 + frame_index for frame_index in range(20)
+        ]
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_create_subtitled_videos_releases_writers_on_errors(
+    tmp_path, monkeypatch, pipelined
+):
+    video = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"mp4v"), 10, (40, 80))
+    for _ in range(12):
+        out.write(np.zeros((80, 40, 3), np.uint8))
+    out.release()
+
+    class FailingWriter(FakeWriter):
+        def write(self, frame):
+            if len(self.frames) == 5:
+                raise OSError("disk full")
+            super().write(frame)
+
+    writers = [FailingWriter(), FakeWriter()]
+    monkeypatch.setattr(
+        subtitle, "open_video_writer", lambda *args, **kwargs: writers.pop(0)
+    )
+    outs = writers[:]
+    with pytest.raises(OSError):
+        subtitle.create_subtitled_videos(
+            video,
+            [{"outfile": "a.mp4"}, {"outfile": "b.mp4", "font_scale": 0.5}],
+            [[Word(0.2, 0.8, " hi", 0.9)]],
+            show_progress=False,
+            pipelined=pipelined,
+        )
+    assert all(getattr(out, "released", False) for out in outs)
@@ -0,0 +1,38 @@
+import cv2
+import numpy as np
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.preview import PreviewSource, fit_size, render_preview
+
+
+def test_fit_size():
+    assert fit_size((1080, 1920), (180, 320)) == ((180, 320), 1 / 6)
+    assert fit_size((1920, 1080), (180, 320))[0] == (180, 101)
+
+
+def test_preview_source_caches_downscaled_frames(tmp_path):
+    video = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"mp4v"), 10, (360, 640))
+    for ix in range(20):
+        out.write(np.full((640, 360, 3), ix * 10, np.uint8))
+    out.release()
+    source = PreviewSource(video, (180, 320), max_frames=2)
+    assert source.frame_count == 20 and source.scale == 0.5
+    frame = source.frame_at(1.0)
+    assert frame.shape == (320, 180, 3)
+    assert abs(int(frame.mean()) - 100) <= 6
+    assert source.frame_at(1.05) is frame
+    source.frame_at(0.0)
+    source.frame_at(0.5)
+    source.frame_at(1.0)
+    assert source.hits == 1 and source.misses == 4
+    source.release()
+
+
+def test_render_preview():
+    frame = np.zeros((320, 180, 3), np.uint8)
+    segments = [[Word(1.0, 1.5, " hello", 0.9)]]
+    assert render_preview(frame, segments, 0.5, 1 / 6).max() == 0
+    image = render_preview(
+        frame, segments, 1.2, 1 / 6, strategy="highlight", font_scale=2
+    )
+    assert image.max() > 0 and frame.max() == 0
@@ -0,0 +1,51 @@
+import json
+
+import cv2
+import numpy as np
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.progress import ExportProgress, MetricsLog, format_progress
+from whisper_shorts_subs.subtitle import create_subtitled_video
+
+
+def test_export_progress():
+    reports = []
+    progress = ExportProgress(100, reports.append, interval=3600)
+    progress.add(10, decode=0.5, render=0.25)
+    progress.update_child(0, {"frames": 20, "stages": {"encode": 1.0}})
+    progress.update_child(0, {"frames": 30, "stages": {"encode": 2.0}})
+    progress.report()
+    progress.report()
+    assert len(reports) == 1
+    metrics = reports[0]
+    assert metrics["frames"] == 40 and metrics["total_frames"] == 100
+    assert metrics["stages"] == {
+        "decode": 0.5,
+        "render": 0.25,
+        "encode": 2.0,
+        "mux": 0.0,
+    }
+    assert metrics["eta"] is not None and metrics["eta"] > 0
+    progress.report(force=True)
+    assert len(reports) == 2
+    assert format_progress(dict(metrics, fps=10.0, eta=75)) == "40% 10.0 fps, 1:15 left"
+
+
+def test_create_subtitled_video_reports_progress(tmp_path):
+    video = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(video, cv2.VideoWriter_fourcc(*"mp4v"), 10, (90, 160))
+    for _ in range(12):
+        out.write(np.zeros((160, 90, 3), np.uint8))
+    out.release()
+    log_file = tmp_path / "metrics.jsonl"
+    create_subtitled_video(
+        video,
+        str(tmp_path / "out.mp4"),
+        [[Word(0.2, 0.8, " hi", 0.9)]],
+        font_scale=0.5,
+        show_progress=False,
+        progress_callback=MetricsLog(str(log_file), video=video),
+    )
+    lines = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert lines[-1]["frames"] == lines[-1]["total_frames"] == 12
+    assert lines[-1]["video"] == video
+    assert set(lines[-1]["stages"]) == {"decode", "render", "encode", "mux"}
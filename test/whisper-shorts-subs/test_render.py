@@ -0,0 +1,69 @@
+import numpy as np
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.render import SubtitleRenderer, subtitle_state
+
+
+def test_subtitle_state():
+    segment = [
+        Word(0.0, 0.5, " hello", 0.9),
+        Word(0.6, 1.0, " there", 0.9),
+    ]
+    assert subtitle_state(segment, 0.7) == (("hello", "there"), None)
+    assert subtitle_state(segment, 0.7, "highlight") == (("hello", "there"), 1)
+    assert subtitle_state(segment, 0.3, "type") == (("hello",), None)
+
+
+def test_renderer_matches_direct_draw():
+    outlines = [{"color": (0, 0, 0), "thickness": 8}]
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (320, 180, 3), dtype=np.uint8)
+    for strategy, state in [
+        ("whole_segment", (("some", "text"), None)),
+        ("highlight", (("some", "text"), 1)),
+    ]:
+        renderer = SubtitleRenderer(
+            frame.shape,
+            strategy=strategy,
+            use_glyph_atlas=False,
+            font_scale=0.5,
+            outlines=outlines,
+            current_word_scale=1.5,
+        )
+        expected = renderer.draw(np.copy(frame), state)
+        result = renderer.render(frame, state, inplace=False)
+        assert np.abs(result.astype(int) - expected.astype(int)).max() <= 2
+        renderer.render(frame, state, inplace=False)
+        assert renderer.hits == 1 and renderer.misses == 1
+    assert (
+        renderer.render(frame, ((), None), inplace=False).tobytes() == frame.tobytes()
+    )
+
+
+def test_renderer_draws_only_caption_band():
+    frame = np.full((640, 360, 3), 127, np.uint8)
+    for orient_y_percent in (0.0, 0.5, 1.0):
+        renderer = SubtitleRenderer(
+            frame.shape,
+            strategy="highlight",
+            use_glyph_atlas=False,
+            font_scale=1,
+            orient_y_percent=orient_y_percent,
+            current_word_scale=1.5,
+        )
+        state = (("([gjy", "|}])"), 0)
+        _, y0, y1 = renderer.caption_band(state)
+        assert 0 <= y0 < y1 <= frame.shape[0] and y1 - y0 < frame.shape[0] // 2
+        expected = renderer.draw(np.copy(frame), state)
+        result = renderer.render(frame, state, inplace=False)
+        assert np.abs(result.astype(int) - expected.astype(int)).max() <= 2
+
+
+def test_renderer_discards_edited_segments():
+    segment = [Word(0.0, 0.5, " hello", 0.9), Word(0.6, 1.0, " there", 0.9)]
+    frame = np.zeros((320, 180, 3), np.uint8)
+    renderer = SubtitleRenderer(frame.shape, strategy="type", font_scale=0.5)
+    for timestamp in (0.3, 0.7):
+        renderer.render(frame, subtitle_state(segment, timestamp, "type"))
+    renderer.render(frame, (("other",), None))
+    assert renderer.discard([segment]) == 2
+    assert list(renderer.cache) == [(("other",), None)]
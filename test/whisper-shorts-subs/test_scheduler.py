@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+from faster_whisper.transcribe import Word
+import whisper_shorts_subs.scheduler as scheduler
+
+
+class FakeModel:
+    def __init__(self, model_size, **kwargs):
+        self.kwargs = kwargs
+
+    def transcribe(self, audio, word_timestamps=False):
+        segment = SimpleNamespace(end=1.0, words=[Word(0.0, 1.0, audio, 1.0)])
+        return iter([segment]), SimpleNamespace(duration=1.0)
+
+
+def test_transcription_scheduler(monkeypatch):
+    monkeypatch.setattr(scheduler, "WhisperModel", FakeModel)
+    monkeypatch.setattr(scheduler, "load_audio", lambda filename: filename)
+    with scheduler.TranscriptionScheduler(workers=3, cpu_threads=2) as pool:
+        assert pool.models.qsize() == 3
+        assert pool.models.queue[0].kwargs == {"cpu_threads": 2, "num_workers": 3}
+        results = pool.transcribe_all(["a", "b", "c", "d"])
+    assert [words[0].word for words in results] == ["a", "b", "c", "d"]
@@ -0,0 +1,47 @@
+import pytest
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.segmentation import segment_ranges
+from whisper_shorts_subs.subtitle import create_segments
+from whisper_shorts_subs.transcript import Transcript
+
+WORDS = [
+    Word(0.0, 0.4, " one", 0.9),
+    Word(0.5, 0.9, " two", 0.9),
+    Word(1.0, 1.4, " three", 0.9),
+    Word(2.5, 2.9, " four", 0.9),
+    Word(3.0, 3.4, " five", 0.9),
+    Word(3.5, 3.9, " six", 0.9),
+    Word(4.0, 4.4, " seven", 0.9),
+]
+
+
+def test_segment_ranges_splits_on_pauses_and_word_counts():
+    starts = [word.start for word in WORDS]
+    ends = [word.end for word in WORDS]
+    assert segment_ranges(starts, ends).tolist() == [[0, 3], [3, 7]]
+    assert segment_ranges(starts, ends, max_segment_words=2).tolist() == [
+        [0, 2],
+        [2, 3],
+        [3, 5],
+        [5, 7],
+    ]
+    assert segment_ranges([], []).shape == (0, 2)
+    with pytest.raises(ValueError):
+        segment_ranges(starts, ends, max_segment_chars=10)
+
+
+def test_segment_ranges_limits_chars_and_duration():
+    transcript = Transcript.from_words(WORDS)
+    ranges = transcript.segment_ranges(max_segment_chars=9).tolist()
+    assert ranges == [[0, 2], [2, 3], [3, 5], [5, 7]]
+    ranges = transcript.segment_ranges(max_segment_duration=1.0).tolist()
+    assert ranges == [[0, 2], [2, 3], [3, 5], [5, 7]]
+    ranges = transcript.segment_ranges(max_segment_chars=1).tolist()
+    assert ranges == [[ix, ix + 1] for ix in range(len(WORDS))]
+
+
+def test_create_segments():
+    assert create_segments([]) == []
+    segments = create_segments(WORDS, max_segment_words=2, max_segment_chars=9)
+    assert [len(segment) for segment in segments] == [2, 1, 2, 2]
+    assert [word for segment in segments for word in segment] == WORDS
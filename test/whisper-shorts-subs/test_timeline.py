@@ -0,0 +1,58 @@
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.render import subtitle_state
+from whisper_shorts_subs.subtitle import create_segments
+from whisper_shorts_subs.timeline import build_timeline, segment_at
+
+WORDS = [
+    Word(0.1, 0.5, " one", 0.9),
+    Word(0.5, 0.9, " two", 0.9),
+    Word(1.0, 1.3, " three", 0.9),
+    Word(2.5, 2.8, " four", 0.9),
+    Word(2.9, 3.5, " five", 0.9),
+]
+
+
+def reference_state(segments, timestamp, strategy):
+    for segment in segments:
+        if timestamp > segment[-1].end:
+            continue
+        if timestamp < segment[0].start:
+            return None
+        return subtitle_state(segment, timestamp, strategy)
+    return None
+
+
+def test_build_timeline_matches_per_frame_lookup():
+    segments = create_segments(WORDS, max_segment_words=2)
+    fps = 30
+    for strategy in ["whole_segment", "type", "highlight"]:
+        timeline = build_timeline(segments, fps, 130, strategy)
+        for frame in range(130):
+            expected = reference_state(segments, frame / fps, strategy)
+            assert timeline.state_at(frame) == expected
+        assert len(set(timeline.states)) == len(timeline.states)
+
+
+def test_timeline_runs():
+    timeline = build_timeline(create_segments(WORDS), 10, 40)
+    assert timeline.runs() == [
+        (0, 1, -1),
+        (1, 14, 0),
+        (14, 25, -1),
+        (25, 36, 1),
+        (36, 40, -1),
+    ]
+    assert timeline.runs(5, 20) == [(5, 14, 0), (14, 20, -1)]
+
+
+def test_segment_at():
+    segments = [
+        [Word(0.5, 1.0, " a", 0.9)],
+        [Word(2.0, 2.5, " b", 0.9), Word(2.6, 3.0, " c", 0.9)],
+    ]
+    assert segment_at(segments, 0.2) is None
+    assert segment_at(segments, 1.0) is segments[0]
+    assert segment_at(segments, 1.5) is None
+    assert segment_at(segments, 2.55) is segments[1]
+    assert segment_at(segments, 3.5) is None
+    assert segment_at([], 1.0) is None
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+import numpy as np
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.transcribe import (
+    iter_transcribe_with_timestamps,
+    speech_chunks,
+    transcribe_with_timestamps,
+)
+
+
+class FakeModel:
+    def transcribe(self, audio, word_timestamps=False):
+        segments = [
+            SimpleNamespace(end=2.0, words=[Word(0.1, 1.1, " Apple,", 0.8)]),
+            SimpleNamespace(end=4.0, words=[Word(3.1, 4.0, " Pear", 0.82)]),
+        ]
+        return iter(segments), SimpleNamespace(duration=8.0)
+
+
+def test_iter_transcribe_with_timestamps():
+    results = list(iter_transcribe_with_timestamps(FakeModel(), "clip.mp4"))
+    assert [progress for _, progress in results] == [0.25, 0.5]
+    assert results[0][0] == [Word(0.1, 1.1, " Apple,", 0.8)]
+
+
+def test_transcribe_with_timestamps():
+    words = transcribe_with_timestamps(
+        FakeModel(), "clip.mp4", lowercase=True, remove_punctuation=True
+    )
+    assert [word.word for word in words] == [" apple", " pear"]
+
+
+class ChunkModel:
+    def transcribe(self, audio, word_timestamps=False):
+        word = Word(0.5, 1.0, f" {len(audio)}", 0.9)
+        return iter([SimpleNamespace(end=1.0, words=[word])]), None
+
+
+def test_speech_chunks(monkeypatch):
+    regions = [(0, 16000), (24000, 48000), (100000, 120000), (130000, 600000)]
+    monkeypatch.setattr(
+        "faster_whisper.vad.get_speech_timestamps",
+        lambda audio, vad_options, sampling_rate: [
+            {"start": start, "end": end} for start, end in regions
+        ],
+    )
+    audio = np.zeros(600000, np.float32)
+    assert speech_chunks(audio, max_chunk_seconds=30, max_gap_seconds=2) == [
+        (0, 48000),
+        (100000, 120000),
+        (130000, 600000),
+    ]
+    words = transcribe_with_timestamps(ChunkModel(), audio, vad=True, vad_workers=2)
+    assert [(word.start, word.word) for word in words] == [
+        (0.5, " 48000"),
+        (6.75, " 20000"),
+        (8.625, " 470000"),
+    ]
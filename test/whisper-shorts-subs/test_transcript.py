@@ -0,0 +1,53 @@
+import pytest
+from faster_whisper.transcribe import Word
+from whisper_shorts_subs.transcript import Transcript, format_timestamp
+from whisper_shorts_subs.util import words_to_string
+
+WORDS = [
+    Word(0.1, 1.1, " apple", 0.8),
+    Word(1.4, 2.1, " orange", 0.9),
+    Word(3.1, 4.6, " apple", 0.745),
+    Word(3725.2, 3726.09, " pear", 0.82),
+]
+
+
+def test_transcript_columns():
+    transcript = Transcript.from_words(WORDS)
+    assert len(transcript) == 4
+    assert transcript.vocabulary == [" apple", " orange", " pear"]
+    assert transcript.word_ids.tolist() == [0, 1, 0, 2]
+    assert transcript.words() == WORDS
+    assert transcript[1] == WORDS[1]
+    assert transcript[1:3].words() == WORDS[1:3]
+
+
+def test_transcript_string_round_trip():
+    text = words_to_string(WORDS)
+    transcript = Transcript.from_string(text)
+    assert transcript.to_string() == text
+    assert transcript.words() == WORDS
+    assert len(Transcript.from_string(text.split("\n")[0])) == 0
+    with pytest.raises(ValueError):
+        Transcript.from_string(text + "\n banana\t1.0")
+    with pytest.raises(ValueError):
+        Transcript.from_string(text + "\n banana\tsoon\t2.0\t0.5")
+
+
+def test_transcript_files(tmp_path):
+    transcript = Transcript.from_words(WORDS)
+    for extension in ("npz", "json", "tsv"):
+        path = str(tmp_path / f"transcript.{extension}")
+        transcript.write(path)
+        assert Transcript.read(path).words() == WORDS
+
+
+def test_transcript_captions():
+    transcript = Transcript.from_words(WORDS)
+    assert format_timestamp(3725.2) == "01:02:05,200"
+    assert transcript.to_srt([(0, 3), (3, 4)]) == (
+        "1\n00:00:00,100 --> 00:00:04,600\napple orange apple\n\n"
+        "2\n01:02:05,200 --> 01:02:06,090\npear\n\n"
+    )
+    assert transcript.to_vtt().startswith(
+        "WEBVTT\n\n00:00:00.100 --> 00:00:01.100\napple\n\n"
+    )
@@ -1,6 +1,21 @@
+import subprocess
+import sys
+
+
 def test_version_pep440():
     from pkg_resources import parse_version
     from pkg_resources.extern.packaging.version import Version
     from whisper_shorts_subs import __version__
 
     assert isinstance(parse_version(__version__), Version)
+
+
+def test_subtitle_import_is_lazy():
+    code = (
+        "import sys, whisper_shorts_subs.subtitle, whisper_shorts_subs.export; "
+        "print(' '.join(sorted({'customtkinter', 'faster_whisper', 'moviepy'} & set(sys.modules))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""